@@ -1,11 +1,12 @@
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
-import yfinance as yf
 import pandas as pd
 
-from utils import styled_dataframe, get_yahoo_symbol
-from data_loader import get_tefas_data
+from utils import styled_dataframe
+from history_store import get_daily_closes
+from derived_instruments import DERIVED_INSTRUMENTS, derived_history
+from portfolio_timeseries import asset_currency, portfolio_value_series
 from profile_manager import get_current_profile
 
 
@@ -548,29 +549,6 @@ def render_detail_view(symbol: str, pazar: str) -> None:
     st.write(f"Detay görünüm: {symbol} ({pazar})")
 
 
-@st.cache_data(ttl=600)  # 10 dakika cache - tarihsel veriler daha az sık değişir
-def _fetch_historical_prices_batch(symbols_list, period="60d", interval="1d"):
-    """Batch olarak tarihsel fiyat verilerini çeker - optimize edilmiş"""
-    if not symbols_list:
-        return {}
-    try:
-        # Batch işlemi - timeout ile optimize edilmiş
-        tickers = yf.Tickers(" ".join(symbols_list))
-        prices_dict = {}
-        for sym in symbols_list:
-            try:
-                # Timeout ekle - daha hızlı hata yakalama
-                h = tickers.tickers[sym].history(period=period, interval=interval, timeout=15)
-                if not h.empty:
-                    prices_dict[sym] = h["Close"]
-            except Exception:
-                # Hata durumunda None ekle - sessiz geç
-                prices_dict[sym] = None
-        return prices_dict
-    except Exception:
-        # Genel hata durumunda boş dict döndür
-        return {}
-
 def get_historical_chart(df: pd.DataFrame, usd_try_rate: float, pb: str, start_date: pd.Timestamp = None):
     """
     Tarihsel portföy değeri grafiği oluşturur.
@@ -597,185 +575,24 @@ def get_historical_chart(df: pd.DataFrame, usd_try_rate: float, pb: str, start_d
         maliyet = float(row.get("Maliyet", 0) or 0)
         if adet > 0 and maliyet > 0:
             # Para birimine göre maliyet hesapla
-            pazar = str(row.get("Pazar", ""))
-            kod = str(row.get("Kod", ""))
-            pazar_upper = pazar.upper()
-            kod_upper = kod.upper()
-            
-            if (
-                "BIST" in pazar_upper
-                or "TL" in kod_upper
-                or "FON" in pazar_upper
-                or "EMTIA" in pazar_upper
-                or "NAKIT" in pazar_upper
-            ):
-                asset_currency = "TRY"
-            else:
-                asset_currency = "USD"
-            
+            currency = asset_currency(str(row.get("Kod", "")), str(row.get("Pazar", "")))
             cost_native = maliyet * adet
             if pb == "TRY":
-                if asset_currency == "USD":
+                if currency == "USD":
                     total_cost += cost_native * usd_try_rate
                 else:
                     total_cost += cost_native
             else:  # pb == "USD"
-                if asset_currency == "TRY":
+                if currency == "TRY":
                     total_cost += cost_native / usd_try_rate
                 else:
                     total_cost += cost_native
 
-    # Önce tüm sembolleri topla
-    yahoo_symbols = []
-    symbol_to_rows = {}  # symbol -> [(idx, kod, pazar, adet, asset_currency, maliyet), ...]
-    special_cases = []  # Nakit, fon, gram altın/gümüş için
-    
-    for idx, row in df.iterrows():
-        kod = str(row.get("Kod", ""))
-        pazar = str(row.get("Pazar", ""))
-        adet = float(row.get("Adet", 0) or 0)
-        maliyet = float(row.get("Maliyet", 0) or 0)
-
-        if adet == 0 or not kod:
-            continue
-
-        pazar_upper = pazar.upper()
-        kod_upper = kod.upper()
-
-        # TRY mi USD mi?
-        if (
-            "BIST" in pazar_upper
-            or "TL" in kod_upper
-            or "FON" in pazar_upper
-            or "EMTIA" in pazar_upper
-            or "NAKIT" in pazar_upper
-        ):
-            asset_currency = "TRY"
-        else:
-            asset_currency = "USD"
-
-        # Özel durumları ayır
-        if "NAKIT" in pazar_upper:
-            special_cases.append(("NAKIT", idx, kod, pazar, adet, asset_currency, maliyet))
-        elif "FON" in pazar_upper:
-            special_cases.append(("FON", idx, kod, pazar, adet, asset_currency, maliyet))
-        elif "GRAM GÜMÜŞ" in kod_upper:
-            if "SI=F" not in yahoo_symbols:
-                yahoo_symbols.append("SI=F")
-            if "SI=F" not in symbol_to_rows:
-                symbol_to_rows["SI=F"] = []
-            symbol_to_rows["SI=F"].append((idx, kod, pazar, adet, asset_currency, "GRAM_GUMUS", maliyet))
-        elif "22 AYAR" in kod_upper:
-            # 22 ayar gram altın - ayrı case_type
-            if "GC=F" not in yahoo_symbols:
-                yahoo_symbols.append("GC=F")
-            if "GC=F" not in symbol_to_rows:
-                symbol_to_rows["GC=F"] = []
-            symbol_to_rows["GC=F"].append((idx, kod, pazar, adet, asset_currency, "GRAM_ALTIN_22AYAR", maliyet))
-        elif "GRAM ALTIN" in kod_upper:
-            # 24 ayar (saf) gram altın
-            if "GC=F" not in yahoo_symbols:
-                yahoo_symbols.append("GC=F")
-            if "GC=F" not in symbol_to_rows:
-                symbol_to_rows["GC=F"] = []
-            symbol_to_rows["GC=F"].append((idx, kod, pazar, adet, asset_currency, "GRAM_ALTIN", maliyet))
-        else:
-            symbol = get_yahoo_symbol(kod, pazar)
-            if symbol not in yahoo_symbols:
-                yahoo_symbols.append(symbol)
-            if symbol not in symbol_to_rows:
-                symbol_to_rows[symbol] = []
-            symbol_to_rows[symbol].append((idx, kod, pazar, adet, asset_currency, "NORMAL", maliyet))
-
-    # Batch olarak fiyat verilerini çek
-    batch_prices = _fetch_historical_prices_batch(yahoo_symbols, period="60d", interval="1d")
-    
-    all_series = []
-    today = pd.Timestamp.today().normalize()
-
-    # Özel durumları işle
-    for case_type, idx, kod, pazar, adet, asset_currency, maliyet in special_cases:
-        prices = None
-        try:
-            if case_type == "NAKIT":
-                kod_upper = kod.upper()
-                if kod_upper == "TL":
-                    prices = pd.Series([1.0], index=[today])
-                elif kod_upper == "USD":
-                    prices = pd.Series([usd_try_rate], index=[today])
-                else:
-                    prices = pd.Series([1.0], index=[today])
-            elif case_type == "FON":
-                price, _ = get_tefas_data(kod)
-                if price and price > 0:
-                    idx_range = pd.date_range(end=today, periods=30, freq="D")
-                    prices = pd.Series(price, index=idx_range)
-        except Exception:
-            pass
-        
-        if prices is not None and not prices.empty:
-            prices.index = pd.to_datetime(prices.index).tz_localize(None)
-            if pb == "TRY":
-                if asset_currency == "USD":
-                    values = prices * adet * usd_try_rate
-                else:
-                    values = prices * adet
-            else:
-                if asset_currency == "TRY":
-                    values = prices * adet / usd_try_rate
-                else:
-                    values = prices * adet
-            all_series.append(values.rename(f"Değer_{idx}"))
-
-    # Normal sembolleri işle
-    for symbol, rows in symbol_to_rows.items():
-        if symbol not in batch_prices or batch_prices[symbol] is None:
-            continue
-        
-        prices = batch_prices[symbol]
-        prices.index = pd.to_datetime(prices.index).tz_localize(None)
-        
-        for row_data in rows:
-            if len(row_data) == 7:
-                idx, kod, pazar, adet, asset_currency, case_type, maliyet = row_data
-            else:
-                # Eski format desteği
-                idx, kod, pazar, adet, asset_currency, case_type = row_data
-                maliyet = 0.0
-            
-            if case_type == "GRAM_ALTIN_22AYAR":
-                # 22 ayar gram altın = 22/24 = 0.9167 (91.67% saf altın)
-                prices_converted = ((prices * usd_try_rate) / 31.1035) * 0.9167
-            elif case_type in ["GRAM_GUMUS", "GRAM_ALTIN"]:
-                # Gram altın/gümüş için özel dönüşüm (24 ayar = saf altın)
-                prices_converted = (prices * usd_try_rate) / 31.1035
-            else:
-                prices_converted = prices
-            
-            # TRY / USD çevirisi
-            if pb == "TRY":
-                if asset_currency == "USD":
-                    values = prices_converted * adet * usd_try_rate
-                else:
-                    values = prices_converted * adet
-            else:  # pb == "USD"
-                if asset_currency == "TRY":
-                    values = prices_converted * adet / usd_try_rate
-                else:
-                    values = prices_converted * adet
-            
-            all_series.append(values.rename(f"Değer_{idx}"))
-
-    if not all_series:
+    # Günlük toplam değer - USD varlıklar tarihsel kurla çevrilir
+    full_series = portfolio_value_series(df, pb, period="60d", start_date=start_date)
+    if full_series is None:
         return None
-
-    # Tüm serileri hizalayıp topla + forward fill
-    df_concat = pd.concat(all_series, axis=1)
-    df_concat.index = pd.to_datetime(df_concat.index)
-    df_concat = df_concat.sort_index()
-    df_concat = df_concat.ffill()  # eksik günleri son değerle doldur
-
-    portfolio_series = df_concat.sum(axis=1)
+    portfolio_series = full_series
     
     # start_date belirtilmişse, o tarihten itibaren filtrele
     if start_date is not None:
@@ -784,14 +601,14 @@ def get_historical_chart(df: pd.DataFrame, usd_try_rate: float, pb: str, start_d
         # En az 1 gün veri olmalı
         if len(portfolio_series) == 0:
             # Eğer start_date'den sonra veri yoksa, en yakın tarihi kullan
-            available_dates = df_concat.sum(axis=1).index
+            available_dates = full_series.index
             if len(available_dates) > 0:
                 closest_date = available_dates[available_dates >= start_date_normalized]
                 if len(closest_date) > 0:
-                    portfolio_series = df_concat.sum(axis=1)[df_concat.sum(axis=1).index >= closest_date[0]]
+                    portfolio_series = full_series[full_series.index >= closest_date[0]]
                 else:
                     # Hiç veri yoksa son 60 günü göster
-                    portfolio_series = df_concat.sum(axis=1)[-60:]
+                    portfolio_series = full_series[-60:]
     else:
         # start_date yoksa son 60 günü göster
         portfolio_series = portfolio_series[-60:]
@@ -1056,54 +873,24 @@ def get_historical_chart(df: pd.DataFrame, usd_try_rate: float, pb: str, start_d
 
 
 @st.cache_data(ttl=600)  # 10 dakika cache - karşılaştırma verileri daha az sık değişir
-def _fetch_comparison_data(symbols_dict, usd_try_rate, pb, period="60d"):
+def _fetch_comparison_data(symbols_dict, pb, period="60d"):
     """
     Karşılaştırma için veri çeker.
-    symbols_dict: {"BIST 100": "XU100.IS", "Altın": "GC=F", ...}
+    symbols_dict: {"BIST 100": "XU100.IS", "Altın": "GRAM_ALTIN", ...} - türetilmiş enstrüman anahtarları da kabul edilir
     """
     results = {}
-    try:
-        all_symbols = list(symbols_dict.values())
-        tickers = yf.Tickers(" ".join(all_symbols))
-        
-        for name, symbol in symbols_dict.items():
-            try:
-                h = tickers.tickers[symbol].history(period=period, interval="1d")
-                if not h.empty:
-                    prices = h["Close"]
-                    prices.index = pd.to_datetime(prices.index).tz_localize(None)
-                    
-                    # Özel dönüşümler
-                    if name == "Altın":
-                        # Gram altın için TRY'ye çevir
-                        if pb == "TRY":
-                            prices = (prices * usd_try_rate) / 31.1035
-                        else:
-                            prices = prices / 31.1035
-                    
-                    results[name] = prices[-60:]  # Son 60 gün
-            except Exception:
-                results[name] = None
-    except Exception:
-        # Batch başarısız olursa tek tek dene
-        for name, symbol in symbols_dict.items():
-            try:
-                ticker = yf.Ticker(symbol)
-                h = ticker.history(period=period, interval="1d")
-                if not h.empty:
-                    prices = h["Close"]
-                    prices.index = pd.to_datetime(prices.index).tz_localize(None)
-                    
-                    if name == "Altın":
-                        if pb == "TRY":
-                            prices = (prices * usd_try_rate) / 31.1035
-                        else:
-                            prices = prices / 31.1035
-                    
-                    results[name] = prices[-60:]
-            except Exception:
-                results[name] = None
-    
+    keys = [sym for sym in symbols_dict.values() if sym in DERIVED_INSTRUMENTS]
+    closes = get_daily_closes([sym for sym in symbols_dict.values() if sym not in DERIVED_INSTRUMENTS], period=period)
+    # Gram enstrümanları görünüm para biriminde (TRY: gram TL, USD: gram USD)
+    closes.update(derived_history(keys, period=period, currency=pb))
+    for name, symbol in symbols_dict.items():
+        prices = closes.get(symbol)
+        if prices is None or prices.empty:
+            results[name] = None
+            continue
+        prices.index = pd.to_datetime(prices.index).tz_localize(None)
+        results[name] = prices  # Pencere depoda dilimlendi
+
     return results
 
 
@@ -1137,10 +924,11 @@ def _fetch_inflation_data():
         return pd.Series(values, index=dates)
 
 
-def get_comparison_chart(df: pd.DataFrame, usd_try_rate: float, pb: str, comparison_type: str):
+def get_comparison_chart(df: pd.DataFrame, usd_try_rate: float, pb: str, comparison_type: str, period: str = "60d"):
     """
     Portföy vs karşılaştırma grafiği oluşturur.
     comparison_type: "BIST 100", "Altın", "SP500", "Enflasyon"
+    period: Okunacak pencere ("60d", "1y", "5y") - yerel depodan dilimlenir
     Tüm seriler dünden itibaren normalize edilir (dünün değeri = 100).
     """
     if df is None or df.empty:
@@ -1150,148 +938,19 @@ def get_comparison_chart(df: pd.DataFrame, usd_try_rate: float, pb: str, compari
     today = pd.Timestamp.today().normalize()
     yesterday = today - pd.Timedelta(days=1)
     
-    # Portföy serisini al (get_historical_chart'tan portföy serisini çıkar)
-    # Önce portföy serisini oluştur
-    yahoo_symbols = []
-    symbol_to_rows = {}
-    special_cases = []
-    
-    for idx, row in df.iterrows():
-        kod = str(row.get("Kod", ""))
-        pazar = str(row.get("Pazar", ""))
-        adet = float(row.get("Adet", 0) or 0)
-        
-        if adet == 0 or not kod:
-            continue
-        
-        pazar_upper = pazar.upper()
-        kod_upper = kod.upper()
-        
-        if (
-            "BIST" in pazar_upper
-            or "TL" in kod_upper
-            or "FON" in pazar_upper
-            or "EMTIA" in pazar_upper
-            or "NAKIT" in pazar_upper
-        ):
-            asset_currency = "TRY"
-        else:
-            asset_currency = "USD"
-        
-        if "NAKIT" in pazar_upper:
-            special_cases.append(("NAKIT", idx, kod, pazar, adet, asset_currency))
-        elif "FON" in pazar_upper:
-            special_cases.append(("FON", idx, kod, pazar, adet, asset_currency))
-        elif "GRAM GÜMÜŞ" in kod_upper:
-            if "SI=F" not in yahoo_symbols:
-                yahoo_symbols.append("SI=F")
-            if "SI=F" not in symbol_to_rows:
-                symbol_to_rows["SI=F"] = []
-            symbol_to_rows["SI=F"].append((idx, kod, pazar, adet, asset_currency, "GRAM_GUMUS"))
-        elif "22 AYAR" in kod_upper:
-            # 22 ayar gram altın - ayrı case_type
-            if "GC=F" not in yahoo_symbols:
-                yahoo_symbols.append("GC=F")
-            if "GC=F" not in symbol_to_rows:
-                symbol_to_rows["GC=F"] = []
-            symbol_to_rows["GC=F"].append((idx, kod, pazar, adet, asset_currency, "GRAM_ALTIN_22AYAR"))
-        elif "GRAM ALTIN" in kod_upper:
-            # 24 ayar (saf) gram altın
-            if "GC=F" not in yahoo_symbols:
-                yahoo_symbols.append("GC=F")
-            if "GC=F" not in symbol_to_rows:
-                symbol_to_rows["GC=F"] = []
-            symbol_to_rows["GC=F"].append((idx, kod, pazar, adet, asset_currency, "GRAM_ALTIN"))
-        else:
-            symbol = get_yahoo_symbol(kod, pazar)
-            if symbol not in yahoo_symbols:
-                yahoo_symbols.append(symbol)
-            if symbol not in symbol_to_rows:
-                symbol_to_rows[symbol] = []
-            symbol_to_rows[symbol].append((idx, kod, pazar, adet, asset_currency, "NORMAL"))
-    
-    batch_prices = _fetch_historical_prices_batch(yahoo_symbols, period="60d", interval="1d")
-    
-    all_series = []
-    
-    for case_type, idx, kod, pazar, adet, asset_currency in special_cases:
-        prices = None
-        try:
-            if case_type == "NAKIT":
-                kod_upper = kod.upper()
-                if kod_upper == "TL":
-                    prices = pd.Series([1.0], index=[today])
-                elif kod_upper == "USD":
-                    prices = pd.Series([usd_try_rate], index=[today])
-                else:
-                    prices = pd.Series([1.0], index=[today])
-            elif case_type == "FON":
-                price, _ = get_tefas_data(kod)
-                if price and price > 0:
-                    idx_range = pd.date_range(end=today, periods=60, freq="D")
-                    prices = pd.Series(price, index=idx_range)
-        except Exception:
-            pass
-        
-        if prices is not None and not prices.empty:
-            prices.index = pd.to_datetime(prices.index).tz_localize(None)
-            if pb == "TRY":
-                if asset_currency == "USD":
-                    values = prices * adet * usd_try_rate
-                else:
-                    values = prices * adet
-            else:
-                if asset_currency == "TRY":
-                    values = prices * adet / usd_try_rate
-                else:
-                    values = prices * adet
-            all_series.append(values.rename(f"Değer_{idx}"))
-    
-    for symbol, rows in symbol_to_rows.items():
-        if symbol not in batch_prices or batch_prices[symbol] is None:
-            continue
-        
-        prices = batch_prices[symbol]
-        prices.index = pd.to_datetime(prices.index).tz_localize(None)
-        
-        for idx, kod, pazar, adet, asset_currency, case_type in rows:
-            if case_type in ["GRAM_GUMUS", "GRAM_ALTIN"]:
-                prices_converted = (prices * usd_try_rate) / 31.1035
-            else:
-                prices_converted = prices
-            
-            if pb == "TRY":
-                if asset_currency == "USD":
-                    values = prices_converted * adet * usd_try_rate
-                else:
-                    values = prices_converted * adet
-            else:
-                if asset_currency == "TRY":
-                    values = prices_converted * adet / usd_try_rate
-                else:
-                    values = prices_converted * adet
-            
-            all_series.append(values.rename(f"Değer_{idx}"))
-    
-    if not all_series:
+    # Portföy serisi - get_historical_chart ile aynı (pencere, para birimi) cache'inden
+    portfolio_series = portfolio_value_series(df, pb, period=period)
+    if portfolio_series is None:
         return None
     
-    df_concat = pd.concat(all_series, axis=1)
-    df_concat.index = pd.to_datetime(df_concat.index)
-    df_concat = df_concat.sort_index()
-    df_concat = df_concat.ffill()
-    
-    portfolio_series = df_concat.sum(axis=1)
-    portfolio_series = portfolio_series[-60:]
-    
     # Karşılaştırma verisini çek
     comparison_symbols = {
         "BIST 100": "XU100.IS",
-        "Altın": "GC=F",
+        "Altın": "GRAM_ALTIN",
         "SP500": "^GSPC",
     }
     
-    comparison_data = _fetch_comparison_data(comparison_symbols, usd_try_rate, pb, period="60d")
+    comparison_data = _fetch_comparison_data(comparison_symbols, pb, period=period)
     
     # Enflasyon verisi
     if comparison_type == "Enflasyon":
@@ -34,14 +34,31 @@ class AppConfig:
     cache_ttl_tefas: int = 7200  # 2 saat
     cache_ttl_tickers: int = 60  # 1 dakika
     cache_ttl_crypto: int = 300  # 5 dakika
+    cache_ttl_bist_abd: int = 600  # 10 dakika
+    cache_ttl_emtia: int = 600  # 10 dakika
+    cache_ttl_fx: int = 300  # 5 dakika
+    cache_ttl_history: int = 600  # 10 dakika - tarihsel fiyatlar
+    
+    # Disk cache (SQLite) dizini - yeniden başlatmalar arasında kalıcı
+    cache_dir: str = ".cache"
     cache_ttl_news: int = 300  # 5 dakika
     
+    # Arka plan fiyat yenileyicisi (saniye) - piyasa açıkken hızlı, kapalıyken yavaş
+    price_refresh_interval_open: int = 60
+    price_refresh_interval_closed: int = 900
+    
     # Network ayarları
     socket_timeout: int = 15  # saniye
     
+    # Google Sheets kota ayarları (kullanıcı başına dakikalık istek)
+    sheets_read_quota_per_minute: int = 60
+    sheets_write_quota_per_minute: int = 60
+    sheet_diff_base_max_age: int = 60  # Snapshot bundan eskiyse diff tabanı yazmadan önce okunur (saniye)
+    
     # TEFAS API ayarları
     tefas_api_url: str = "https://www.tefas.gov.tr/api/DB/BindHistoryInfo"
     tefas_timeout: int = 15
+    tefas_max_workers: int = 8  # Eşzamanlı fon sorgusu sınırı
     
     # Yahoo Finance ayarları
     yahoo_period_default: str = "5d"
@@ -51,12 +68,20 @@ class AppConfig:
     coingecko_api_url: str = "https://api.coingecko.com/api/v3/global"
     coingecko_timeout: int = 5
     
+    # Haber akışı ayarları
+    news_feed_timeout: int = 8  # Tek RSS akışı için HTTP timeout (saniye)
+    news_wait_timeout: float = 4.0  # Render'ın akışları bekleyeceği en uzun süre
+    news_max_workers: int = 8  # Eşzamanlı akış sorgusu sınırı
+    
     # Günlük baz fiyat reset saati (Türkiye saati)
     daily_reset_hour: int = 0
     daily_reset_minute: int = 30
     
     # Profil ayarları
     default_profile: str = "MERT"
+    profile_load_max_workers: int = 4  # TOTAL için eşzamanlı profil yükleme sınırı
+    write_behind_max_retries: int = 5  # Portföy düzenlemesi için en fazla arka plan yazma denemesi
+    write_behind_retry_delay: float = 2.0  # İlk tekrar öncesi bekleme (saniye, her denemede 2 katı)
     
     # UI ayarları
     ticker_refresh_interval: int = 30  # saniye
@@ -184,6 +209,8 @@ class ConfigManager:
                 self.app.socket_timeout = int(timeout)
             except ValueError:
                 pass
+        if cache_dir := os.getenv("PORTFOY_CACHE_DIR"):
+            self.app.cache_dir = cache_dir
     
     def get(self, section: str, key: str, default: Any = None) -> Any:
         """Yapılandırma değeri al."""
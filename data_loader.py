@@ -1,25 +1,37 @@
 import streamlit as st
 import gspread
+from gspread.utils import numericise_all
 from oauth2client.service_account import ServiceAccountCredentials
 from datetime import datetime, timedelta
 import requests
-import feedparser
+from requests.adapters import HTTPAdapter
 try:
     from tefas import Crawler
 except (ImportError, AttributeError):
     Crawler = None  # tefas kütüphanesi yüklü değilse None
-import yfinance as yf
 import ccxt
 import pandas as pd
 import re
 import unicodedata
 import socket
-import urllib.parse
 from utils import get_yahoo_symbol
 import pytz
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import wraps
+from config import get_config
+from disk_cache import get_disk_cache
+from exceptions import CacheError
 from logger import get_logger
+from quota_scheduler import READ, WRITE, background_lane, get_quota_scheduler
+from price_refresher import get_quote_frame
+from feed_pool import merge_news
+from news_feed import fetch_feeds
+from ticker_tape import quote_card, render_tape, value_card
+from derived_instruments import base_symbols, derived_quotes
+from tagged_cache import DOMAIN_PRICES, tagged_cache
+from sheet_diff import append_request, diff_grid, diff_requests
 
 # Google Sheets / network işlemleri sonsuza kadar beklemesin diye global timeout
 # Timeout'u optimize et - çok uzun bekleme yerine daha hızlı hata yakalama
@@ -31,10 +43,6 @@ DAILY_BASE_SHEET_NAME = "daily_base_prices"  # Günlük baz fiyatlar için
 # Google Sheets client cache
 _client_cache = None
 
-# Rate limiting için son istek zamanı
-_last_request_time = 0
-_min_request_interval = 0.1  # İstekler arası minimum bekleme (100ms)
-
 logger = get_logger()
 
 
@@ -70,18 +78,32 @@ def _normalize_tip_value(value: str) -> str:
     return text
 
 
-def _rate_limit():
-    """Rate limiting: İstekler arasında minimum bekleme süresi."""
-    global _last_request_time
-    current_time = time.time()
-    elapsed = current_time - _last_request_time
-    if elapsed < _min_request_interval:
-        sleep_time = _min_request_interval - elapsed
-        time.sleep(sleep_time)
-    _last_request_time = time.time()
+def _rate_limit(kind=READ):
+    """Rate limiting: Paylaşılan token-bucket kota planlayıcısından okuma/yazma token'ı al."""
+    get_quota_scheduler().acquire(kind)
+
 
+def _is_quota_error(error):
+    """Hatanın Google Sheets 429 / quota hatası olup olmadığını kontrol eder."""
+    text = str(error)
+    return '429' in text or 'Quota exceeded' in text or 'quota' in text.lower()
 
-def _retry_with_backoff(func, max_retries=3, initial_delay=1.0, max_delay=60.0, backoff_factor=2.0):
+
+def _sheets_call(func, kind=WRITE):
+    """
+    Tek seferlik Google Sheets çağrısı (retry yok - append gibi idempotent olmayan yazmalar için).
+    Çağrı kota planlayıcısından token alır; 429 alınırsa kova boşaltılır.
+    """
+    _rate_limit(kind)
+    try:
+        return func()
+    except Exception as e:
+        if _is_quota_error(e):
+            get_quota_scheduler().record_quota_error(kind)
+        raise
+
+
+def _retry_with_backoff(func, max_retries=3, initial_delay=1.0, max_delay=60.0, backoff_factor=2.0, kind=READ):
     """
     Google Sheets API çağrıları için exponential backoff ile retry mekanizması.
     429 (quota exceeded) hatalarında özellikle yararlıdır.
@@ -92,6 +114,7 @@ def _retry_with_backoff(func, max_retries=3, initial_delay=1.0, max_delay=60.0,
         initial_delay: İlk bekleme süresi (saniye)
         max_delay: Maksimum bekleme süresi (saniye)
         backoff_factor: Her denemede bekleme süresini artırma faktörü
+        kind: Kota tipi - "read" veya "write"
     
     Returns:
         Fonksiyon sonucu
@@ -104,7 +127,7 @@ def _retry_with_backoff(func, max_retries=3, initial_delay=1.0, max_delay=60.0,
     for attempt in range(max_retries):
         try:
             # Rate limiting uygula
-            _rate_limit()
+            _rate_limit(kind)
             return func()
         except gspread.exceptions.APIError as e:
             last_exception = e
@@ -120,7 +143,8 @@ def _retry_with_backoff(func, max_retries=3, initial_delay=1.0, max_delay=60.0,
                     error_code = response.status
             
             # 429 hatası (quota exceeded) için özel işlem
-            if error_code == 429 or '429' in str(e) or 'Quota exceeded' in str(e) or 'quota' in str(e).lower():
+            if error_code == 429 or _is_quota_error(e):
+                get_quota_scheduler().record_quota_error(kind)
                 if attempt < max_retries - 1:
                     # Exponential backoff hesapla
                     delay = min(initial_delay * (backoff_factor ** attempt), max_delay)
@@ -176,6 +200,135 @@ def _get_gspread_client():
             _client_cache = None
     return _client_cache
 
+# Spreadsheet / Worksheet handle registry - her çağrıda client.open ve worksheet() metadata turlarını önler
+_spreadsheet_handle = None
+_spreadsheet_handle_time = 0
+_worksheets_by_title = {}  # başlık -> Worksheet (tek fetch_sheet_metadata çağrısından)
+_worksheet_titles = []  # index sırasına göre başlıklar (ilk eleman = sheet1)
+_sheet_handles = {}  # (profile_name, sheet_type) -> Worksheet
+_sheet_handle_ttl = 900  # 15 dakika
+_sheet_handle_lock = threading.RLock()
+
+
+def _get_spreadsheet():
+    """
+    SHEET_NAME spreadsheet'ini açar ve tüm worksheet'leri tek metadata çağrısıyla haritalar.
+    Handle'lar TTL süresince veya invalidate_sheet_handles çağrılana kadar tekrar kullanılır.
+    """
+    global _spreadsheet_handle, _spreadsheet_handle_time, _worksheets_by_title, _worksheet_titles
+    with _sheet_handle_lock:
+        if _spreadsheet_handle is not None and time.time() - _spreadsheet_handle_time < _sheet_handle_ttl:
+            return _spreadsheet_handle
+        
+        client = _get_gspread_client()
+        if client is None:
+            return None
+        
+        spreadsheet = _retry_with_backoff(lambda: client.open(SHEET_NAME), max_retries=2, initial_delay=1.0, max_delay=30.0)
+        worksheets = _retry_with_backoff(spreadsheet.worksheets, max_retries=2, initial_delay=1.0, max_delay=30.0)
+        
+        _worksheets_by_title = {ws.title: ws for ws in worksheets}
+        _worksheet_titles = [ws.title for ws in worksheets]
+        _sheet_handles.clear()
+        _spreadsheet_handle = spreadsheet
+        _spreadsheet_handle_time = time.time()
+        return spreadsheet
+
+
+def _get_worksheet_titles():
+    """Spreadsheet'teki worksheet başlıklarını index sırasıyla döndürür."""
+    with _sheet_handle_lock:
+        if _get_spreadsheet() is None:
+            return []
+        return list(_worksheet_titles)
+
+
+def _get_worksheet_by_title(title):
+    """Başlığa göre worksheet handle'ı (ek API çağrısı yapmadan); yoksa None."""
+    with _sheet_handle_lock:
+        if _get_spreadsheet() is None:
+            return None
+        return _worksheets_by_title.get(title)
+
+
+def _get_first_worksheet():
+    """sheet1 karşılığı - index 0'daki worksheet."""
+    with _sheet_handle_lock:
+        if _get_spreadsheet() is None or not _worksheet_titles:
+            return None
+        return _worksheets_by_title.get(_worksheet_titles[0])
+
+
+def _register_worksheet(worksheet):
+    """Yeni oluşturulan worksheet'i başlık haritasına ekler."""
+    with _sheet_handle_lock:
+        if worksheet is not None and worksheet.title not in _worksheets_by_title:
+            _worksheets_by_title[worksheet.title] = worksheet
+            _worksheet_titles.append(worksheet.title)
+
+
+def _get_or_create_worksheet_by_title(title, headers, rows=1000, cols=20):
+    """Başlığa göre worksheet'i döndürür; yoksa başlık satırıyla oluşturup kaydeder."""
+    worksheet = _get_worksheet_by_title(title)
+    if worksheet is not None:
+        return worksheet
+    spreadsheet = _get_spreadsheet()
+    if spreadsheet is None:
+        return None
+    worksheet = _sheets_call(lambda: spreadsheet.add_worksheet(title=title, rows=rows, cols=cols))
+    if headers:
+        _sheets_call(lambda: worksheet.append_row(headers))
+    _register_worksheet(worksheet)
+    return worksheet
+
+
+def get_cached_sheet_handle(profile_name, sheet_type):
+    """(profil, sheet tipi) için kayıtlı worksheet handle'ı; TTL dolmuşsa None."""
+    with _sheet_handle_lock:
+        if _spreadsheet_handle is None or time.time() - _spreadsheet_handle_time >= _sheet_handle_ttl:
+            return None
+        return _sheet_handles.get((profile_name, sheet_type))
+
+
+def cache_sheet_handle(profile_name, sheet_type, worksheet):
+    """(profil, sheet tipi) için worksheet handle'ını kaydeder."""
+    if worksheet is None:
+        return
+    with _sheet_handle_lock:
+        _sheet_handles[(profile_name, sheet_type)] = worksheet
+
+
+def invalidate_sheet_handles(profile_name=None, sheet_type=None):
+    """
+    Handle registry'sini temizler.
+    Argümansız çağrıda spreadsheet handle'ı ve başlık haritası da sıfırlanır.
+    """
+    global _spreadsheet_handle, _spreadsheet_handle_time
+    with _sheet_handle_lock:
+        if profile_name is None and sheet_type is None:
+            _spreadsheet_handle = None
+            _spreadsheet_handle_time = 0
+            _worksheets_by_title.clear()
+            del _worksheet_titles[:]
+            _sheet_handles.clear()
+            return
+        for key in list(_sheet_handles):
+            if (profile_name is None or key[0] == profile_name) and (sheet_type is None or key[1] == sheet_type):
+                del _sheet_handles[key]
+
+
+def _get_named_sheet(sheet_type, title, headers=None, rows=1000, cols=20):
+    """Ana dosyadaki sabit isimli sheet'ler için registry'li erişim (MERT / ortak sheet'ler)."""
+    worksheet = get_cached_sheet_handle("MERT", sheet_type)
+    if worksheet is not None:
+        return worksheet
+    if headers is None:
+        worksheet = _get_worksheet_by_title(title)
+    else:
+        worksheet = _get_or_create_worksheet_by_title(title, headers, rows=rows, cols=cols)
+    cache_sheet_handle("MERT", sheet_type, worksheet)
+    return worksheet
+
 @st.cache_data(ttl=900)  # 15 dakika cache - Sheets verileri daha az sık değişir (quota koruması için artırıldı)
 def get_data_from_sheet():
     try:
@@ -189,7 +342,7 @@ def get_data_from_sheet():
         
         # Retry mekanizması ile sheet açma ve veri okuma
         def _fetch_data():
-            sheet = client.open(SHEET_NAME).sheet1
+            sheet = _get_first_worksheet()
             return sheet.get_all_records()
         
         data = _retry_with_backoff(_fetch_data, max_retries=3, initial_delay=2.0, max_delay=60.0)
@@ -222,14 +375,96 @@ def get_data_from_sheet():
         logger.error(f"Google Sheets veri okuma hatası: {error_msg}", exc_info=True)
         return pd.DataFrame(columns=["Kod", "Pazar", "Adet", "Maliyet", "Tip", "Notlar"])
 
+# Diff tabanı okuma seçenekleri: sayılar biçimlendirmesiz gelir (yerel "1.234,50" yerine 1234.5),
+# böylece yazılacak değerlerle tip bazında karşılaştırılır; tarihler metin olarak kalır
+UNFORMATTED_READ = {"valueRenderOption": "UNFORMATTED_VALUE", "dateTimeRenderOption": "FORMATTED_STRING"}
+
+
+def _read_sheet_values(worksheet):
+    """Worksheet'in biçimlendirilmemiş hücre değerleri (başlık dahil) - diff tabanı."""
+    return _retry_with_backoff(
+        lambda: worksheet.get_all_values(
+            value_render_option="UNFORMATTED_VALUE",
+            date_time_render_option="FORMATTED_STRING",
+        ),
+        max_retries=3,
+        initial_delay=2.0,
+        max_delay=60.0,
+    )
+
+
+class SheetTransaction:
+    """
+    Aynı spreadsheet'teki birden çok worksheet yazmasını (DataFrame diff'leri, satır eklemeleri)
+    toplayıp tek bir spreadsheets.batchUpdate isteğinde uygular. İstek atomiktir: ya tüm
+    değişiklikler uygulanır ya hiçbiri - tek round trip, tek yazma kotası. Diff tabanı
+    verilmeyen write_frame bundan önce sheet'i bir kez okur (ek bir READ).
+    """
+
+    def __init__(self, spreadsheet):
+        self.spreadsheet = spreadsheet
+        self.requests = []
+
+    @property
+    def empty(self):
+        return not self.requests
+
+    def write_frame(self, worksheet, df, base_values=None):
+        """
+        DataFrame'i worksheet'e diff'li yazma request'lerini ekler - sadece silinen satırlar,
+        değişen hücreler ve yeni satırlar gönderilir, sheet hiçbir an boş görünmez.
+
+        Args:
+            worksheet: Hedef worksheet
+            df: Yazılacak DataFrame (kolon başlıkları ilk satır olur)
+            base_values: Son okunan biçimlendirilmemiş değerler (başlık dahil) - çağıran tabanın
+                taze olduğunu garanti eder (kısa süre önce okunmuş snapshot). None ise silme
+                konumları güncel satırlara göre hesaplansın diye sheet bir kez okunur (ek READ).
+
+        Returns:
+            SheetDiff
+        """
+        if base_values is None:
+            base_values = _read_sheet_values(worksheet)
+        diff = diff_grid(base_values, [df.columns.values.tolist()] + df.values.tolist())
+        self.requests.extend(diff_requests(diff, worksheet.id))
+        return diff
+
+    def append_rows(self, worksheet, rows):
+        """Satırları worksheet'in son dolu satırının altına ekleyen request'i ekler."""
+        if rows:
+            self.requests.append(append_request(worksheet.id, rows))
+
+    def commit(self):
+        """
+        Toplanan request'leri tek batchUpdate ile uygular.
+        Retry yok (ekleme idempotent değil); hata olursa hiçbir değişiklik uygulanmamıştır.
+        """
+        if not self.requests:
+            return None
+        body = {"requests": list(self.requests)}
+        result = _sheets_call(lambda: self.spreadsheet.batch_update(body))
+        self.requests = []
+        return result
+
+
+def _write_sheet_diff(worksheet, df, base_values=None):
+    """DataFrame'i worksheet'e tek batchUpdate'lik diff olarak yazar; SheetDiff döndürür."""
+    transaction = SheetTransaction(worksheet.spreadsheet)
+    diff = transaction.write_frame(worksheet, df, base_values)
+    transaction.commit()
+    return diff
+
+
 def save_data_to_sheet(df):
     try:
         client = _get_gspread_client()
         if client is None:
             return
-        sheet = client.open(SHEET_NAME).sheet1
-        sheet.clear()
-        sheet.update([df.columns.values.tolist()] + df.values.tolist())
+        sheet = _get_first_worksheet()
+        if sheet is None:
+            return
+        _write_sheet_diff(sheet, df)
     except Exception:
         pass
 
@@ -241,7 +476,7 @@ def get_sales_history():
             return pd.DataFrame(columns=["Tarih", "Kod", "Pazar", "Satılan Adet", "Satış Fiyatı", "Maliyet", "Kâr/Zarar"])
         
         def _fetch_sales():
-            sheet = client.open(SHEET_NAME).worksheet("Satislar")
+            sheet = _get_named_sheet("sales", "Satislar")
             return sheet.get_all_records()
         
         data = _retry_with_backoff(_fetch_sales, max_retries=3, initial_delay=2.0, max_delay=60.0)
@@ -255,172 +490,259 @@ def add_sale_record(date, code, market, qty, price, cost, profit):
         client = _get_gspread_client()
         if client is None:
             return
-        sheet = client.open(SHEET_NAME).worksheet("Satislar")
-        sheet.append_row([str(date), code, market, float(qty), float(price), float(cost), float(profit)])
+        sheet = _get_named_sheet("sales", "Satislar")
+        if sheet is None:
+            return
+        _sheets_call(lambda: sheet.append_row([str(date), code, market, float(qty), float(price), float(cost), float(profit)]))
         # Cache'i temizle
         get_sales_history.clear()
     except Exception:
         pass
 
-# Cache'i fund_code'ye göre ayrı ayrı tutmak için hash kullan
-@st.cache_data(ttl=7200, show_spinner=False)  # 2 saat cache - TEFAS fon fiyatları gün içinde çok değişmez
-def get_tefas_data(fund_code):
+# TEFAS istekleri için paylaşılan HTTP oturumu ve thread havuzları
+_tefas_session = None
+_tefas_session_lock = threading.Lock()
+_tefas_fund_pool = None
+_tefas_source_pool = None
+
+_TEFAS_PRICE_FIELDS = ["birimfiyat", "BirimFiyat", "BIRIMFIYAT", "price", "Price", "fiyat", "Fiyat", "birimFiyat"]
+
+
+def get_tefas_session():
+    """Bağlantı havuzlu tek bir requests.Session döndürür (thread'ler arasında paylaşılır)."""
+    global _tefas_session, _tefas_fund_pool, _tefas_source_pool
+    if _tefas_session is None:
+        with _tefas_session_lock:
+            if _tefas_session is None:
+                workers = get_config().app.tefas_max_workers
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=workers * 2)
+                session.mount("https://", adapter)
+                session.headers.update({
+                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+                    "Referer": "https://www.tefas.gov.tr/",
+                })
+                _tefas_fund_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tefas-fund")
+                _tefas_source_pool = ThreadPoolExecutor(max_workers=workers * 2, thread_name_prefix="tefas-src")
+                _tefas_session = session
+    return _tefas_session
+
+
+def get_tefas_fund_pool():
+    """Fon başına TEFAS istekleri için paylaşılan thread havuzu (oturumla birlikte kurulur)."""
+    get_tefas_session()
+    return _tefas_fund_pool
+
+
+def _parse_tefas_history_json(data):
+    """BindHistoryInfo yanıtından (curr, prev) çıkarır; geçerli fiyat yoksa None."""
+    if not data or not isinstance(data, list):
+        return None
+    # Son kayıt en güncel fiyat
+    last_record = data[-1]
+    for field in _TEFAS_PRICE_FIELDS:
+        if field not in last_record:
+            continue
+        try:
+            curr_price = float(last_record[field])
+        except (ValueError, TypeError):
+            continue
+        if not (0 < curr_price < 100):  # Makul fiyat kontrolü
+            continue
+        # Önceki günün kapanış fiyatı (günlük kar/zarar hesaplaması için)
+        prev_price = curr_price  # Varsayılan: aynı fiyat (eğer önceki gün yoksa)
+        for i in range(len(data) - 2, -1, -1):
+            try:
+                candidate_price = float(data[i][field])
+            except (KeyError, ValueError, TypeError):
+                continue
+            if 0 < candidate_price < 100:
+                prev_price = candidate_price
+                break
+        return curr_price, prev_price
+    return None
+
+
+def _tefas_from_api_post(fund_code):
+    """TEFAS API'si (POST) - en güvenilir yöntem."""
+    payload = {"fontip": "YAT", "sfontur": "", "kurucukod": "", "fonkod": fund_code}
+    headers = {"Content-Type": "application/json", "Accept": "application/json"}
+    app = get_config().app
+    r = get_tefas_session().post(app.tefas_api_url, json=payload, headers=headers, timeout=app.tefas_timeout)
+    if r.status_code == 200:
+        return _parse_tefas_history_json(r.json())
+    return None
+
+
+def _tefas_from_api_get(fund_code):
+    """Alternatif TEFAS API endpoint'i (GET)."""
+    app = get_config().app
+    detail_url = f"{app.tefas_api_url}?fontip=YAT&sfontur=&kurucukod=&fonkod={fund_code}"
+    headers = {
+        "Accept": "application/json",
+        "Referer": f"https://www.tefas.gov.tr/FonAnaliz.aspx?FonKod={fund_code}",
+    }
+    r = get_tefas_session().get(detail_url, headers=headers, timeout=app.tefas_timeout)
+    if r.status_code == 200:
+        return _parse_tefas_history_json(r.json())
+    return None
+
+
+def _tefas_from_crawler(fund_code):
+    """tefas-crawler ile son 60 günlük fiyatlardan (curr, prev)."""
+    if Crawler is None:
+        return None
+    crawler = Crawler()
+    end = datetime.now().strftime("%Y-%m-%d")
+    start = (datetime.now() - timedelta(days=60)).strftime("%Y-%m-%d")
+    res = crawler.fetch(start=start, end=end, name=fund_code, columns=["Price"])
+    if res.empty:
+        return None
+    valid_prices = res.sort_index()["Price"].dropna()
+    if len(valid_prices) == 0:
+        return None
+    # Son kapanış fiyatı (bugünün fiyatı yoksa en son geçerli fiyat)
+    curr_price = float(valid_prices.iloc[-1])
+    prev_price = float(valid_prices.iloc[-2]) if len(valid_prices) > 1 else curr_price
+    if 0 < curr_price < 100:
+        return curr_price, prev_price
+    return None
+
+
+def _tefas_from_html(fund_code):
+    """FonAnaliz sayfasından web scraping (son çare)."""
+    url = f"https://www.tefas.gov.tr/FonAnaliz.aspx?FonKod={fund_code}"
+    headers = {
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+        "Accept-Language": "tr-TR,tr;q=0.9,en-US;q=0.8,en;q=0.7",
+    }
+    r = get_tefas_session().get(url, headers=headers, timeout=get_config().app.tefas_timeout)
+    if r.status_code != 200:
+        return None
+    # Birden fazla pattern dene - daha kapsamlı
+    patterns = [
+        r'id="MainContent_PanelInfo_lblPrice"[^>]*>([\d,]+\.?\d*)',
+        r'id="MainContent_PanelInfo_lblPrice">([\d,]+\.?\d*)',
+        r'Birim Fiyat[^<]*<[^>]*>([\d,]+\.?\d*)',
+        r'Birim Fiyatı[^<]*<[^>]*>([\d,]+\.?\d*)',
+        r'"birimFiyat"[^:]*:\s*"?([\d,]+\.?\d*)"?',
+        r'Fiyat[^>]*>([\d,]+\.?\d*)',
+        r'<span[^>]*>([\d,]+\.?\d*)</span>',  # Genel span pattern
+    ]
+    for pattern in patterns:
+        for match in re.findall(pattern, r.text, re.IGNORECASE):
+            try:
+                price = float(str(match).replace(",", ".").replace(" ", ""))
+            except (ValueError, AttributeError):
+                continue
+            # Makul fiyat aralığı kontrolü (0.01 - 100 TL arası)
+            if 0 < price < 100:
+                return price, price
+    return None
+
+
+def _safe_source(source, fund_code):
+    """Kaynak fonksiyonunu çalıştırır, hata olursa None döndürür."""
+    try:
+        return source(fund_code)
+    except Exception:
+        return None
+
+
+def _fetch_tefas_price(fund_code):
     """
-    TEFAS fon fiyatını çeker. Önce TEFAS API'sini kullanır, sonra tefas-crawler, en son web scraping dener.
+    Tek bir fon için fiyat zinciri.
+    İki JSON endpoint'i (POST/GET) yarıştırılır, ilk geçerli sonuç kazanır;
+    ikisi de başarısızsa tefas-crawler ve HTML scraping sırayla denenir.
+    """
+    get_tefas_session()
+    futures = [
+        _tefas_source_pool.submit(_safe_source, _tefas_from_api_post, fund_code),
+        _tefas_source_pool.submit(_safe_source, _tefas_from_api_get, fund_code),
+    ]
+    for future in as_completed(futures):
+        result = future.result()
+        if result:
+            for other in futures:
+                other.cancel()
+            return result
+
+    for source in (_tefas_from_crawler, _tefas_from_html):
+        result = _safe_source(source, fund_code)
+        if result:
+            return result
+    return None
+
+
+def _tefas_cache_key(fund_code, force_refresh=False):
+    """Fon kodu başına tek kayıt - force_refresh aynı kaydı yeniler (get_tefas_data.refresh)."""
+    return str(fund_code).upper().strip()
+
+
+# 2 saat cache - TEFAS fon fiyatları gün içinde çok değişmez
+@tagged_cache(DOMAIN_PRICES, ttl=7200, key=_tefas_cache_key)
+def get_tefas_data(fund_code, force_refresh=False):
+    """
+    TEFAS fon fiyatını çeker. Önce disk cache'e bakar, sonra TEFAS API'lerini yarıştırır,
+    ardından tefas-crawler, en son web scraping dener. Ağdan gelen fiyat disk cache'e yazılır.
+
+    Tek fonun kaydını yenilemek için get_tefas_data.refresh(kod, force_refresh=True),
+    düşürmek için get_tefas_data.evict(kod) kullanılır.
     """
     fund_code = str(fund_code).upper().strip()
-    
-    # ÖNCE TEFAS API'sini dene (en güvenilir yöntem)
-    try:
-        # TEFAS'ın güncel API endpoint'i - fon detay bilgisi
-        api_url = "https://www.tefas.gov.tr/api/DB/BindHistoryInfo"
-        payload = {
-            "fontip": "YAT",
-            "sfontur": "",
-            "kurucukod": "",
-            "fonkod": fund_code
-        }
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-            "Referer": "https://www.tefas.gov.tr/"
-        }
-        r = requests.post(api_url, json=payload, headers=headers, timeout=15)
-        if r.status_code == 200:
-            data = r.json()
-            if data and isinstance(data, list) and len(data) > 0:
-                # Son kayıt en güncel fiyat
-                last_record = data[-1]
-                # Farklı field isimlerini dene
-                price_field = None
-                for field in ["birimfiyat", "BirimFiyat", "BIRIMFIYAT", "price", "Price", "fiyat", "Fiyat", "birimFiyat"]:
-                    if field in last_record:
-                        try:
-                            price = float(last_record[field])
-                            if price > 0 and price < 100:  # Makul fiyat kontrolü
-                                price_field = field
-                                break
-                        except (ValueError, TypeError):
-                            continue
-                
-                if price_field:
-                    # Son kapanış fiyatı (bugünün fiyatı yoksa en son geçerli fiyat)
-                    curr_price = float(last_record[price_field])
-                    # Önceki günün kapanış fiyatı (günlük kar/zarar hesaplaması için)
-                    prev_price = curr_price  # Varsayılan: aynı fiyat (eğer önceki gün yoksa)
-                    if len(data) > 1:
-                        # Önceki günün fiyatını bul
-                        for i in range(len(data) - 2, -1, -1):
-                            prev_record = data[i]
-                            if price_field in prev_record:
-                                try:
-                                    candidate_price = float(prev_record[price_field])
-                                    if candidate_price > 0 and candidate_price < 100:
-                                        prev_price = candidate_price
-                                        break
-                                except (ValueError, TypeError):
-                                    continue
-                    return curr_price, prev_price
-    except Exception:
-        pass
-    
-    # İKİNCİ: tefas-crawler ile dene (eğer yüklüyse)
-    try:
-        if Crawler is not None:
-            crawler = Crawler()
-            end = datetime.now().strftime("%Y-%m-%d")
-            start = (datetime.now() - timedelta(days=60)).strftime("%Y-%m-%d")
-            res = crawler.fetch(start=start, end=end, name=fund_code, columns=["Price"])
-            if not res.empty and len(res) > 0:
-                res = res.sort_index()
-                valid_prices = res["Price"].dropna()
-                if len(valid_prices) > 0:
-                    # Son kapanış fiyatı (bugünün fiyatı yoksa en son geçerli fiyat)
-                    curr_price = float(valid_prices.iloc[-1])
-                    # Önceki günün kapanış fiyatı (günlük kar/zarar hesaplaması için)
-                    prev_price = float(valid_prices.iloc[-2]) if len(valid_prices) > 1 else curr_price
-                    if curr_price > 0 and curr_price < 100:
-                        return curr_price, prev_price
-    except Exception:
-        pass
-    
-    # DÖRDÜNCÜ: Web scraping ile dene (son çare)
-    try:
-        url = f"https://www.tefas.gov.tr/FonAnaliz.aspx?FonKod={fund_code}"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            "Accept-Language": "tr-TR,tr;q=0.9,en-US;q=0.8,en;q=0.7",
-            "Referer": "https://www.tefas.gov.tr/"
-        }
-        r = requests.get(url, headers=headers, timeout=15)
-        if r.status_code == 200:
-            # Birden fazla pattern dene - daha kapsamlı
-            patterns = [
-                r'id="MainContent_PanelInfo_lblPrice"[^>]*>([\d,]+\.?\d*)',
-                r'id="MainContent_PanelInfo_lblPrice">([\d,]+\.?\d*)',
-                r'Birim Fiyat[^<]*<[^>]*>([\d,]+\.?\d*)',
-                r'Birim Fiyatı[^<]*<[^>]*>([\d,]+\.?\d*)',
-                r'"birimFiyat"[^:]*:\s*"?([\d,]+\.?\d*)"?',
-                r'Fiyat[^>]*>([\d,]+\.?\d*)',
-                r'<span[^>]*>([\d,]+\.?\d*)</span>',  # Genel span pattern
-            ]
-            for pattern in patterns:
-                matches = re.findall(pattern, r.text, re.IGNORECASE)
-                for match in matches:
-                    try:
-                        price_str = str(match).replace(",", ".").replace(" ", "")
-                        price = float(price_str)
-                        # Makul fiyat aralığı kontrolü (0.01 - 100 TL arası)
-                        if price > 0 and price < 100:
-                            return price, price
-                    except (ValueError, AttributeError):
-                        continue
-    except Exception:
-        pass
-    
-    # ÜÇÜNCÜ: Alternatif TEFAS API endpoint'i dene
-    try:
-        # TEFAS'ın fon detay API'si
-        detail_url = f"https://www.tefas.gov.tr/api/DB/BindHistoryInfo?fontip=YAT&sfontur=&kurucukod=&fonkod={fund_code}"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-            "Accept": "application/json",
-            "Referer": f"https://www.tefas.gov.tr/FonAnaliz.aspx?FonKod={fund_code}"
-        }
-        r = requests.get(detail_url, headers=headers, timeout=15)
-        if r.status_code == 200:
-            data = r.json()
-            if data and isinstance(data, list) and len(data) > 0:
-                last_record = data[-1]
-                for field in ["birimfiyat", "BirimFiyat", "BIRIMFIYAT", "price", "Price", "fiyat", "Fiyat"]:
-                    if field in last_record:
-                        try:
-                            # Son kapanış fiyatı
-                            price = float(last_record[field])
-                            if price > 0 and price < 100:
-                                # Önceki günün fiyatı (günlük kar/zarar için)
-                                prev_price = price  # Varsayılan
-                                if len(data) > 1:
-                                    for i in range(len(data) - 2, -1, -1):
-                                        if field in data[i]:
-                                            try:
-                                                candidate = float(data[i][field])
-                                                if candidate > 0 and candidate < 100:
-                                                    prev_price = candidate
-                                                    break
-                                            except (ValueError, TypeError):
-                                                continue
-                                return price, prev_price
-                        except (ValueError, TypeError):
-                            continue
-    except Exception:
-        pass
-    
+    disk = get_disk_cache()
+    if disk is not None and not force_refresh:
+        try:
+            cached = disk.get_tefas_nav(fund_code, max_age=get_config().app.cache_ttl_tefas)
+            if cached:
+                return cached[0], cached[1]
+        except CacheError:
+            pass
+
+    result = _fetch_tefas_price(fund_code)
+    if result:
+        if disk is not None:
+            try:
+                disk.put_tefas_nav(fund_code, result[0], result[1])
+            except CacheError:
+                pass
+        return result
+
+    # Ağ başarısızsa süresi geçmiş de olsa diskteki son fiyatı kullan
+    if disk is not None:
+        try:
+            cached = disk.get_tefas_nav(fund_code)
+            if cached:
+                return cached[0], cached[1]
+        except CacheError:
+            pass
     # Hiçbir yöntem çalışmazsa 0 döndür (maliyet kullanılacak)
     return 0, 0
 
+
+def get_tefas_prices(fund_codes):
+    """
+    Birden fazla fonun fiyatını sınırlı bir thread havuzunda eşzamanlı çeker.
+
+    Args:
+        fund_codes: Fon kodları listesi
+
+    Returns:
+        {fon_kodu: (curr, prev)} sözlüğü - fiyat bulunamayan fonlar (0, 0)
+    """
+    codes = list(dict.fromkeys(str(c).upper().strip() for c in fund_codes if str(c).strip()))
+    if not codes:
+        return {}
+    pool = get_tefas_fund_pool()
+    futures = {pool.submit(get_tefas_data, code): code for code in codes}
+    prices = {}
+    for future in as_completed(futures):
+        try:
+            prices[futures[future]] = future.result()
+        except Exception:
+            prices[futures[future]] = (0, 0)
+    return prices
+
 @st.cache_data(ttl=300)
 def get_crypto_globals():
     try:
@@ -428,153 +750,89 @@ def get_crypto_globals():
         return d["total_market_cap"]["usd"], d["market_cap_percentage"]["btc"], d["total_market_cap"]["usd"] * (1 - ((d["market_cap_percentage"]["btc"] + d["market_cap_percentage"]["eth"]) / 100)), 100 - (d["market_cap_percentage"]["btc"] + d["market_cap_percentage"]["eth"]), 0
     except: return 0, 0, 0, 0, 0
 
-@st.cache_data(ttl=300)  # 5 dakika cache - F5 ile güncel kur için optimize edildi
 def get_usd_try():
-    try: 
-        ticker = yf.Ticker("TRY=X")
-        h = ticker.history(period="5d")
-        if not h.empty:
-            return h["Close"].iloc[-1]
-        else:
-            # Fallback: daha uzun period
-            h = ticker.history(period="1mo")
-            if not h.empty:
-                return h["Close"].iloc[-1]
-            else:
-                return 34.0
+    # Kur arka plan yenileyicisinin fiyat panosundan okunur (render'da ağ isteği yok)
+    try:
+        curr = float(get_quote_frame(["TRY=X"]).at["TRY=X", "curr"])
+        return curr if curr > 0 else 34.0
     except Exception:
         return 34.0
 
-@st.cache_data(ttl=300)
+NEWS_TOPIC_QUERIES = {
+    "BIST": "Borsa Istanbul Hisseler",
+    "KRIPTO": "Kripto Para Bitcoin",
+    "GLOBAL": "ABD Borsaları Fed",
+    "DOVIZ": "Dolar Altın Piyasa",
+}
+
+
 def get_financial_news(topic="finance"):
-    urls = {"BIST": "https://news.google.com/rss/search?q=Borsa+Istanbul+Hisseler&hl=tr&gl=TR&ceid=TR:tr",
-            "KRIPTO": "https://news.google.com/rss/search?q=Kripto+Para+Bitcoin&hl=tr&gl=TR&ceid=TR:tr",
-            "GLOBAL": "https://news.google.com/rss/search?q=ABD+Borsaları+Fed&hl=tr&gl=TR&ceid=TR:tr",
-            "DOVIZ": "https://news.google.com/rss/search?q=Dolar+Altın+Piyasa&hl=tr&gl=TR&ceid=TR:tr"}
+    # Akışlar news_feed içinde sorgu bazlı cache'lenir (cache_ttl_news)
     try:
-        feed = feedparser.parse(urls.get(topic, urls["BIST"]))
-        news_list = []
-        for e in feed.entries[:10]:
-            # Tarihi parse et (feedparser'in published_parsed özelliğini kullan)
-            date_for_sort = ""
-            if hasattr(e, 'published_parsed') and e.published_parsed:
-                try:
-                    from time import mktime
-                    date_for_sort = mktime(e.published_parsed)
-                except:
-                    date_for_sort = e.published
-            else:
-                date_for_sort = e.published
-            news_list.append({
-                "title": e.title, 
-                "link": e.link, 
-                "date": e.published,
-                "_sort_date": date_for_sort
-            })
-        # Tarihe göre sırala (en yeni önce)
-        news_list.sort(key=lambda x: x.get("_sort_date", x.get("date", "")), reverse=True)
-        # _sort_date kolonunu kaldır
-        for item in news_list:
-            item.pop("_sort_date", None)
-        return news_list
-    except: return []
-
-@st.cache_data(ttl=600)  # 10 dakika cache - haberler daha az sık güncellenir
+        query = NEWS_TOPIC_QUERIES.get(topic, NEWS_TOPIC_QUERIES["BIST"])
+        entries = fetch_feeds([query]).get(query, [])
+        return merge_news(entries[:10])
+    except Exception:
+        return []
+
+
+def _news_query_code(code):
+    """Portföy kodunu haber arama terimine çevirir; haber çekilmeyecekse None."""
+    try:
+        if pd.isna(code) or str(code).strip() == "":
+            return None
+    except (TypeError, ValueError):
+        return None
+    code_str = str(code).strip()
+    # Özel durumlar için temizleme
+    if "Gram" in code_str or "GRAM" in code_str:
+        if "Altın" in code_str or "ALTIN" in code_str:
+            return "Altın"
+        if "Gümüş" in code_str or "GÜMÜŞ" in code_str:
+            return "Gümüş"
+    elif code_str in ["TL", "USD", "EUR"]:
+        return None  # Nakit için haber çekme
+    return code_str
+
+
 def get_portfolio_news(portfolio_df, watchlist_df=None):
     """
     Portföydeki ve izleme listesindeki varlıklar için haberleri çeker.
-    Her varlık için ayrı haberler çeker ve birleştirir.
+    Tüm varlık akışları paylaşılan havuzda eşzamanlı çekilir (sorgu bazlı cache);
+    zamanında gelmeyen akışlar bir sonraki render'da sonuçlara katılır.
     """
-    all_news = []
-    seen_titles = set()  # Duplicate haberleri önlemek için
-    
-    # Portföy varlıkları
-    if portfolio_df is not None and not portfolio_df.empty:
-        portfolio_codes = portfolio_df["Kod"].unique().tolist()
-        for code in portfolio_codes:
-            try:
-                if pd.isna(code) or str(code).strip() == "":
-                    continue
-            except (TypeError, ValueError):
-                continue
-            code_str = str(code).strip()
-            # Özel durumlar için temizleme
-            if "Gram" in code_str or "GRAM" in code_str:
-                if "Altın" in code_str or "ALTIN" in code_str:
-                    code_str = "Altın"
-                elif "Gümüş" in code_str or "GÜMÜŞ" in code_str:
-                    code_str = "Gümüş"
-            elif code_str in ["TL", "USD", "EUR"]:
-                continue  # Nakit için haber çekme
-            
-            try:
-                # Google News RSS için Türkçe arama - URL encoding
-                encoded_code = urllib.parse.quote(code_str)
-                url = f"https://news.google.com/rss/search?q={encoded_code}+hisse+haber&hl=tr&gl=TR&ceid=TR:tr"
-                feed = feedparser.parse(url)
-                for entry in feed.entries[:5]:  # Her varlık için en fazla 5 haber
-                    title = entry.title
-                    if title not in seen_titles:
-                        seen_titles.add(title)
-                        all_news.append({
-                            "title": title,
-                            "link": entry.link,
-                            "date": entry.published,
-                            "asset": code_str,
-                            "source": "Portföy"
-                        })
-            except Exception:
-                continue
+    config = get_config().app
+    # (kaynak, varlık başına haber sayısı, DataFrame)
+    sources = [
+        ("Portföy", config.max_portfolio_news_per_asset, portfolio_df),
+        ("İzleme", config.max_watchlist_news_per_asset, watchlist_df),  # İzleme listesi için daha az haber
+    ]
     
-    # İzleme listesi varlıkları
-    if watchlist_df is not None and not watchlist_df.empty:
-        watchlist_codes = watchlist_df["Kod"].unique().tolist()
-        for code in watchlist_codes:
-            try:
-                if pd.isna(code) or str(code).strip() == "":
-                    continue
-            except (TypeError, ValueError):
-                continue
-            code_str = str(code).strip()
-            # Özel durumlar için temizleme
-            if "Gram" in code_str or "GRAM" in code_str:
-                if "Altın" in code_str or "ALTIN" in code_str:
-                    code_str = "Altın"
-                elif "Gümüş" in code_str or "GÜMÜŞ" in code_str:
-                    code_str = "Gümüş"
-            elif code_str in ["TL", "USD", "EUR"]:
-                continue
-            
-            try:
-                url = f"https://news.google.com/rss/search?q={code_str}+hisse+haber&hl=tr&gl=TR&ceid=TR:tr"
-                feed = feedparser.parse(url)
-                for entry in feed.entries[:3]:  # İzleme listesi için daha az haber
-                    title = entry.title
-                    if title not in seen_titles:
-                        seen_titles.add(title)
-                        all_news.append({
-                            "title": title,
-                            "link": entry.link,
-                            "date": entry.published,
-                            "asset": code_str,
-                            "source": "İzleme"
-                        })
-            except Exception:
-                continue
+    assets = []  # (varlık, kaynak, limit) - portföy önce, aynı varlık bir kez
+    seen_assets = set()
+    for source, per_asset, df in sources:
+        if df is None or df.empty or "Kod" not in df.columns:
+            continue
+        for code in df["Kod"].unique().tolist():
+            code_str = _news_query_code(code)
+            if code_str and code_str not in seen_assets:
+                seen_assets.add(code_str)
+                assets.append((code_str, source, per_asset))
+    if not assets:
+        return []
     
-    # Tarihe göre sırala (en yeni önce)
-    try:
-        all_news.sort(key=lambda x: x["date"], reverse=True)
-    except Exception:
-        pass
+    feeds = fetch_feeds(f"{code_str} hisse haber" for code_str, _, _ in assets)
+    all_news = []
+    for code_str, source, per_asset in assets:
+        for entry in feeds.get(f"{code_str} hisse haber", [])[:per_asset]:
+            all_news.append(dict(entry, asset=code_str, source=source))
     
-    return all_news[:30]  # En fazla 30 haber döndür
+    # Başlığa göre tekilleştir, yayın zamanına göre sırala (en yeni önce)
+    return merge_news(all_news, limit=config.max_news_items)
 
-@st.cache_data(ttl=120)  # 2 dakika cache - F5 ile güncel veriler için optimize edildi
 def get_tickers_data(df_portfolio, usd_try):
     total_cap, btc_d, total_3, others_d, others_cap = get_crypto_globals()
-    market_symbols = [("BIST 100", "XU100.IS"), ("USD", "TRY=X"), ("EUR", "EURTRY=X"), ("BTC/USDT", "BTC-USD"),
-                      ("ETH/USDT", "ETH-USD"), ("Ons Altın", "GC=F"), ("Ons Gümüş", "SI=F"), ("NASDAQ", "^IXIC"), ("S&P 500", "^GSPC")]
+    market_symbols = get_config().market.market_symbols
     portfolio_symbols = {}
     if not df_portfolio.empty:
         assets = df_portfolio[df_portfolio["Tip"] == "Portfoy"]
@@ -582,147 +840,42 @@ def get_tickers_data(df_portfolio, usd_try):
             if "NAKIT" not in row["Pazar"] and "Gram" not in row["Kod"] and "FON" not in row["Pazar"]:
                 portfolio_symbols[row["Kod"]] = get_yahoo_symbol(row["Kod"], row["Pazar"])
     
-    all_fetch = list(set([s[1] for s in market_symbols] + list(portfolio_symbols.values())))
-    market_html = ''
-    portfolio_html = ''
+    all_fetch = list(set([s[1] for s in market_symbols] + list(portfolio_symbols.values()) + base_symbols(include_fx=False)))
 
     try:
-        # Batch işlemi optimize et - timeout ve retry mekanizması ile
-        yahoo_data = yf.Tickers(" ".join(all_fetch))
-        def get_val(symbol, label=None):
-            try:
-                # Borsa kapalıyken de çalışması için period'u artır
-                # Timeout ekle - daha hızlı hata yakalama
-                h = yahoo_data.tickers[symbol].history(period="5d", timeout=10)
-                if not h.empty:
-                    p, prev = h["Close"].iloc[-1], h["Close"].iloc[-2] if len(h) > 1 else h["Close"].iloc[-1]
-                    chg = ((p - prev) / prev) * 100
-                    # Modern renkler ve ok işaretleri
-                    if p >= prev:
-                        col = "#00e676"  # Yeşil
-                        arrow = "▲"
-                        bg_col = "rgba(0, 230, 118, 0.15)"
-                    else:
-                        col = "#ff5252"  # Kırmızı
-                        arrow = "▼"
-                        bg_col = "rgba(255, 82, 82, 0.15)"
-                    
-                    # Fiyat formatı
-                    fmt = f"{p:,.2f}" if p > 1 else f"{p:,.4f}"
-                    if "XU100" in symbol or "^" in symbol: fmt = f"{p:,.0f}"
-                    
-                    # Modern ticker kartı - biraz küçültülmüş
-                    return f'''<span style="display: inline-block; background: {bg_col}; border: 1px solid {col}; border-radius: 5px; padding: 3px 8px; margin: 0 2px; font-family: 'Inter', -apple-system, sans-serif;">
-                        <span style="color: #8b9aff; font-size: 12px; font-weight: 700; letter-spacing: 0.2px;">{label if label else symbol}</span>
-                        <span style="color: #ffffff; font-size: 13px; font-weight: 800; margin: 0 4px;">{fmt}</span>
-                        <span style="color: {col}; font-size: 12px; font-weight: 800; background: rgba(0,0,0,0.3); padding: 2px 4px; border-radius: 3px;">{arrow} {chg:+.1f}%</span>
-                    </span>'''
-                else:
-                    # Fallback: daha uzun period dene
-                    h = yahoo_data.tickers[symbol].history(period="1mo")
-                    if not h.empty:
-                        p = h["Close"].iloc[-1]
-                        prev = h["Close"].iloc[-2] if len(h) > 1 else p
-                        chg = ((p - prev) / prev) * 100
-                        if p >= prev:
-                            col = "#00e676"
-                            arrow = "▲"
-                            bg_col = "rgba(0, 230, 118, 0.15)"
-                        else:
-                            col = "#ff5252"
-                            arrow = "▼"
-                            bg_col = "rgba(255, 82, 82, 0.15)"
-                        fmt = f"{p:,.2f}" if p > 1 else f"{p:,.4f}"
-                        if "XU100" in symbol or "^" in symbol: fmt = f"{p:,.0f}"
-                        return f'''<span style="display: inline-block; background: {bg_col}; border: 1px solid {col}; border-radius: 5px; padding: 3px 8px; margin: 0 2px; font-family: 'Inter', -apple-system, sans-serif;">
-                            <span style="color: #8b9aff; font-size: 12px; font-weight: 700; letter-spacing: 0.2px;">{label if label else symbol}</span>
-                            <span style="color: #ffffff; font-size: 13px; font-weight: 800; margin: 0 4px;">{fmt}</span>
-                            <span style="color: {col}; font-size: 12px; font-weight: 800; background: rgba(0,0,0,0.3); padding: 2px 4px; border-radius: 3px;">{arrow} {chg:+.1f}%</span>
-                        </span>'''
-            except Exception:
-                # Batch başarısız olursa, tek tek dene
-                try:
-                    ticker = yf.Ticker(symbol)
-                    h = ticker.history(period="5d")
-                    if not h.empty:
-                        p, prev = h["Close"].iloc[-1], h["Close"].iloc[-2] if len(h) > 1 else h["Close"].iloc[-1]
-                        chg = ((p - prev) / prev) * 100
-                        if p >= prev:
-                            col = "#00e676"
-                            arrow = "▲"
-                            bg_col = "rgba(0, 230, 118, 0.15)"
-                        else:
-                            col = "#ff5252"
-                            arrow = "▼"
-                            bg_col = "rgba(255, 82, 82, 0.15)"
-                        fmt = f"{p:,.2f}" if p > 1 else f"{p:,.4f}"
-                        if "XU100" in symbol or "^" in symbol: fmt = f"{p:,.0f}"
-                        return f'''<span style="display: inline-block; background: {bg_col}; border: 1px solid {col}; border-radius: 5px; padding: 3px 8px; margin: 0 2px; font-family: 'Inter', -apple-system, sans-serif;">
-                            <span style="color: #8b9aff; font-size: 12px; font-weight: 700; letter-spacing: 0.2px;">{label if label else symbol}</span>
-                            <span style="color: #ffffff; font-size: 13px; font-weight: 800; margin: 0 4px;">{fmt}</span>
-                            <span style="color: {col}; font-size: 12px; font-weight: 800; background: rgba(0,0,0,0.3); padding: 2px 4px; border-radius: 3px;">{arrow} {chg:+.1f}%</span>
-                        </span>'''
-                except Exception:
-                    # Hata durumunda boş string döndür - sessiz geç
-                    pass
-            return ""
+        # Fiyatlar arka plan yenileyicisinin panosundan - render sırasında ağ isteği yok
+        prices = get_quote_frame(all_fetch)
 
+        def card(symbol, label=None):
+            if symbol not in prices.index:
+                return ""
+            return quote_card(symbol, label, prices.at[symbol, "curr"], prices.at[symbol, "prev"])
+
+        # Gram altın/gümüş aynı panodaki ons fiyatlarından türetilir
+        grams = derived_quotes(prices, usd_try)
+
+        def gram_card(key, label):
+            return quote_card(key, label, grams.at[key, "curr"], grams.at[key, "prev"])
+
+        market_cards = []
         for name, sym in market_symbols:
-            val = get_val(sym, name)
-            if val: market_html += f"{val} "
+            market_cards.append(card(sym, name))
             if name == "ETH/USDT":
-                try:
-                    # Gram Altın
-                    h = yahoo_data.tickers["GC=F"].history(period="5d")
-                    if not h.empty:
-                        gr_altin = (h["Close"].iloc[-1] * usd_try) / 31.1035
-                        prev_gr_altin = (h["Close"].iloc[-2] * usd_try) / 31.1035 if len(h) > 1 else gr_altin
-                        chg_gr = ((gr_altin - prev_gr_altin) / prev_gr_altin) * 100
-                        col_gr = "#00e676" if gr_altin >= prev_gr_altin else "#ff5252"
-                        arrow_gr = "▲" if gr_altin >= prev_gr_altin else "▼"
-                        bg_gr = "rgba(0, 230, 118, 0.15)" if gr_altin >= prev_gr_altin else "rgba(255, 82, 82, 0.15)"
-                        market_html += f'''<span style="display: inline-block; background: {bg_gr}; border: 1px solid {col_gr}; border-radius: 6px; padding: 4px 10px; margin: 0 3px; font-family: 'Inter', -apple-system, sans-serif;">
-                            <span style="color: #8b9aff; font-size: 14px; font-weight: 700; letter-spacing: 0.2px;">Gr Altın</span>
-                            <span style="color: #ffffff; font-size: 15px; font-weight: 800; margin: 0 5px;">{gr_altin:.2f}</span>
-                            <span style="color: {col_gr}; font-size: 14px; font-weight: 800; background: rgba(0,0,0,0.3); padding: 2px 5px; border-radius: 3px;">{arrow_gr} {chg_gr:+.1f}%</span>
-                        </span> '''
-                except: pass
-                try:
-                    # Gram Gümüş
-                    h = yahoo_data.tickers["SI=F"].history(period="5d")
-                    if not h.empty:
-                        gr_gumus = (h["Close"].iloc[-1] * usd_try) / 31.1035
-                        prev_gr_gumus = (h["Close"].iloc[-2] * usd_try) / 31.1035 if len(h) > 1 else gr_gumus
-                        chg_gr = ((gr_gumus - prev_gr_gumus) / prev_gr_gumus) * 100
-                        col_gr = "#00e676" if gr_gumus >= prev_gr_gumus else "#ff5252"
-                        arrow_gr = "▲" if gr_gumus >= prev_gr_gumus else "▼"
-                        bg_gr = "rgba(0, 230, 118, 0.15)" if gr_gumus >= prev_gr_gumus else "rgba(255, 82, 82, 0.15)"
-                        market_html += f'''<span style="display: inline-block; background: {bg_gr}; border: 1px solid {col_gr}; border-radius: 6px; padding: 4px 10px; margin: 0 3px; font-family: 'Inter', -apple-system, sans-serif;">
-                            <span style="color: #8b9aff; font-size: 14px; font-weight: 700; letter-spacing: 0.2px;">Gr Gümüş</span>
-                            <span style="color: #ffffff; font-size: 15px; font-weight: 800; margin: 0 5px;">{gr_gumus:.2f}</span>
-                            <span style="color: {col_gr}; font-size: 14px; font-weight: 800; background: rgba(0,0,0,0.3); padding: 2px 5px; border-radius: 3px;">{arrow_gr} {chg_gr:+.1f}%</span>
-                        </span> '''
-                except: pass
-
+                market_cards.append(gram_card("GRAM_ALTIN", "Gr Altın"))
+                market_cards.append(gram_card("GRAM_GUMUS", "Gr Gümüş"))
         if total_cap > 0:
-            market_html += f'''<span style="display: inline-block; background: rgba(242, 169, 0, 0.15); border: 1px solid #f2a900; border-radius: 6px; padding: 4px 10px; margin: 0 3px; font-family: 'Inter', -apple-system, sans-serif;">
-                <span style="color: #8b9aff; font-size: 14px; font-weight: 700; letter-spacing: 0.2px;">BTC.D</span>
-                <span style="color: #f2a900; font-size: 15px; font-weight: 800; margin: 0 5px;">{btc_d:.2f}%</span>
-            </span> '''
-        
+            market_cards.append(value_card("BTC.D", "BTC.D", f"{btc_d:.2f}%"))
+
         # Portföydeki BIST, ABD, Kripto varlıkları ikinci banda ekle
-        if portfolio_symbols:
-            for name, sym in portfolio_symbols.items():
-                val = get_val(sym, name)
-                if val: portfolio_html += f"{val} "
-        else: portfolio_html += '<span style="color: #888; font-size: 14px;">Portföy boş.</span>'
-    except: market_html, portfolio_html = "Yükleniyor...", "Yükleniyor..."
-    
-    # Sonsuz döngü için içeriği iki kez tekrarla
-    market_html_doubled = market_html + " " + market_html
-    portfolio_html_doubled = portfolio_html + " " + portfolio_html
-    
-    return f'<div class="ticker-text animate-market">{market_html_doubled}</div>', f'<div class="ticker-text animate-portfolio">{portfolio_html_doubled}</div>'
+        portfolio_cards = [card(sym, name) for name, sym in portfolio_symbols.items()]
+    except Exception:
+        loading = '<span style="color: #888; font-size: 14px;">Yükleniyor...</span>'
+        return render_tape([], "animate-market", loading), render_tape([], "animate-portfolio", loading)
+
+    return (
+        render_tape(market_cards, "animate-market"),
+        render_tape(portfolio_cards, "animate-portfolio", '<span style="color: #888; font-size: 14px;">Portföy boş.</span>'),
+    )
 
 # ==========================================================
 #   KRAL ULTRA - Portföy Tarihsel Log & KPI Yardımcıları
@@ -736,10 +889,7 @@ def _get_history_sheet():
         if client is None:
             return None
         # Ana sheet ile aynı dosyada "portfolio_history" isimli sayfa:
-        def _open_sheet():
-            return client.open(SHEET_NAME).worksheet("portfolio_history")
-        sheet = _retry_with_backoff(_open_sheet, max_retries=2, initial_delay=1.0, max_delay=30.0)
-        return sheet
+        return _get_named_sheet("portfolio_history", "portfolio_history")
     except Exception:
         return None
 
@@ -827,30 +977,47 @@ def get_history_summary():
         }
 
 
-def write_portfolio_history(value_try, value_usd):
+# Sheet adı -> son yazılan tarih; aynı gün kontrolü tüm sheet'i indirmeden yapılır
+_history_last_written = {}
+
+
+def _append_daily_history_row(key, get_sheet, value_try, value_usd):
     """
-    Bugünün tarihine karşılık portföy toplamını (TRY / USD) ekler.
-    Aynı güne ikinci kez yazmaya kalkarsak, bırakıyoruz (charts/portföy kodu genelde önce kontrol ediyor).
+    Bugünün satırını history sheet'ine ekler (günde bir kez).
+    Son tarih yerel kayıttan, yoksa sadece A (Tarih) kolonundan okunur.
     """
-    sheet = _get_history_sheet()
+    today_str = datetime.now().strftime("%Y-%m-%d")
+    if _history_last_written.get(key, "") >= today_str:
+        return  # Bugün zaten kaydedilmiş - API çağrısı yok
+
+    sheet = get_sheet()
     if sheet is None:
         return
 
-    today_str = datetime.now().strftime("%Y-%m-%d")
     try:
-        # Var olan kayıtları al, aynı gün varsa ekleme
-        data = sheet.get_all_records()
-        for row in data:
-            if str(row.get("Tarih", ""))[:10] == today_str:
-                return  # Bugün zaten kaydedilmiş
+        if key not in _history_last_written:
+            dates = [str(d)[:10] for d in _sheets_call(lambda: sheet.col_values(1), kind=READ)[1:] if str(d).strip()]
+            _history_last_written[key] = max(dates) if dates else ""
+            if _history_last_written[key] >= today_str:
+                return
 
         new_row = [today_str, float(value_try), float(value_usd)]
-        sheet.append_row(new_row)
+        _sheets_call(lambda: sheet.append_row(new_row))
+        _history_last_written[key] = today_str
     except Exception:
         # Sessiz geç, uygulamayı kilitlemesin
         pass
 
 
+@background_lane()  # Tarihçe loglama kullanıcı işlemlerinin kotasını tüketmesin
+def write_portfolio_history(value_try, value_usd):
+    """
+    Bugünün tarihine karşılık portföy toplamını (TRY / USD) ekler.
+    Aynı güne ikinci kez yazmaya kalkarsak, bırakıyoruz (charts/portföy kodu genelde önce kontrol ediyor).
+    """
+    _append_daily_history_row("portfolio_history", _get_history_sheet, value_try, value_usd)
+
+
 def get_timeframe_changes(history_df, subtract_df=None, subtract_before=None):
     """
     Haftalık / Aylık / YTD gerçek K/Z hesaplar.
@@ -989,10 +1156,7 @@ def _get_market_history_sheet(ws_name: str):
         client = _get_gspread_client()
         if client is None:
             return None
-        def _open_market_sheet():
-            return client.open(SHEET_NAME).worksheet(ws_name)
-        sheet = _retry_with_backoff(_open_market_sheet, max_retries=2, initial_delay=1.0, max_delay=30.0)
-        return sheet
+        return _get_named_sheet(ws_name, ws_name)
     except Exception:
         return None
 
@@ -1024,23 +1188,9 @@ def _read_market_history(ws_name: str):
         return pd.DataFrame(columns=["Tarih", "Değer_TRY", "Değer_USD"])
 
 
+@background_lane()
 def _write_market_history(ws_name: str, value_try: float, value_usd: float):
-    sheet = _get_market_history_sheet(ws_name)
-    if sheet is None:
-        return
-
-    today_str = datetime.now().strftime("%Y-%m-%d")
-    try:
-        data = sheet.get_all_records()
-        for row in data:
-            if str(row.get("Tarih", ""))[:10] == today_str:
-                # Bugünün kaydı zaten varsa tekrar ekleme
-                return
-        new_row = [today_str, float(value_try), float(value_usd)]
-        sheet.append_row(new_row)
-    except Exception:
-        # Hata olursa sessiz geç; uygulamayı kilitlemesin
-        pass
+    _append_daily_history_row(ws_name, lambda: _get_market_history_sheet(ws_name), value_try, value_usd)
 
 
 # --- Pazar bazlı public helper'lar ---
@@ -1096,27 +1246,85 @@ def _get_daily_base_sheet():
         if client is None:
             return None
         
-        def _open_daily_base():
-            spreadsheet = client.open(SHEET_NAME)
-            try:
-                return spreadsheet.worksheet(DAILY_BASE_SHEET_NAME)
-            except Exception:
-                # Sheet yoksa oluştur
-                sheet = spreadsheet.add_worksheet(title=DAILY_BASE_SHEET_NAME, rows=1000, cols=10)
-                # Header ekle
-                sheet.append_row(["Tarih", "Saat", "Kod", "Fiyat", "PB"])
-                return sheet
-        
-        sheet = _retry_with_backoff(_open_daily_base, max_retries=2, initial_delay=1.0, max_delay=30.0)
-        return sheet
+        # Sheet yoksa header ile oluşturulur
+        return _get_named_sheet(
+            "daily_base_prices", DAILY_BASE_SHEET_NAME, headers=["Tarih", "Saat", "Kod", "Fiyat", "PB"], cols=10
+        )
     except Exception:
         return None
 
 
+DAILY_BASE_COLUMNS = ["Tarih", "Saat", "Kod", "Fiyat", "PB"]
+
+
+def _daily_base_target_dates():
+    """
+    Türkiye saatine göre (bugün, kullanılacak baz tarihi).
+    00:00 - 00:30 arası dünün baz fiyatları kullanılır.
+    """
+    turkey_tz = pytz.timezone('Europe/Istanbul')
+    now_turkey = datetime.now(turkey_tz)
+    today_str = now_turkey.strftime("%Y-%m-%d")
+    if now_turkey.hour == 0 and now_turkey.minute < 30:
+        return today_str, (now_turkey - timedelta(days=1)).strftime("%Y-%m-%d")
+    return today_str, today_str
+
+
+def _parse_daily_base_rows(values):
+    """Ham sheet satırlarını (tarih, saat, kod, fiyat, pb) tuple'larına çevirir."""
+    rows = []
+    for raw in values:
+        row = numericise_all([str(v) for v in raw] + [""] * (len(DAILY_BASE_COLUMNS) - len(raw)))
+        tarih, saat, kod, fiyat, pb = row[:5]
+        if not str(tarih).strip() or not str(kod).strip():
+            continue
+        try:
+            fiyat = float(fiyat)
+        except (TypeError, ValueError):
+            continue
+        rows.append((str(tarih)[:10], str(saat), str(kod), fiyat, str(pb) or "TRY"))
+    return rows
+
+
+def _sync_daily_base_mirror(sheet, disk, force=False):
+    """
+    daily_base_prices sheet'inin sadece son senkronizasyondan sonra eklenen satırlarını
+    (A{n}:E açık uçlu tail aralığı) okuyup yerel SQLite aynasına yazar.
+    Sheet büyüdükçe maliyet sabit kalır; ilk senkronizasyon tüm sheet'i bir kez okur.
+    """
+    sync = disk.get_sheet_sync(DAILY_BASE_SHEET_NAME)
+    rows_synced, synced_at = sync if sync else (1, 0)  # 1. satır başlık
+    if not force and time.time() - synced_at < get_config().app.cache_ttl_sheet_data:
+        return
+    
+    start_row = rows_synced + 1
+    values = _retry_with_backoff(
+        lambda: sheet.get(f"A{start_row}:E"), max_retries=3, initial_delay=2.0, max_delay=60.0
+    )
+    values = list(values or [])
+    disk.put_daily_base(_parse_daily_base_rows(values))
+    disk.set_sheet_sync(DAILY_BASE_SHEET_NAME, rows_synced + len(values))
+
+
+def _read_daily_base_full(sheet, target_date):
+    """Disk aynası kullanılamadığında tüm sheet'i okuyan eski yol."""
+    data = _retry_with_backoff(sheet.get_all_records, max_retries=3, initial_delay=2.0, max_delay=60.0)
+    if not data:
+        return pd.DataFrame(columns=["Kod", "Fiyat", "PB"])
+    df = pd.DataFrame(data)
+    df_today = df[df["Tarih"].astype(str).str[:10] == target_date].copy()
+    if df_today.empty:
+        return pd.DataFrame(columns=["Kod", "Fiyat", "PB"])
+    # En son kaydedilen değerleri al (her kod için)
+    df_today = df_today.groupby("Kod").last().reset_index()
+    return df_today[["Kod", "Fiyat", "PB"]]
+
+
 def get_daily_base_prices():
     """
     Bugün için günlük baz fiyatları getirir (00:30'da kaydedilmiş).
     00:30 Türkiye saatinde reset edilir ve o saatten sonra günlük değişimler bu baz fiyatlara göre hesaplanır.
+    Okuma tarih index'li yerel aynadan yapılır; sheet'ten sadece yeni eklenen satırlar çekilir.
     Dönüş: DataFrame with columns: Kod, Fiyat, PB
     """
     sheet = _get_daily_base_sheet()
@@ -1124,41 +1332,22 @@ def get_daily_base_prices():
         return pd.DataFrame(columns=["Kod", "Fiyat", "PB"])
     
     try:
-        # Türkiye saati
-        turkey_tz = pytz.timezone('Europe/Istanbul')
-        now_turkey = datetime.now(turkey_tz)
+        _, target_date = _daily_base_target_dates()
         
-        # Bugünün tarihi
-        today_str = now_turkey.strftime("%Y-%m-%d")
-        
-        # Saat 00:30'dan önceyse, dünkü baz fiyatları kullan
-        # 00:30'dan sonraysa, bugünkü baz fiyatları kullan (eğer kaydedilmişse)
-        if now_turkey.hour == 0 and now_turkey.minute < 30:
-            # 00:00 - 00:30 arası: Dünün baz fiyatlarını kullan
-            yesterday = now_turkey - timedelta(days=1)
-            target_date = yesterday.strftime("%Y-%m-%d")
-        else:
-            # 00:30'dan sonra: Bugünün baz fiyatlarını kullan
-            target_date = today_str
+        disk = get_disk_cache()
+        if disk is None:
+            return _read_daily_base_full(sheet, target_date)
         
-        # Sheet'ten hedef tarihin verilerini çek
-        def _fetch_daily_base():
-            return sheet.get_all_records()
-        
-        data = _retry_with_backoff(_fetch_daily_base, max_retries=3, initial_delay=2.0, max_delay=60.0)
-        if not data:
-            return pd.DataFrame(columns=["Kod", "Fiyat", "PB"])
-        
-        df = pd.DataFrame(data)
-        # Hedef tarihine ait kayıtları filtrele
-        df_today = df[df["Tarih"] == target_date].copy()
+        try:
+            if not disk.has_daily_base(target_date):
+                _sync_daily_base_mirror(sheet, disk)
+            rows = disk.get_daily_base(target_date)
+        except CacheError:
+            return _read_daily_base_full(sheet, target_date)
         
-        if df_today.empty:
+        if not rows:
             return pd.DataFrame(columns=["Kod", "Fiyat", "PB"])
-        
-        # En son kaydedilen değerleri al (her kod için)
-        df_today = df_today.groupby("Kod").last().reset_index()
-        return df_today[["Kod", "Fiyat", "PB"]]
+        return pd.DataFrame(rows, columns=["Kod", "Fiyat", "PB"])
     
     except Exception as e:
         logger.error(f"Daily base prices okuma hatası: {str(e)}", exc_info=True)
@@ -1176,11 +1365,10 @@ def should_update_daily_base():
     - Her gün sadece bir kez güncellenir (ilk çalıştırmada)
     """
     try:
-        turkey_tz = pytz.timezone('Europe/Istanbul')
-        now_turkey = datetime.now(turkey_tz)
+        today_str, target_date = _daily_base_target_dates()
         
         # Saat 00:30'dan önceyse güncelleme yapma
-        if now_turkey.hour == 0 and now_turkey.minute < 30:
+        if target_date != today_str:
             return False
         
         # Bugün için kayıt var mı kontrol et
@@ -1189,19 +1377,18 @@ def should_update_daily_base():
             # Sheet yoksa güncelleme yap (yeni sheet oluşturulacak)
             return True
         
-        today_str = now_turkey.strftime("%Y-%m-%d")
-        data = sheet.get_all_records()
-        
-        if not data:
-            # Hiç veri yoksa güncelleme yap
-            return True
-        
-        # Bugünün tarihi ile kayıt var mı?
-        for row in data:
-            if str(row.get("Tarih", "")) == today_str:
-                return False  # Bugün zaten kayıt var, güncelleme yapma
+        disk = get_disk_cache()
+        if disk is not None:
+            try:
+                if disk.has_daily_base(today_str):
+                    return False  # Yerel aynada bugünün kaydı var - API çağrısı yok
+                # Başka bir süreç yazmış olabilir - sadece yeni satırları kontrol et
+                _sync_daily_base_mirror(sheet, disk, force=True)
+                return not disk.has_daily_base(today_str)
+            except CacheError:
+                pass
         
-        return True  # Bugün için kayıt yok ve 00:30'dan sonra, güncelle
+        return _read_daily_base_full(sheet, today_str).empty
     except Exception:
         return False
 
@@ -1242,10 +1429,15 @@ def update_daily_base_prices(current_prices_df):
         
         # Toplu ekleme (daha hızlı)
         if rows_to_add:
-            sheet.append_rows(rows_to_add)
+            _sheets_call(lambda: sheet.append_rows(rows_to_add))
             
-            # Cache'i temizle (yeni veriler yüklensin)
-            get_daily_base_prices.clear()
+            # Yerel aynaya da yaz - sonraki okumalar sheet'e gitmesin
+            disk = get_disk_cache()
+            if disk is not None:
+                try:
+                    disk.put_daily_base(rows_to_add)
+                except CacheError:
+                    pass
     
     except Exception:
         pass
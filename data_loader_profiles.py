@@ -3,13 +3,30 @@ Profile-aware data loader wrapper
 Wraps data_loader.py functions to support multiple profiles
 """
 
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
 import streamlit as st
 import pandas as pd
 from data_loader import (
     _get_gspread_client,
+    _get_spreadsheet,
+    _get_worksheet_titles,
+    _get_worksheet_by_title,
+    _get_first_worksheet,
+    _register_worksheet,
+    get_cached_sheet_handle,
+    cache_sheet_handle,
+    invalidate_sheet_handles,
     _warn_once,
     _normalize_tip_value,
     _retry_with_backoff,
+    _sheets_call,
+    _write_sheet_diff,
+    SheetTransaction,
+    UNFORMATTED_READ,
     SHEET_NAME,
     DAILY_BASE_SHEET_NAME,
     # Import other functions that don't need modification
@@ -27,26 +44,339 @@ from profile_manager import (
     get_individual_profiles,
 )
 from datetime import datetime, timedelta
+from gspread.utils import absolute_range_name, numericise_all
+from config import get_config
 from logger import get_logger
+from quota_scheduler import READ, background_lane
+from tagged_cache import DOMAIN_SHEET, invalidate_tags, profile_tag, tagged_cache
+from write_behind import WriteBehindQueue
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:  # Eski Streamlit sürümleri
+    add_script_run_ctx = None
+    get_script_run_ctx = None
 
 logger = get_logger()
 
 
+# Sheet kolon şemaları
+MAIN_COLUMNS = ["Kod", "Pazar", "Adet", "Maliyet", "Tip", "Notlar"]
+SALES_COLUMNS = ["Tarih", "Kod", "Pazar", "Satılan Adet", "Satış Fiyatı", "Maliyet", "Kâr/Zarar"]
+HISTORY_COLUMNS = ["Tarih", "Değer_TRY", "Değer_USD"]
+
+# Ana sayfa worksheet isim varyasyonları (MERT için sheet1 kullanılır)
+MAIN_SHEET_NAME_VARIANTS = {
+    "ANNEM": ["annem", "Annem", "ANNEM", "Anne", "anne"],
+    "BERGUZAR": ["berguzar", "Berguzar", "BERGUZAR", "bergüzar", "Bergüzar", "BERGÜZAR"],
+    "İKRAMİYE": ["ikramiye", "İkramiye", "İKRAMİYE", "ikramiye", "IKRAMIYE"],
+    "TOTAL": ["total", "Total", "TOTAL", "Toplam", "toplam"],
+}
+
+# MERT profili için orijinal (underscore'suz) sheet isimleri
+MERT_SHEET_NAMES = {
+    "sales": "Satislar",
+    "portfolio_history": "portfolio_history",
+    "history_bist": "history_bist",
+    "history_abd": "history_abd",
+    "history_fon": "history_fon",
+    "history_emtia": "history_emtia",
+    "history_nakit": "history_nakit",
+    "daily_base_prices": "daily_base_prices",
+}
+
+# Snapshot'a dahil edilen sheet tipleri
+SNAPSHOT_SHEET_TYPES = (
+    "main",
+    "sales",
+    "portfolio_history",
+    "history_bist",
+    "history_abd",
+    "history_fon",
+    "history_emtia",
+    "history_nakit",
+)
+SNAPSHOT_VALUES = "values"  # Snapshot anahtarı eki: ham hücre değerleri
+SNAPSHOT_READ_AT = "read_at"  # Snapshot anahtarı: okuma zamanı (epoch)
+
+
+def _resolve_sheet_title(titles, sheet_type, profile_name):
+    """
+    Worksheet başlıkları listesinden (profil, sheet tipi) için başlığı bulur.
+    Bulunamazsa None döner (snapshot worksheet oluşturmaz).
+    """
+    if sheet_type == "main":
+        if profile_name == "MERT":
+            # Ana profil için sheet1 (ana sayfa)
+            return titles[0] if titles else None
+        for name in MAIN_SHEET_NAME_VARIANTS.get(profile_name, []):
+            if name in titles:
+                return name
+        return None
+    
+    sheet_name = get_sheet_name_for_profile(sheet_type, profile_name)
+    if sheet_name is None:
+        return None
+    if profile_name == "MERT":
+        sheet_name = MERT_SHEET_NAMES.get(sheet_type, sheet_name)
+    return sheet_name if sheet_name in titles else None
+
+
+def _values_to_records(values):
+    """values_batch_get satırlarını get_all_records ile aynı şekilde dict listesine çevirir."""
+    if not values or len(values) < 2:
+        return []
+    headers = [str(h).strip() for h in values[0]]
+    records = []
+    for row in values[1:]:
+        # Biçimlendirilmemiş okumada sayılar int/float gelir - numericise metin bekler
+        padded = [str(v) for v in row] + [""] * (len(headers) - len(row))
+        records.append(dict(zip(headers, numericise_all(padded[:len(headers)], empty2zero=False, default_blank=""))))
+    return records
+
+
+def _history_values_to_records(values):
+    """History sheet satırlarını konumsal olarak (Tarih, Değer_TRY, Değer_USD) kayıtlarına çevirir."""
+    records = []
+    for row in (values or [])[1:]:
+        if len(row) >= 3 and any(str(cell).strip() for cell in row[:3]):
+            tarih, val_try, val_usd = numericise_all([str(v) for v in row[:3]], empty2zero=False, default_blank="")
+            records.append({"Tarih": tarih, "Değer_TRY": val_try, "Değer_USD": val_usd})
+    return records
+
+
+def _read_history_records(worksheet):
+    """
+    History sheet kayıtlarını tek okumayla döndürür; başlık satırı boş/bozuksa düzeltilir.
+    Satırlar konumsal okunur (Tarih, Değer_TRY, Değer_USD). Okuma READ, başlık düzeltmesi
+    WRITE kotasından ayrı token alır.
+    """
+    all_rows = _retry_with_backoff(worksheet.get_all_values, max_retries=3, initial_delay=2.0, max_delay=60.0)
+    header = [str(h).strip().lower() for h in (all_rows[0] if all_rows else [])[:3]]
+    if header != [h.lower() for h in HISTORY_COLUMNS]:
+        logger.warning(f"History başlıkları eksik veya hatalı, düzeltiliyor ({worksheet.title})")
+        try:
+            _sheets_call(lambda: worksheet.update([HISTORY_COLUMNS], range_name="A1:C1"))
+        except Exception as e:
+            logger.warning(f"History başlıkları düzeltilemedi ({worksheet.title}): {str(e)}")
+    return _history_values_to_records(all_rows)
+
+
+def _main_df_from_records(data):
+    """Ana portföy kayıtlarını normalize edilmiş DataFrame'e çevirir."""
+    if not data:
+        return pd.DataFrame(columns=MAIN_COLUMNS)
+    
+    df = pd.DataFrame(data)
+    for col in MAIN_COLUMNS:
+        if col not in df.columns:
+            df[col] = ""
+    
+    if not df.empty:
+        # Vectorized işlemler
+        df["Pazar"] = df["Pazar"].astype(str)
+        df.loc[df["Pazar"].str.contains("FON", case=False, na=False), "Pazar"] = "FON"
+        df.loc[df["Pazar"].str.upper().str.contains("FIZIKI", na=False), "Pazar"] = "EMTIA"
+        df["Tip"] = df["Tip"].apply(_normalize_tip_value)
+    
+    return df
+
+
+def _history_df_from_records(data):
+    """History kayıtlarını tarih sıralı DataFrame'e çevirir."""
+    if not data:
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
+    
+    df = pd.DataFrame(data)
+    if "Tarih" in df.columns:
+        df["Tarih"] = pd.to_datetime(df["Tarih"])
+    else:
+        df["Tarih"] = pd.to_datetime(datetime.now().strftime("%Y-%m-%d"))
+    if "Değer_TRY" not in df.columns:
+        df["Değer_TRY"] = 0.0
+    if "Değer_USD" not in df.columns:
+        df["Değer_USD"] = 0.0
+    
+    return df.sort_values("Tarih")
+
+
+def _parse_snapshot_values(sheet_type, values):
+    """Snapshot'taki ham değerleri sheet tipine uygun DataFrame'e çevirir."""
+    if sheet_type == "main":
+        return _main_df_from_records(_values_to_records(values))
+    if sheet_type == "sales":
+        records = _values_to_records(values)
+        return pd.DataFrame(records) if records else pd.DataFrame(columns=SALES_COLUMNS)
+    return _history_df_from_records(_history_values_to_records(values))
+
+
+@st.cache_data(ttl=900, show_spinner=False)  # 15 dakika cache - yazma işlemlerinde açıkça temizlenir
+def get_sheets_snapshot(profiles=None, sheet_types=SNAPSHOT_SHEET_TYPES):
+    """
+    Tüm profillerin tüm sheet'lerini tek seferde okur.
+    Spreadsheet handle'ı ve worksheet listesi registry'den gelir (tek metadata çağrısı),
+    tüm aralıklar tek bir values_batch_get çağrısıyla çekilir.
+    
+    Args:
+        profiles: Profil isimleri tuple'ı (None ise tüm bireysel profiller)
+        sheet_types: Okunacak sheet tipleri
+    
+    Returns:
+        {(profile_name, sheet_type): DataFrame} - bulunamayan sheet'ler sözlükte yer almaz.
+        Diff'li yazma için ham (biçimlendirilmemiş) hücre değerleri de
+        (profile_name, sheet_type, SNAPSHOT_VALUES) anahtarında, okuma zamanı SNAPSHOT_READ_AT
+        anahtarında tutulur.
+    """
+    if profiles is None:
+        profiles = tuple(get_individual_profiles(include_berguzar=True))
+    
+    spreadsheet = _get_spreadsheet()
+    if spreadsheet is None:
+        return {}
+    titles = _get_worksheet_titles()
+    
+    keys = []
+    ranges = []
+    for profile_name in profiles:
+        for sheet_type in sheet_types:
+            title = _resolve_sheet_title(titles, sheet_type, profile_name)
+            if title:
+                keys.append((profile_name, sheet_type))
+                ranges.append(absolute_range_name(title))
+    if not ranges:
+        return {}
+    
+    response = _retry_with_backoff(
+        lambda: spreadsheet.values_batch_get(ranges, params=UNFORMATTED_READ),
+        max_retries=3,
+        initial_delay=2.0,
+        max_delay=60.0,
+    )
+    value_ranges = response.get("valueRanges", []) if response else []
+    
+    snapshot = {SNAPSHOT_READ_AT: time.time()}
+    for (profile_name, sheet_type), value_range in zip(keys, value_ranges):
+        values = value_range.get("values", [])
+        snapshot[(profile_name, sheet_type, SNAPSHOT_VALUES)] = values
+        try:
+            snapshot[(profile_name, sheet_type)] = _parse_snapshot_values(sheet_type, values)
+        except Exception as e:
+            logger.warning(f"Snapshot ayrıştırma hatası ({profile_name}, {sheet_type}): {str(e)}")
+    return snapshot
+
+
+def _get_snapshot_frame(profile_name, sheet_type):
+    """Snapshot'tan (profil, sheet tipi) DataFrame'ini döndürür; yoksa None (tekil okuma yapılır)."""
+    try:
+        df = get_sheets_snapshot().get((profile_name, sheet_type))
+    except Exception as e:
+        logger.warning(f"Sheets snapshot okunamadı: {str(e)}")
+        return None
+    return df.copy() if df is not None else None
+
+
+def _get_snapshot_values(profile_name, sheet_type, max_age=None):
+    """
+    Snapshot'taki ham hücre değerleri (başlık dahil); yoksa ya da snapshot max_age saniyeden
+    eskiyse None (yazıcı sheet'i kendisi okur).
+    """
+    try:
+        snapshot = get_sheets_snapshot()
+    except Exception:
+        return None
+    if max_age is not None and time.time() - snapshot.get(SNAPSHOT_READ_AT, 0.0) > max_age:
+        return None
+    values = snapshot.get((profile_name, sheet_type, SNAPSHOT_VALUES))
+    return [list(row) for row in values] if values is not None else None
+
+
+def _main_diff_base(profile_name):
+    """
+    Ana sheet diff'inin tabanı: snapshot sheet_diff_base_max_age içinde okunmuşsa onun değerleri
+    (tek round trip), değilse None - yazıcı sheet'i bir kez okur, başka bir oturumun eklediği ya da
+    sildiği satırlar silme konumlarını kaydırmaz.
+    """
+    return _get_snapshot_values(profile_name, "main", max_age=get_config().app.sheet_diff_base_max_age)
+
+
+def invalidate_sheets_snapshot():
+    """Sheets snapshot cache'ini temizler (yazma işlemlerinden sonra çağrılır)."""
+    try:
+        get_sheets_snapshot.clear()
+    except Exception:
+        pass
+
+
+_profile_pool = None
+_profile_pool_lock = threading.Lock()
+
+
+def _get_profile_pool():
+    """Profil yüklemeleri için paylaşılan thread havuzu."""
+    global _profile_pool
+    if _profile_pool is None:
+        with _profile_pool_lock:
+            if _profile_pool is None:
+                _profile_pool = ThreadPoolExecutor(
+                    max_workers=get_config().app.profile_load_max_workers,
+                    thread_name_prefix="profile-load",
+                )
+    return _profile_pool
+
+
+def _load_profiles_parallel(loader, profiles):
+    """
+    loader(profil) çağrılarını profiller için eşzamanlı çalıştırır.
+    Sheets çağrıları paylaşılan kota planlayıcısından geçtiği için toplam hız sınırı korunur;
+    TOTAL açılışı profil sayısı kadar değil, en yavaş profil kadar sürer.
+    
+    Args:
+        loader: Profil adı alıp DataFrame döndüren fonksiyon
+        profiles: Profil isimleri
+    
+    Returns:
+        {profil: sonuç} - profil sırası korunur, hata veren profil None döner
+    """
+    profiles = list(profiles)
+    if not profiles:
+        return {}
+    
+    # Snapshot'ı önce bu thread'de ısıt - tek values_batch_get, worker'lar cache'ten okur
+    try:
+        get_sheets_snapshot()
+    except Exception as e:
+        logger.warning(f"Sheets snapshot okunamadı: {str(e)}")
+    
+    ctx = get_script_run_ctx() if get_script_run_ctx is not None else None
+    
+    def _run(profile_name):
+        # Worker thread'ler session_state/st.error için script context'ini paylaşır
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        return loader(profile_name)
+    
+    pool = _get_profile_pool()
+    futures = {profile_name: pool.submit(_run, profile_name) for profile_name in profiles}
+    results = {}
+    for profile_name, future in futures.items():
+        try:
+            results[profile_name] = future.result()
+        except Exception as e:
+            logger.error(f"Profil yükleme hatası ({profile_name}): {str(e)}", exc_info=True)
+            results[profile_name] = None
+    return results
+
+
 def _find_worksheet_flexible(spreadsheet, possible_names):
     """
     Try to find a worksheet by trying multiple possible names.
     Returns (worksheet, found_name) or (None, None) if not found.
-    Uses retry mechanism for reliability.
+    Names are resolved from the cached title map - no extra API call per variant.
     """
     for name in possible_names:
-        try:
-            def _get_worksheet():
-                return spreadsheet.worksheet(name)
-            ws = _retry_with_backoff(_get_worksheet, max_retries=2, initial_delay=0.5, max_delay=10.0)
-            if ws:
-                return ws, name
-        except:
-            continue
+        ws = _get_worksheet_by_title(name)
+        if ws is not None:
+            return ws, name
     return None, None
 
 
@@ -65,6 +395,11 @@ def _get_profile_sheet(sheet_type="main", profile_name=None):
     if profile_name is None:
         profile_name = get_current_profile()
     
+    # Registry'de geçerli handle varsa API çağrısı yapmadan döndür
+    cached_worksheet = get_cached_sheet_handle(profile_name, sheet_type)
+    if cached_worksheet is not None:
+        return cached_worksheet
+    
     try:
         client = _get_gspread_client()
         if client is None:
@@ -73,10 +408,7 @@ def _get_profile_sheet(sheet_type="main", profile_name=None):
             _warn_once(f"sheet_client_connection_{profile_name}", error_msg)
             return None
         
-        def _open_spreadsheet():
-            return client.open(SHEET_NAME)
-        
-        spreadsheet = _retry_with_backoff(_open_spreadsheet, max_retries=2, initial_delay=1.0, max_delay=30.0)
+        spreadsheet = _get_spreadsheet()
         if spreadsheet is None:
             return None
         
@@ -85,22 +417,18 @@ def _get_profile_sheet(sheet_type="main", profile_name=None):
             # Use existing sheets for main portfolio data
             if profile_name == "MERT":
                 # Ana profil için sheet1 (ana sayfa)
-                worksheet = spreadsheet.sheet1
+                worksheet = _get_first_worksheet()
             elif profile_name == "ANNEM":
                 # Farklı olası isimleri dene
-                possible_names = ["annem", "Annem", "ANNEM", "Anne", "anne"]
+                possible_names = MAIN_SHEET_NAME_VARIANTS["ANNEM"]
                 worksheet, found_name = _find_worksheet_flexible(spreadsheet, possible_names)
                 if worksheet is None:
                     # Worksheet bulunamadı, oluştur
                     try:
-                        # Retry mechanism ile oluştur
-                        def _create_annem_worksheet():
-                            ws = spreadsheet.add_worksheet(title="annem", rows=1000, cols=20)
-                            headers = ["Kod", "Pazar", "Adet", "Maliyet", "Tip", "Notlar"]
-                            ws.append_row(headers)
-                            return ws
-                        
-                        worksheet = _retry_with_backoff(_create_annem_worksheet, max_retries=2, initial_delay=1.0, max_delay=30.0)
+                        worksheet = _sheets_call(lambda: spreadsheet.add_worksheet(title="annem", rows=1000, cols=20))
+                        headers = ["Kod", "Pazar", "Adet", "Maliyet", "Tip", "Notlar"]
+                        _sheets_call(lambda: worksheet.append_row(headers))
+                        _register_worksheet(worksheet)
                         if worksheet:
                             st.success("✅ 'annem' worksheet'i otomatik oluşturuldu. Artık ANNEM profiline varlık ekleyebilirsiniz!")
                     except Exception as e:
@@ -110,14 +438,15 @@ def _get_profile_sheet(sheet_type="main", profile_name=None):
                         return None
             elif profile_name == "BERGUZAR":
                 # Farklı olası isimleri dene (ü/u varyasyonları)
-                possible_names = ["berguzar", "Berguzar", "BERGUZAR", "bergüzar", "Bergüzar", "BERGÜZAR"]
+                possible_names = MAIN_SHEET_NAME_VARIANTS["BERGUZAR"]
                 worksheet, found_name = _find_worksheet_flexible(spreadsheet, possible_names)
                 if worksheet is None:
                     # Worksheet bulunamadı, oluştur
                     try:
-                        worksheet = spreadsheet.add_worksheet(title="berguzar", rows=1000, cols=20)
+                        worksheet = _sheets_call(lambda: spreadsheet.add_worksheet(title="berguzar", rows=1000, cols=20))
                         headers = ["Kod", "Pazar", "Adet", "Maliyet", "Tip", "Notlar"]
-                        worksheet.append_row(headers)
+                        _sheets_call(lambda: worksheet.append_row(headers))
+                        _register_worksheet(worksheet)
                         st.success("✅ 'berguzar' worksheet'i otomatik oluşturuldu. Artık BERGUZAR profiline varlık ekleyebilirsiniz!")
                     except Exception as e:
                         error_msg = f"❌ BERGUZAR profili worksheet'i bulunamadı ve oluşturulamadı. Hata: {str(e)}. Google Sheets'te 'berguzar' adlı bir worksheet oluşturun veya servis hesabına gerekli izinleri verin."
@@ -126,14 +455,15 @@ def _get_profile_sheet(sheet_type="main", profile_name=None):
                         return None
             elif profile_name == "İKRAMİYE":
                 # Farklı olası isimleri dene
-                possible_names = ["ikramiye", "İkramiye", "İKRAMİYE", "ikramiye", "IKRAMIYE"]
+                possible_names = MAIN_SHEET_NAME_VARIANTS["İKRAMİYE"]
                 worksheet, found_name = _find_worksheet_flexible(spreadsheet, possible_names)
                 if worksheet is None:
                     # Worksheet bulunamadı, oluştur
                     try:
-                        worksheet = spreadsheet.add_worksheet(title="ikramiye", rows=1000, cols=20)
+                        worksheet = _sheets_call(lambda: spreadsheet.add_worksheet(title="ikramiye", rows=1000, cols=20))
                         headers = ["Kod", "Pazar", "Adet", "Maliyet", "Tip", "Notlar"]
-                        worksheet.append_row(headers)
+                        _sheets_call(lambda: worksheet.append_row(headers))
+                        _register_worksheet(worksheet)
                         st.success("✅ 'ikramiye' worksheet'i otomatik oluşturuldu. Artık İKRAMİYE profiline varlık ekleyebilirsiniz!")
                     except Exception as e:
                         error_msg = f"❌ İKRAMİYE profili worksheet'i bulunamadı ve oluşturulamadı. Hata: {str(e)}. Google Sheets'te 'ikramiye' adlı bir worksheet oluşturun veya servis hesabına gerekli izinleri verin."
@@ -143,7 +473,7 @@ def _get_profile_sheet(sheet_type="main", profile_name=None):
             elif profile_name == "TOTAL":
                 # TOTAL için de sekme var ama otomatik hesaplanacak
                 # Sadece okuma için kullanılabilir
-                possible_names = ["total", "Total", "TOTAL", "Toplam", "toplam"]
+                possible_names = MAIN_SHEET_NAME_VARIANTS["TOTAL"]
                 worksheet, found_name = _find_worksheet_flexible(spreadsheet, possible_names)
                 if worksheet is None:
                     # TOTAL için worksheet opsiyonel
@@ -159,66 +489,100 @@ def _get_profile_sheet(sheet_type="main", profile_name=None):
             # MERT profili için özel isimler (underscore'suz)
             if profile_name == "MERT":
                 # MERT için orijinal isimleri kullan
-                base_names = {
-                    "sales": "Satislar",
-                    "portfolio_history": "portfolio_history",
-                    "history_bist": "history_bist",
-                    "history_abd": "history_abd",
-                    "history_fon": "history_fon",
-                    "history_emtia": "history_emtia",
-                    "history_nakit": "history_nakit",
-                    "daily_base_prices": "daily_base_prices"
-                }
-                sheet_name = base_names.get(sheet_type, sheet_name)
-            
-            def _get_or_create_worksheet():
-                try:
-                    return spreadsheet.worksheet(sheet_name)
-                except Exception:
-                    # Worksheet doesn't exist, create it
-                    worksheet = spreadsheet.add_worksheet(title=sheet_name, rows=1000, cols=20)
-                    
-                    # Add headers based on sheet type
-                    if sheet_type == "sales":
-                        headers = ["Tarih", "Kod", "Pazar", "Satılan Adet", "Satış Fiyatı", "Maliyet", "Kâr/Zarar"]
-                        worksheet.append_row(headers)
-                    elif sheet_type in ["portfolio_history", "history_bist", "history_abd", "history_fon", "history_emtia", "history_nakit"]:
-                        headers = ["Tarih", "Değer_TRY", "Değer_USD"]
-                        worksheet.append_row(headers)
-                    elif sheet_type == "daily_base_prices":
-                        headers = ["Tarih", "Saat", "Kod", "Fiyat", "PB"]
-                        worksheet.append_row(headers)
-                    return worksheet
+                sheet_name = MERT_SHEET_NAMES.get(sheet_type, sheet_name)
             
-            worksheet = _retry_with_backoff(_get_or_create_worksheet, max_retries=2, initial_delay=1.0, max_delay=30.0)
+            worksheet = _get_worksheet_by_title(sheet_name)
+            if worksheet is None:
+                # The cached title map may be stale (sheet created elsewhere) - refresh and re-check
+                invalidate_sheet_handles()
+                worksheet = _get_worksheet_by_title(sheet_name)
+            if worksheet is None:
+                spreadsheet = _get_spreadsheet()
+                if spreadsheet is None:
+                    return None
+                # Worksheet doesn't exist, create it (add_worksheet is not idempotent - single metered call)
+                worksheet = _sheets_call(lambda: spreadsheet.add_worksheet(title=sheet_name, rows=1000, cols=20))
+                
+                # Add headers based on sheet type
+                headers = None
+                if sheet_type == "sales":
+                    headers = ["Tarih", "Kod", "Pazar", "Satılan Adet", "Satış Fiyatı", "Maliyet", "Kâr/Zarar"]
+                elif sheet_type in ["portfolio_history", "history_bist", "history_abd", "history_fon", "history_emtia", "history_nakit"]:
+                    headers = ["Tarih", "Değer_TRY", "Değer_USD"]
+                elif sheet_type == "daily_base_prices":
+                    headers = ["Tarih", "Saat", "Kod", "Fiyat", "PB"]
+                if headers:
+                    _sheets_call(lambda: worksheet.append_row(headers))
+                _register_worksheet(worksheet)
         
+        cache_sheet_handle(profile_name, sheet_type, worksheet)
         return worksheet
     except Exception as e:
+        invalidate_sheet_handles(profile_name, sheet_type)
         error_msg = f"❌ Google Sheets işlemi başarısız oldu ({profile_name} profili). Hata: {str(e)}. Lütfen Google Sheets bağlantısını ve servis hesabı izinlerini kontrol edin."
         st.error(error_msg)
         _warn_once(f"sheet_error_{profile_name}", error_msg)
         return None
 
 
-@st.cache_data(ttl=900)  # 15 dakika cache - Sheets verileri daha az sık değişir (quota koruması için artırıldı)
+def _profile_cache_key(profile_name=None):
+    """
+    Profil bazlı cache anahtarı.
+    TOTAL sonucu Bergüzar dahil/çıkar seçimine bağlı olduğu için seçim de anahtara girer.
+    """
+    profile_name = profile_name or get_current_profile()
+    if is_aggregate_profile(profile_name):
+        return profile_name, st.session_state.get("total_include_berguzar", True)
+    return profile_name, None
+
+
+def _profile_cache_tags(profile_name=None):
+    """Profil etiketi; TOTAL kayıtları bileşen profillerin etiketlerini de taşır (biri kaydedilince TOTAL da düşer)."""
+    profile_name = profile_name or get_current_profile()
+    tags = [profile_tag(profile_name)]
+    if is_aggregate_profile(profile_name):
+        tags += [profile_tag(p) for p in get_individual_profiles(include_berguzar=True)]
+    return tags
+
+
 def get_data_from_sheet_profile(profile_name=None):
     """
     Get portfolio data for a specific profile.
     If profile is TOTAL, aggregates data from all individual profiles.
     
-    IMPORTANT: profile_name is used as cache key, so each profile has separate cache.
-    Always pass profile_name explicitly to ensure correct caching.
+    Edits still waiting in the write-behind queue are served from the local copy,
+    so the UI renders them before they reach Sheets.
     """
     if profile_name is None:
         profile_name = get_current_profile()
     
-    # Ensure profile_name is used in cache key by including it in function signature
-    # Cache will be separate for each profile - Streamlit automatically uses function arguments as cache key
+    queue = _write_queue
+    pending = queue.pending_frame(profile_name) if queue is not None else None
+    if pending is not None:
+        return pending
+    return _read_data_from_sheet_profile(profile_name)
+
+
+@tagged_cache(DOMAIN_SHEET, ttl=900, key=_profile_cache_key, tags=_profile_cache_tags)  # 15 dakika cache - Sheets verileri daha az sık değişir (quota koruması için artırıldı)
+def _read_data_from_sheet_profile(profile_name=None):
+    """
+    Read portfolio data for a profile from the sheets snapshot (or the worksheet).
+    
+    Cached per profile (tagged with the profile name), so saving or switching
+    one profile only invalidates that profile's entries.
+    """
+    if profile_name is None:
+        profile_name = get_current_profile()
     
     # Handle TOTAL profile (aggregate)
     if is_aggregate_profile(profile_name):
         return _get_aggregated_data()
     
+    # Önce tek istekli snapshot'tan oku
+    snapshot_df = _get_snapshot_frame(profile_name, "main")
+    if snapshot_df is not None:
+        return snapshot_df
+    
     # Get data for individual profile
     try:
         worksheet = _get_profile_sheet("main", profile_name)
@@ -231,22 +595,7 @@ def get_data_from_sheet_profile(profile_name=None):
             return worksheet.get_all_records()
         
         data = _retry_with_backoff(_fetch_profile_data, max_retries=3, initial_delay=2.0, max_delay=60.0)
-        if not data:
-            return pd.DataFrame(columns=["Kod", "Pazar", "Adet", "Maliyet", "Tip", "Notlar"])
-        
-        df = pd.DataFrame(data)
-        for col in ["Kod", "Pazar", "Adet", "Maliyet", "Tip", "Notlar"]:
-            if col not in df.columns:
-                df[col] = ""
-        
-        if not df.empty:
-            # Vectorized işlemler
-            df["Pazar"] = df["Pazar"].astype(str)
-            df.loc[df["Pazar"].str.contains("FON", case=False, na=False), "Pazar"] = "FON"
-            df.loc[df["Pazar"].str.upper().str.contains("FIZIKI", na=False), "Pazar"] = "EMTIA"
-            df["Tip"] = df["Tip"].apply(_normalize_tip_value)
-        
-        return df
+        return _main_df_from_records(data)
     except Exception as e:
         error_msg = str(e)
         if '429' in error_msg or 'quota' in error_msg.lower() or 'Quota exceeded' in error_msg:
@@ -278,8 +627,7 @@ def _get_aggregated_data():
     all_profiles = get_individual_profiles(include_berguzar=include_berguzar)
     aggregated_rows = []
     
-    for profile_name in all_profiles:
-        df = get_data_from_sheet_profile(profile_name)
+    for profile_name, df in _load_profiles_parallel(get_data_from_sheet_profile, all_profiles).items():
         if df is not None and not df.empty:
             # Add profile identifier to differentiate same assets from different profiles
             df_copy = df.copy()
@@ -299,9 +647,81 @@ def _get_aggregated_data():
     return combined_df
 
 
+def _get_or_create_main_sheet(profile_name):
+    """
+    Profilin ana worksheet'i; bulunamazsa oluşturulur. Bulunamaz/oluşturulamazsa RuntimeError -
+    write-behind thread'inden de çağrıldığı için st.* kullanılmaz, mesajı çağıran gösterir.
+    """
+    def _get_or_create_worksheet():
+        worksheet = _get_profile_sheet("main", profile_name)
+        if worksheet is None:
+            # Worksheet bulunamadı, tekrar dene veya oluştur
+            # Handle'lar eskimiş olabilir - registry'yi tazeleyip tekrar dene
+            invalidate_sheet_handles()
+            spreadsheet = _get_spreadsheet()
+            if spreadsheet is None:
+                return None
+            
+            # ANNEM profili için özel işlem, diğer profiller için küçük harfli isim
+            sheet_name = "annem" if profile_name == "ANNEM" else profile_name.lower()
+            worksheet = _get_worksheet_by_title(sheet_name)
+            if worksheet is None:
+                # Oluştur - her çağrı kendi yazma token'ıyla
+                worksheet = _sheets_call(lambda: spreadsheet.add_worksheet(title=sheet_name, rows=1000, cols=20))
+                _sheets_call(lambda: worksheet.append_row(MAIN_COLUMNS))
+                _register_worksheet(worksheet)
+            cache_sheet_handle(profile_name, "main", worksheet)
+            return worksheet
+        return worksheet
+    
+    worksheet = _get_or_create_worksheet()
+    if worksheet is None:
+        raise RuntimeError(f"{profile_name} profili için worksheet bulunamadı ve oluşturulamadı. Lütfen Google Sheets'te '{profile_name.lower()}' adlı bir worksheet oluşturun.")
+    return worksheet
+
+
+def _main_frame_to_save(df):
+    """Ana sheet'e yazılacak DataFrame: _profile kolonu atılır, eksik kolonlar eklenir."""
+    # Remove profile column if it exists
+    df_to_save = df.copy()
+    if "_profile" in df_to_save.columns:
+        df_to_save = df_to_save.drop(columns=["_profile"])
+    
+    # Ensure all required columns exist
+    for col in MAIN_COLUMNS:
+        if col not in df_to_save.columns:
+            df_to_save[col] = ""
+    return df_to_save
+
+
+def _write_main_frame(profile_name, df, base_values=None):
+    """
+    Write a portfolio frame to the profile's main sheet as a diff against base_values.
+    With a fresh base (_main_diff_base) this is one batchUpdate; without one the sheet is read
+    once first. Raises on failure.
+    """
+    worksheet = _get_or_create_main_sheet(profile_name)
+    
+    try:
+        # Only deleted rows and changed/new cells are sent
+        diff = _write_sheet_diff(worksheet, _main_frame_to_save(df), base_values)
+    except Exception:
+        # Yanıt kaybolmuş olabilir - tekrar denemede diff sheet'in güncel haline göre hesaplansın
+        invalidate_sheets_snapshot()
+        raise
+    if diff.empty:
+        return diff
+    
+    invalidate_sheets_snapshot()
+    
+    # Evict only this profile's entry (and the TOTAL entries built from it)
+    _read_data_from_sheet_profile.invalidate(profile_tag(profile_name))
+    return diff
+
+
 def save_data_to_sheet_profile(df, profile_name=None):
     """
-    Save portfolio data for a specific profile.
+    Save portfolio data for a specific profile (synchronously).
     TOTAL profile is computed but can also be saved to the 'total' sheet.
     """
     if profile_name is None:
@@ -314,95 +734,137 @@ def save_data_to_sheet_profile(df, profile_name=None):
         pass
     
     try:
-        # Retry mechanism ile worksheet'i al veya oluştur
-        def _get_or_create_worksheet():
-            worksheet = _get_profile_sheet("main", profile_name)
-            if worksheet is None:
-                # Worksheet bulunamadı, tekrar dene veya oluştur
-                client = _get_gspread_client()
-                if client is None:
-                    return None
-                
-                spreadsheet = _retry_with_backoff(
-                    lambda: client.open(SHEET_NAME),
-                    max_retries=2,
-                    initial_delay=1.0,
-                    max_delay=30.0
+        # This frame supersedes any queued copy of the profile
+        get_portfolio_write_queue().commit_exclusive(
+            profile_name, lambda: _write_main_frame(profile_name, df, _main_diff_base(profile_name))
+        )
+    except Exception as e:
+        error_msg = f"❌ Veri kaydedilirken hata oluştu ({profile_name} profili). Hata: {str(e)}"
+        st.error(error_msg)
+        logger.error(f"Save data error ({profile_name}): {error_msg}", exc_info=True)
+
+
+_write_queue = None
+_write_queue_lock = threading.Lock()
+
+
+def _write_main_frame_background(profile_name, df):
+    """
+    Write-behind thread'inin yazıcısı. Script context'i olmadığından st.* çağrılmaz ve snapshot
+    (st.cache_data) okunmaz - diff tabanı sheet'ten okunur. Hata loglanıp fırlatılır: kuyruk
+    tekrar dener, denemeler biterse hata pop_portfolio_write_failures() ile UI'a ulaşır.
+    """
+    try:
+        return _write_main_frame(profile_name, df)
+    except Exception as e:
+        logger.warning(f"Arka plan portföy yazması başarısız ({profile_name}): {str(e)}")
+        raise
+
+
+def _on_portfolio_write_settled(profile_name):
+    """Kopya yazıldı ya da düşürüldü: kopyadan hesaplanmış TOTAL kayıtları da düşer."""
+    _read_data_from_sheet_profile.invalidate(profile_tag(profile_name))
+
+
+def get_portfolio_write_queue():
+    """Portföy düzenlemeleri için paylaşılan write-behind kuyruğu (ilk çağrıda başlatılır)."""
+    global _write_queue
+    if _write_queue is None:
+        with _write_queue_lock:
+            if _write_queue is None:
+                app = get_config().app
+                queue = WriteBehindQueue(
+                    _write_main_frame_background,
+                    max_retries=app.write_behind_max_retries,
+                    retry_delay=app.write_behind_retry_delay,
+                    on_settled=_on_portfolio_write_settled,
                 )
-                if spreadsheet is None:
-                    return None
-                
-                # ANNEM profili için özel işlem
-                if profile_name == "ANNEM":
-                    try:
-                        worksheet = spreadsheet.worksheet("annem")
-                        return worksheet
-                    except:
-                        # Oluştur
-                        worksheet = spreadsheet.add_worksheet(title="annem", rows=1000, cols=20)
-                        headers = ["Kod", "Pazar", "Adet", "Maliyet", "Tip", "Notlar"]
-                        worksheet.append_row(headers)
-                        return worksheet
-                else:
-                    # Diğer profiller için de benzer mantık
-                    sheet_name = profile_name.lower()
-                    try:
-                        worksheet = spreadsheet.worksheet(sheet_name)
-                        return worksheet
-                    except:
-                        worksheet = spreadsheet.add_worksheet(title=sheet_name, rows=1000, cols=20)
-                        headers = ["Kod", "Pazar", "Adet", "Maliyet", "Tip", "Notlar"]
-                        worksheet.append_row(headers)
-                        return worksheet
-            return worksheet
-        
-        worksheet = _retry_with_backoff(_get_or_create_worksheet, max_retries=3, initial_delay=2.0, max_delay=60.0)
-        
-        if worksheet is None:
-            error_msg = f"⚠️ {profile_name} profili için worksheet bulunamadı ve oluşturulamadı. Lütfen Google Sheets'te '{profile_name.lower()}' adlı bir worksheet oluşturun."
-            st.error(error_msg)
-            return
-        
-        # Remove profile column if it exists
-        df_to_save = df.copy()
-        if "_profile" in df_to_save.columns:
-            df_to_save = df_to_save.drop(columns=["_profile"])
-        
-        # Ensure all required columns exist
-        required_cols = ["Kod", "Pazar", "Adet", "Maliyet", "Tip", "Notlar"]
-        for col in required_cols:
-            if col not in df_to_save.columns:
-                df_to_save[col] = ""
-        
-        # Save with retry
-        def _save_data():
-            worksheet.clear()
-            if not df_to_save.empty:
-                worksheet.update([df_to_save.columns.values.tolist()] + df_to_save.values.tolist())
-            else:
-                # Empty dataframe - just set headers
-                worksheet.update([required_cols], range_name="A1:F1")
+                queue.start()
+                _write_queue = queue
+    return _write_queue
+
+
+def queue_portfolio_save(df, profile_name=None):
+    """
+    Apply a portfolio edit immediately and write it to Sheets in the background.
+    The frame becomes the profile's authoritative copy at once; consecutive edits
+    are coalesced into one diff write. Failures are reported via pop_portfolio_write_failures().
+    """
+    if profile_name is None:
+        profile_name = get_current_profile()
+    
+    if is_aggregate_profile(profile_name):
+        save_data_to_sheet_profile(df, profile_name=profile_name)
+        return
+    
+    get_portfolio_write_queue().submit(profile_name, _main_frame_to_save(df))
+    # TOTAL entries are rebuilt from the local copy
+    _read_data_from_sheet_profile.invalidate(profile_tag(profile_name))
+
+
+def pop_portfolio_write_failures():
+    """Arka planda kaydedilemeyen düzenlemeler: [(profil, hata)] - gösterildikten sonra silinir."""
+    queue = _write_queue
+    return queue.pop_failures() if queue is not None else []
+
+
+def record_sale_profile(df, date, code, market, qty, price, cost, profit, history_rows=None, profile_name=None):
+    """
+    Record a sale as one atomic Sheets write.
+    The sale row, the updated positions (as a diff) and any history rows are sent in a
+    single spreadsheets.batchUpdate - either all of them are applied or none.
+    
+    Args:
+        df: Portfolio DataFrame after the sale (sold-out rows already removed)
+        date, code, market, qty, price, cost, profit: Sale record fields
+        history_rows: Optional [Tarih, Değer_TRY, Değer_USD] rows for portfolio_history
+        profile_name: Profile name (if None, uses current profile)
+    
+    Returns:
+        True if the transaction was committed
+    """
+    if profile_name is None:
+        profile_name = get_current_profile()
+    
+    # Cannot add to TOTAL profile
+    if is_aggregate_profile(profile_name):
+        st.error("TOTAL profiline satış eklenemez. Lütfen bireysel bir profil seçin.")
+        return False
+    
+    def _commit_sale():
+        main_sheet = _get_or_create_main_sheet(profile_name)
+        sales_sheet = _get_profile_sheet("sales", profile_name)
+        if sales_sheet is None:
+            return False
         
-        _retry_with_backoff(_save_data, max_retries=3, initial_delay=2.0, max_delay=60.0)
+        transaction = SheetTransaction(main_sheet.spreadsheet)
+        transaction.append_rows(sales_sheet, [[str(date), code, market, float(qty), float(price), float(cost), float(profit)]])
+        transaction.write_frame(main_sheet, _main_frame_to_save(df), _main_diff_base(profile_name))
+        if history_rows:
+            history_sheet = _get_profile_sheet("portfolio_history", profile_name)
+            if history_sheet is not None:
+                transaction.append_rows(history_sheet, history_rows)
+        transaction.commit()
+        return True
+    
+    try:
+        # The diff base is read under the profile lock, after any in-flight background write;
+        # df already contains the queued edits of this profile, so they go out in this commit
+        if not get_portfolio_write_queue().commit_exclusive(profile_name, _commit_sale):
+            return False
         
-        # Clear cache for this specific profile
-        # Cache key includes profile_name, so we need to clear it explicitly
-        try:
-            get_data_from_sheet_profile.clear()
-            # Also clear cache for the specific profile by calling with the profile name
-            # This ensures the cache is invalidated for the correct profile
-            if hasattr(get_data_from_sheet_profile, 'clear'):
-                # Clear all cached entries - Streamlit cache_data decorator handles this
-                get_data_from_sheet_profile.clear()
-        except Exception:
-            pass
+        # Single targeted invalidation: this profile's sheet/sales entries (and TOTAL built from them)
+        invalidate_sheets_snapshot()
+        invalidate_tags(profile_tag(profile_name))
+        return True
     except Exception as e:
-        error_msg = f"❌ Veri kaydedilirken hata oluştu ({profile_name} profili). Hata: {str(e)}"
+        error_msg = f"❌ Satış kaydedilemedi ({profile_name} profili) - hiçbir değişiklik uygulanmadı. Hata: {str(e)}"
         st.error(error_msg)
-        logger.error(f"Save data error ({profile_name}): {error_msg}", exc_info=True)
+        logger.error(f"Sale transaction error ({profile_name}): {error_msg}", exc_info=True)
+        return False
 
 
-@st.cache_data(ttl=900)  # 15 dakika cache - Satış geçmişi daha az sık değişir (quota koruması için artırıldı)
+@tagged_cache(DOMAIN_SHEET, ttl=900, key=_profile_cache_key, tags=_profile_cache_tags)  # 15 dakika cache - Satış geçmişi daha az sık değişir (quota koruması için artırıldı)
 def get_sales_history_profile(profile_name=None):
     """
     Get sales history for a specific profile.
@@ -417,8 +879,7 @@ def get_sales_history_profile(profile_name=None):
         all_profiles = get_individual_profiles(include_berguzar=include_berguzar)
         all_sales = []
         
-        for prof in all_profiles:
-            sales_df = get_sales_history_profile(prof)
+        for prof, sales_df in _load_profiles_parallel(get_sales_history_profile, all_profiles).items():
             if sales_df is not None and not sales_df.empty:
                 sales_df_copy = sales_df.copy()
                 sales_df_copy["Profil"] = prof
@@ -429,6 +890,10 @@ def get_sales_history_profile(profile_name=None):
         
         return pd.concat(all_sales, ignore_index=True)
     
+    snapshot_df = _get_snapshot_frame(profile_name, "sales")
+    if snapshot_df is not None:
+        return snapshot_df
+    
     try:
         worksheet = _get_profile_sheet("sales", profile_name)
         if worksheet is None:
@@ -461,10 +926,11 @@ def add_sale_record_profile(date, code, market, qty, price, cost, profit, profil
         if worksheet is None:
             return
         
-        worksheet.append_row([str(date), code, market, float(qty), float(price), float(cost), float(profit)])
+        _sheets_call(lambda: worksheet.append_row([str(date), code, market, float(qty), float(price), float(cost), float(profit)]))
         
-        # Clear cache
-        get_sales_history_profile.clear()
+        # Evict only this profile's sales entry (and the TOTAL entries built from it)
+        get_sales_history_profile.invalidate(profile_tag(profile_name))
+        invalidate_sheets_snapshot()
     except Exception:
         pass
 
@@ -481,115 +947,17 @@ def read_portfolio_history_profile(profile_name=None):
     if is_aggregate_profile(profile_name):
         return _get_aggregated_history()
     
+    snapshot_df = _get_snapshot_frame(profile_name, "portfolio_history")
+    if snapshot_df is not None:
+        return snapshot_df
+    
     try:
         worksheet = _get_profile_sheet("portfolio_history", profile_name)
         if worksheet is None:
             return pd.DataFrame(columns=["Tarih", "Değer_TRY", "Değer_USD"])
         
-        def _fetch_history():
-            expected_headers = ["Tarih", "Değer_TRY", "Değer_USD"]
-            
-            try:
-                # Get first row to check headers
-                first_row = worksheet.row_values(1)
-                if not first_row:
-                    # Empty worksheet, add headers
-                    headers = ["Tarih", "Değer_TRY", "Değer_USD"]
-                    worksheet.update([headers], range_name="A1:C1")
-                    return []
-                
-                # Check for duplicate headers and fix them if needed
-                first_row_cleaned = [h.strip() if h else "" for h in first_row]
-                headers_need_fixing = (
-                    len(first_row_cleaned) != len(set(first_row_cleaned)) or 
-                    any(h == "" for h in first_row_cleaned[:3])
-                )
-                
-                # Normalize headers for comparison (case-insensitive, strip whitespace)
-                first_row_normalized = [h.strip().lower() if h else "" for h in first_row[:3]]
-                expected_normalized = [h.strip().lower() for h in expected_headers]
-                headers_match = (
-                    len(first_row_normalized) >= 3 and
-                    first_row_normalized[0] == expected_normalized[0] and
-                    first_row_normalized[1] == expected_normalized[1] and
-                    first_row_normalized[2] == expected_normalized[2]
-                )
-                
-                if headers_need_fixing or not headers_match:
-                    # Headers need fixing or don't match - fix them
-                    if headers_need_fixing:
-                        logger.warning(f"Duplicate or invalid headers detected, fixing headers")
-                    headers = ["Tarih", "Değer_TRY", "Değer_USD"]
-                    worksheet.update([headers], range_name="A1:C1")
-                    # After fixing, read row by row to avoid timing issues
-                    all_rows = worksheet.get_all_values()
-                    if len(all_rows) <= 1:
-                        return []
-                    records = []
-                    for row in all_rows[1:]:
-                        if len(row) >= 3 and any(cell.strip() for cell in row[:3]):
-                            records.append({
-                                "Tarih": row[0] if len(row) > 0 else "",
-                                "Değer_TRY": row[1] if len(row) > 1 else "",
-                                "Değer_USD": row[2] if len(row) > 2 else ""
-                            })
-                    return records
-                
-                # Headers are valid and match - try using expected_headers for efficient reading
-                # But catch any errors and fall back to row-by-row reading
-                try:
-                    return worksheet.get_all_records(expected_headers=expected_headers)
-                except Exception:
-                    # If expected_headers fails (e.g., extra columns, order issues), read row by row
-                    all_rows = worksheet.get_all_values()
-                    if len(all_rows) <= 1:
-                        return []
-                    records = []
-                    for row in all_rows[1:]:
-                        if len(row) >= 3 and any(cell.strip() for cell in row[:3]):
-                            records.append({
-                                "Tarih": row[0] if len(row) > 0 else "",
-                                "Değer_TRY": row[1] if len(row) > 1 else "",
-                                "Değer_USD": row[2] if len(row) > 2 else ""
-                            })
-                    return records
-            except Exception as e:
-                # If there's still an error, try reading rows directly
-                try:
-                    # Read all rows and manually parse (skip header row)
-                    all_rows = worksheet.get_all_values()
-                    if len(all_rows) <= 1:
-                        return []
-                    
-                    # Skip header row and parse data rows
-                    records = []
-                    for row in all_rows[1:]:
-                        if len(row) >= 3 and any(cell.strip() for cell in row[:3]):
-                            records.append({
-                                "Tarih": row[0] if len(row) > 0 else "",
-                                "Değer_TRY": row[1] if len(row) > 1 else "",
-                                "Değer_USD": row[2] if len(row) > 2 else ""
-                            })
-                    return records
-                except Exception as e2:
-                    logger.error(f"Veri okuma başarısız: {str(e2)}")
-                    return []
-        
-        data = _retry_with_backoff(_fetch_history, max_retries=3, initial_delay=2.0, max_delay=60.0)
-        if not data:
-            return pd.DataFrame(columns=["Tarih", "Değer_TRY", "Değer_USD"])
-        
-        df = pd.DataFrame(data)
-        if "Tarih" in df.columns:
-            df["Tarih"] = pd.to_datetime(df["Tarih"])
-        else:
-            df["Tarih"] = pd.to_datetime(datetime.now().strftime("%Y-%m-%d"))
-        if "Değer_TRY" not in df.columns:
-            df["Değer_TRY"] = 0.0
-        if "Değer_USD" not in df.columns:
-            df["Değer_USD"] = 0.0
-        
-        return df.sort_values("Tarih")
+        data = _read_history_records(worksheet)
+        return _history_df_from_records(data)
     except Exception as e:
         logger.error(f"Portfolio history okuma hatası ({profile_name}): {str(e)}", exc_info=True)
         return pd.DataFrame(columns=["Tarih", "Değer_TRY", "Değer_USD"])
@@ -602,94 +970,183 @@ def _get_aggregated_history():
     """
     include_berguzar = st.session_state.get("total_include_berguzar", True)
     all_profiles = get_individual_profiles(include_berguzar=include_berguzar)
-    all_dates = set()
-    profile_data = {}
-    
-    # Collect data from all profiles
-    for profile_name in all_profiles:
-        df = read_portfolio_history_profile(profile_name)
-        if df is not None and not df.empty:
-            profile_data[profile_name] = df
-            all_dates.update(df["Tarih"].dt.date.tolist())
+    return _aggregate_history_frames(_load_profiles_parallel(read_portfolio_history_profile, all_profiles))
+
+
+def _aggregate_history_frames(profile_frames):
+    """
+    Profil history'lerini tarih bazında toplar (columnar).
+    Tüm profiller birleştirilir, (profil, gün) başına son kayıt tutulur ve groupby ile toplanır.
     
-    if not profile_data:
-        return pd.DataFrame(columns=["Tarih", "Değer_TRY", "Değer_USD"])
+    Args:
+        profile_frames: {profil: Tarih/Değer_TRY/Değer_USD DataFrame}
     
-    # Create aggregated dataframe
-    all_dates = sorted(list(all_dates))
-    aggregated_rows = []
+    Returns:
+        Tarih sıralı Tarih/Değer_TRY/Değer_USD DataFrame
+    """
+    parts = []
+    for profile_name, df in profile_frames.items():
+        if df is None or df.empty or "Tarih" not in df.columns:
+            continue
+        parts.append(pd.DataFrame({
+            "_profile": profile_name,
+            "Tarih": pd.to_datetime(df["Tarih"]).dt.normalize(),
+            "Değer_TRY": pd.to_numeric(df["Değer_TRY"], errors="coerce") if "Değer_TRY" in df.columns else 0.0,
+            "Değer_USD": pd.to_numeric(df["Değer_USD"], errors="coerce") if "Değer_USD" in df.columns else 0.0,
+        }))
     
-    for date in all_dates:
-        total_try = 0.0
-        total_usd = 0.0
-        
-        for profile_name, df in profile_data.items():
-            # Find value for this date
-            date_mask = df["Tarih"].dt.date == date
-            if date_mask.any():
-                row = df[date_mask].iloc[-1]  # Take last entry if multiple
-                total_try += float(row.get("Değer_TRY", 0))
-                total_usd += float(row.get("Değer_USD", 0))
-        
-        aggregated_rows.append({
-            "Tarih": pd.Timestamp(date),
-            "Değer_TRY": total_try,
-            "Değer_USD": total_usd
-        })
+    if not parts:
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
     
-    return pd.DataFrame(aggregated_rows)
+    combined = pd.concat(parts, ignore_index=True)
+    # Aynı gün birden fazla kayıt varsa son kaydı al
+    combined = combined.drop_duplicates(subset=["_profile", "Tarih"], keep="last")
+    aggregated = combined.groupby("Tarih", sort=True)[["Değer_TRY", "Değer_USD"]].sum()
+    return aggregated.reset_index()[HISTORY_COLUMNS]
 
 
-def write_portfolio_history_profile(value_try, value_usd, profile_name=None):
+# Tarihçe yazma durumu - (profil, sheet tipi) -> son yazılan tarih ("YYYY-MM-DD")
+# Aynı gün tekrar yazma kontrolü tüm sheet'i indirmek yerine bu kayıttan yapılır.
+_history_last_dates = {}
+_history_pending = []  # (profil, sheet tipi, worksheet, satır) - toplu append bekleyenler
+_history_lock = threading.RLock()
+_history_batch_state = threading.local()
+
+
+def _ensure_history_headers(worksheet):
+    """History sheet'inin başlık satırını kontrol eder, eksik/bozuksa düzeltir."""
+    first_row = _sheets_call(lambda: worksheet.row_values(1), kind=READ)
+    first_row_normalized = [h.strip().lower() if h else "" for h in first_row[:3]]
+    expected_normalized = [h.strip().lower() for h in HISTORY_COLUMNS]
+    if first_row_normalized != expected_normalized:
+        _sheets_call(lambda: worksheet.update([HISTORY_COLUMNS], range_name="A1:C1"))
+
+
+def _get_history_last_date(profile_name, sheet_type, worksheet):
     """
-    Write portfolio history for a specific profile.
-    TOTAL profile history is computed, not stored.
+    (profil, sheet tipi) için son yazılan tarihi döndürür.
+    İlk erişimde başlıklar kontrol edilir; son tarih snapshot'tan, yoksa sadece A kolonundan okunur.
     """
-    if profile_name is None:
-        profile_name = get_current_profile()
+    key = (profile_name, sheet_type)
+    with _history_lock:
+        if key in _history_last_dates:
+            return _history_last_dates[key]
     
+    _ensure_history_headers(worksheet)
+    last_date = ""
+    snapshot_df = _get_snapshot_frame(profile_name, sheet_type)
+    if snapshot_df is not None:
+        if not snapshot_df.empty and "Tarih" in snapshot_df.columns and pd.notna(snapshot_df["Tarih"].max()):
+            last_date = snapshot_df["Tarih"].max().strftime("%Y-%m-%d")
+    else:
+        dates = _sheets_call(lambda: worksheet.col_values(1), kind=READ)[1:]
+        dates = [str(d)[:10] for d in dates if str(d).strip()]
+        last_date = max(dates) if dates else ""
+    
+    with _history_lock:
+        _history_last_dates[key] = last_date
+    return last_date
+
+
+def _queue_history_row(sheet_type, value_try, value_usd, profile_name):
+    """Bugünün kaydı yoksa satırı toplu append kuyruğuna ekler."""
     # Don't write to TOTAL profile
     if is_aggregate_profile(profile_name):
         return
     
-    worksheet = _get_profile_sheet("portfolio_history", profile_name)
+    today_str = datetime.now().strftime("%Y-%m-%d")
+    key = (profile_name, sheet_type)
+    with _history_lock:
+        if _history_last_dates.get(key, "") >= today_str:
+            return  # Bugün zaten kaydedilmiş - API çağrısı yok
+        if any(item[:2] == key for item in _history_pending):
+            return
+    
+    worksheet = _get_profile_sheet(sheet_type, profile_name)
     if worksheet is None:
         return
     
-    today_str = datetime.now().strftime("%Y-%m-%d")
     try:
-        # Ensure headers are correct before reading
-        first_row = worksheet.row_values(1)
-        expected_headers = ["Tarih", "Değer_TRY", "Değer_USD"]
-        
-        if not first_row:
-            # Empty worksheet, add headers
-            worksheet.update([expected_headers], range_name="A1:C1")
-        else:
-            # Check if headers match (normalized comparison)
-            first_row_normalized = [h.strip().lower() if h else "" for h in first_row[:3]]
-            expected_normalized = [h.strip().lower() for h in expected_headers]
-            headers_match = (
-                len(first_row_normalized) >= 3 and
-                first_row_normalized[0] == expected_normalized[0] and
-                first_row_normalized[1] == expected_normalized[1] and
-                first_row_normalized[2] == expected_normalized[2]
-            )
-            
-            if not headers_match:
-                # Headers don't match - fix them
-                worksheet.update([expected_headers], range_name="A1:C1")
-        
-        # Check if today's record already exists
-        data = worksheet.get_all_records(expected_headers=expected_headers)
-        for row in data:
-            if str(row.get("Tarih", ""))[:10] == today_str:
-                return  # Already recorded today
-        
-        new_row = [today_str, float(value_try), float(value_usd)]
-        worksheet.append_row(new_row)
+        if _get_history_last_date(profile_name, sheet_type, worksheet) >= today_str:
+            return
+        with _history_lock:
+            _history_pending.append((profile_name, sheet_type, worksheet, [today_str, float(value_try), float(value_usd)]))
     except Exception:
         pass
+    
+    if not getattr(_history_batch_state, "depth", 0):
+        flush_history_writes()
+
+
+def _history_append_request(worksheet, row):
+    """appendCells isteği - append_row (RAW) ile aynı değer tipleri."""
+    values = [{"userEnteredValue": {"stringValue": row[0]}}]
+    values += [{"userEnteredValue": {"numberValue": value}} for value in row[1:]]
+    return {
+        "appendCells": {
+            "sheetId": worksheet.id,
+            "rows": [{"values": values}],
+            "fields": "userEnteredValue",
+        }
+    }
+
+
+@background_lane()
+def flush_history_writes():
+    """Kuyruktaki tüm history satırlarını tek bir spreadsheets.batchUpdate ile ekler."""
+    with _history_lock:
+        pending = list(_history_pending)
+        del _history_pending[:]
+    if not pending:
+        return
+    
+    try:
+        spreadsheet = _get_spreadsheet()
+        if spreadsheet is None:
+            return
+        body = {"requests": [_history_append_request(ws, row) for _, _, ws, row in pending]}
+        _sheets_call(lambda: spreadsheet.batch_update(body))
+        with _history_lock:
+            for profile_name, sheet_type, _, row in pending:
+                _history_last_dates[(profile_name, sheet_type)] = row[0]
+        invalidate_sheets_snapshot()
+    except Exception:
+        # Handle eskimiş olabilir - bir sonraki yazmada yeniden çözülsün
+        invalidate_sheet_handles()
+        with _history_lock:
+            for profile_name, sheet_type, _, _ in pending:
+                _history_last_dates.pop((profile_name, sheet_type), None)
+
+
+@contextmanager
+def history_write_batch():
+    """
+    Blok içindeki history yazmalarını biriktirir, çıkışta tek istekte gönderir.
+    
+    Kullanım:
+        with history_write_batch():
+            write_portfolio_history_profile(...)
+            write_history_fon_profile(...)
+    """
+    _history_batch_state.depth = getattr(_history_batch_state, "depth", 0) + 1
+    try:
+        yield
+    finally:
+        _history_batch_state.depth -= 1
+        if _history_batch_state.depth == 0:
+            flush_history_writes()
+
+
+@background_lane()
+def write_portfolio_history_profile(value_try, value_usd, profile_name=None):
+    """
+    Write portfolio history for a specific profile.
+    TOTAL profile history is computed, not stored.
+    Aynı gün ikinci kez yazılmaz; kontrol yerel son-tarih kaydından yapılır.
+    """
+    if profile_name is None:
+        profile_name = get_current_profile()
+    _queue_history_row("portfolio_history", value_try, value_usd, profile_name)
 
 
 # Market-specific history functions (BIST, ABD, FON, EMTIA, NAKIT)
@@ -707,206 +1164,35 @@ def read_history_market_profile(market_type, profile_name=None):
     if is_aggregate_profile(profile_name):
         include_berguzar = st.session_state.get("total_include_berguzar", True)
         all_profiles = get_individual_profiles(include_berguzar=include_berguzar)
-        all_dates = set()
-        profile_data = {}
-        
-        for prof in all_profiles:
-            df = read_history_market_profile(market_type, prof)
-            if df is not None and not df.empty:
-                profile_data[prof] = df
-                all_dates.update(df["Tarih"].dt.date.tolist())
-        
-        if not profile_data:
-            return pd.DataFrame(columns=["Tarih", "Değer_TRY", "Değer_USD"])
-        
-        # Aggregate by date
-        all_dates = sorted(list(all_dates))
-        aggregated_rows = []
-        
-        for date in all_dates:
-            total_try = 0.0
-            total_usd = 0.0
-            
-            for prof, df in profile_data.items():
-                date_mask = df["Tarih"].dt.date == date
-                if date_mask.any():
-                    row = df[date_mask].iloc[-1]
-                    total_try += float(row.get("Değer_TRY", 0))
-                    total_usd += float(row.get("Değer_USD", 0))
-            
-            aggregated_rows.append({
-                "Tarih": pd.Timestamp(date),
-                "Değer_TRY": total_try,
-                "Değer_USD": total_usd
-            })
-        
-        return pd.DataFrame(aggregated_rows)
+        return _aggregate_history_frames(
+            _load_profiles_parallel(lambda prof: read_history_market_profile(market_type, prof), all_profiles)
+        )
+    
+    # Individual profile - önce tek istekli snapshot'tan oku
+    snapshot_df = _get_snapshot_frame(profile_name, sheet_type)
+    if snapshot_df is not None:
+        return snapshot_df
     
-    # Individual profile
     try:
         worksheet = _get_profile_sheet(sheet_type, profile_name)
         if worksheet is None:
             return pd.DataFrame(columns=["Tarih", "Değer_TRY", "Değer_USD"])
         
-        def _fetch_market_history():
-            expected_headers = ["Tarih", "Değer_TRY", "Değer_USD"]
-            
-            try:
-                # Get first row to check headers
-                first_row = worksheet.row_values(1)
-                if not first_row:
-                    # Empty worksheet, add headers
-                    headers = ["Tarih", "Değer_TRY", "Değer_USD"]
-                    worksheet.update([headers], range_name="A1:C1")
-                    return []
-                
-                # Check for duplicate headers and fix them if needed
-                first_row_cleaned = [h.strip() if h else "" for h in first_row]
-                headers_need_fixing = (
-                    len(first_row_cleaned) != len(set(first_row_cleaned)) or 
-                    any(h == "" for h in first_row_cleaned[:3])
-                )
-                
-                # Normalize headers for comparison (case-insensitive, strip whitespace)
-                first_row_normalized = [h.strip().lower() if h else "" for h in first_row[:3]]
-                expected_normalized = [h.strip().lower() for h in expected_headers]
-                headers_match = (
-                    len(first_row_normalized) >= 3 and
-                    first_row_normalized[0] == expected_normalized[0] and
-                    first_row_normalized[1] == expected_normalized[1] and
-                    first_row_normalized[2] == expected_normalized[2]
-                )
-                
-                if headers_need_fixing or not headers_match:
-                    # Headers need fixing or don't match - fix them
-                    if headers_need_fixing:
-                        logger.warning(f"Duplicate or invalid headers detected, fixing headers")
-                    headers = ["Tarih", "Değer_TRY", "Değer_USD"]
-                    worksheet.update([headers], range_name="A1:C1")
-                    # After fixing, read row by row to avoid timing issues
-                    all_rows = worksheet.get_all_values()
-                    if len(all_rows) <= 1:
-                        return []
-                    records = []
-                    for row in all_rows[1:]:
-                        if len(row) >= 3 and any(cell.strip() for cell in row[:3]):
-                            records.append({
-                                "Tarih": row[0] if len(row) > 0 else "",
-                                "Değer_TRY": row[1] if len(row) > 1 else "",
-                                "Değer_USD": row[2] if len(row) > 2 else ""
-                            })
-                    return records
-                
-                # Headers are valid and match - try using expected_headers for efficient reading
-                # But catch any errors and fall back to row-by-row reading
-                try:
-                    return worksheet.get_all_records(expected_headers=expected_headers)
-                except Exception:
-                    # If expected_headers fails (e.g., extra columns, order issues), read row by row
-                    all_rows = worksheet.get_all_values()
-                    if len(all_rows) <= 1:
-                        return []
-                    records = []
-                    for row in all_rows[1:]:
-                        if len(row) >= 3 and any(cell.strip() for cell in row[:3]):
-                            records.append({
-                                "Tarih": row[0] if len(row) > 0 else "",
-                                "Değer_TRY": row[1] if len(row) > 1 else "",
-                                "Değer_USD": row[2] if len(row) > 2 else ""
-                            })
-                    return records
-            except Exception as e:
-                # If there's still an error, try reading rows directly
-                try:
-                    # Read all rows and manually parse (skip header row)
-                    all_rows = worksheet.get_all_values()
-                    if len(all_rows) <= 1:
-                        return []
-                    
-                    # Skip header row and parse data rows
-                    records = []
-                    for row in all_rows[1:]:
-                        if len(row) >= 3 and any(cell.strip() for cell in row[:3]):
-                            records.append({
-                                "Tarih": row[0] if len(row) > 0 else "",
-                                "Değer_TRY": row[1] if len(row) > 1 else "",
-                                "Değer_USD": row[2] if len(row) > 2 else ""
-                            })
-                    return records
-                except Exception as e2:
-                    logger.error(f"Veri okuma başarısız: {str(e2)}")
-                    return []
-        
-        data = _retry_with_backoff(_fetch_market_history, max_retries=3, initial_delay=2.0, max_delay=60.0)
-        if not data:
-            return pd.DataFrame(columns=["Tarih", "Değer_TRY", "Değer_USD"])
-        
-        df = pd.DataFrame(data)
-        if "Tarih" in df.columns:
-            df["Tarih"] = pd.to_datetime(df["Tarih"])
-        else:
-            df["Tarih"] = pd.to_datetime(datetime.now().strftime("%Y-%m-%d"))
-        if "Değer_TRY" not in df.columns:
-            df["Değer_TRY"] = 0.0
-        if "Değer_USD" not in df.columns:
-            df["Değer_USD"] = 0.0
-        
-        return df.sort_values("Tarih")
+        data = _read_history_records(worksheet)
+        return _history_df_from_records(data)
     except Exception as e:
         logger.error(f"Market history okuma hatası ({profile_name}, {market_type}): {str(e)}", exc_info=True)
         return pd.DataFrame(columns=["Tarih", "Değer_TRY", "Değer_USD"])
 
 
+@background_lane()
 def write_history_market_profile(market_type, value_try, value_usd, profile_name=None):
     """
     Write market-specific history for a profile.
     """
     if profile_name is None:
         profile_name = get_current_profile()
-    
-    # Don't write to TOTAL profile
-    if is_aggregate_profile(profile_name):
-        return
-    
-    sheet_type = f"history_{market_type}"
-    worksheet = _get_profile_sheet(sheet_type, profile_name)
-    if worksheet is None:
-        return
-    
-    today_str = datetime.now().strftime("%Y-%m-%d")
-    try:
-        # Ensure headers are correct before reading
-        first_row = worksheet.row_values(1)
-        expected_headers = ["Tarih", "Değer_TRY", "Değer_USD"]
-        
-        if not first_row:
-            # Empty worksheet, add headers
-            worksheet.update([expected_headers], range_name="A1:C1")
-        else:
-            # Check if headers match (normalized comparison)
-            first_row_normalized = [h.strip().lower() if h else "" for h in first_row[:3]]
-            expected_normalized = [h.strip().lower() for h in expected_headers]
-            headers_match = (
-                len(first_row_normalized) >= 3 and
-                first_row_normalized[0] == expected_normalized[0] and
-                first_row_normalized[1] == expected_normalized[1] and
-                first_row_normalized[2] == expected_normalized[2]
-            )
-            
-            if not headers_match:
-                # Headers don't match - fix them
-                worksheet.update([expected_headers], range_name="A1:C1")
-        
-        # Check if today's record already exists
-        data = worksheet.get_all_records(expected_headers=expected_headers)
-        for row in data:
-            if str(row.get("Tarih", ""))[:10] == today_str:
-                return
-        
-        new_row = [today_str, float(value_try), float(value_usd)]
-        worksheet.append_row(new_row)
-    except Exception:
-        pass
+    _queue_history_row(f"history_{market_type}", value_try, value_usd, profile_name)
 
 
 # Convenience wrappers for each market type
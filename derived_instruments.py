@@ -0,0 +1,147 @@
+"""
+Derived Instruments
+Ons fiyatlarından türetilen gram enstrümanları (Gram Altın, 22 Ayar, Gram Gümüş) için ortak katman.
+Tüm tüketiciler curr/prev ve tarihsel serileri buradan, paylaşılan fiyat verisi üzerinden hesaplar.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from history_store import get_daily_closes
+
+OUNCE_GRAMS = 31.1035  # 1 troy ons = 31.1035 gram
+FX_SYMBOL = "TRY=X"
+
+
+@dataclass(frozen=True)
+class DerivedInstrument:
+    """Gram fiyatı = ons (USD) × USD/TRY / 31.1035 × saflık."""
+
+    key: str
+    label: str
+    base_symbol: str
+    purity: float = 1.0
+
+
+# Eşleştirme sırası önemli: "22 AYAR GRAM ALTIN" içinde "GRAM ALTIN" de geçer
+DERIVED_INSTRUMENTS: Dict[str, DerivedInstrument] = {
+    "GRAM_ALTIN_22AYAR": DerivedInstrument(
+        "GRAM_ALTIN_22AYAR", "22 Ayar Gram Altın", "GC=F", 0.9167
+    ),  # 22/24
+    "GRAM_GUMUS": DerivedInstrument("GRAM_GUMUS", "Gram Gümüş", "SI=F"),
+    "GRAM_ALTIN": DerivedInstrument("GRAM_ALTIN", "Gram Altın", "GC=F"),
+}
+_KOD_PATTERNS = (
+    ("22 AYAR", "GRAM_ALTIN_22AYAR"),
+    ("GRAM GÜMÜŞ", "GRAM_GUMUS"),
+    ("GRAM ALTIN", "GRAM_ALTIN"),
+)
+
+
+def resolve_derived(kod) -> Optional[DerivedInstrument]:
+    """Portföy kodunun türetilmiş enstrümanı; değilse None."""
+    kod_upper = str(kod).upper()
+    for pattern, key in _KOD_PATTERNS:
+        if pattern in kod_upper:
+            return DERIVED_INSTRUMENTS[key]
+    return None
+
+
+def derived_keys(kod: pd.Series) -> pd.Series:
+    """Kod kolonunu vektörel olarak enstrüman anahtarlarına eşler ('' = türetilmiş değil)."""
+    kod_upper = kod.astype(str).str.upper()
+    keys = pd.Series("", index=kod.index, dtype=object)
+    for pattern, key in reversed(_KOD_PATTERNS):
+        keys = keys.mask(kod_upper.str.contains(pattern, regex=False, na=False), key)
+    return keys
+
+
+def base_symbols(keys: Optional[Iterable[str]] = None, include_fx: bool = True) -> List[str]:
+    """Türetilmiş enstrümanların ihtiyaç duyduğu baz semboller."""
+    keys = DERIVED_INSTRUMENTS if keys is None else keys
+    symbols = [DERIVED_INSTRUMENTS[k].base_symbol for k in keys if k in DERIVED_INSTRUMENTS]
+    if include_fx:
+        symbols.append(FX_SYMBOL)
+    return list(dict.fromkeys(symbols))
+
+
+def _instrument_table() -> pd.DataFrame:
+    return pd.DataFrame(
+        [(inst.base_symbol, inst.purity / OUNCE_GRAMS) for inst in DERIVED_INSTRUMENTS.values()],
+        index=pd.Index(list(DERIVED_INSTRUMENTS), name="key"),
+        columns=["base", "factor"],
+    )
+
+
+def derived_quotes(prices: pd.DataFrame, usd_try: Optional[float] = None) -> pd.DataFrame:
+    """
+    Fiyat panosundan (curr/prev) tüm türetilmiş enstrümanların TRY curr/prev'ini hesaplar.
+
+    Args:
+        prices: Sembol index'li curr/prev DataFrame (get_quote_frame çıktısı)
+        usd_try: Kur; None ise panodaki TRY=X kullanılır
+
+    Returns:
+        Enstrüman anahtarı index'li curr/prev DataFrame (baz fiyatı olmayanlar 0)
+    """
+    table = _instrument_table()
+    if usd_try is None:
+        usd_try = float(prices.at[FX_SYMBOL, "curr"]) if FX_SYMBOL in prices.index else 0.0
+    base = prices.reindex(table["base"])[["curr", "prev"]].fillna(0.0).to_numpy(dtype=float)
+    values = base * (table["factor"].to_numpy(dtype=float) * float(usd_try))[:, None]
+    return pd.DataFrame(values, index=table.index, columns=["curr", "prev"])
+
+
+def derived_history(
+    keys: Iterable[str],
+    period: str = "60d",
+    start_date: Optional[pd.Timestamp] = None,
+    currency: str = "TRY",
+) -> Dict[str, Optional[pd.Series]]:
+    """
+    Türetilmiş enstrümanların günlük kapanış serileri.
+
+    Baz ons serileri ve TRY=X aynı yerel depodan tek çağrıda okunur; TRY serisinde
+    kur tarih bazında hizalanır (eksik günler son kurla doldurulur).
+
+    Args:
+        keys: Enstrüman anahtarları
+        period: Pencere ("60d", "1y", ...)
+        start_date: Verilirse pencere en az bu tarihten başlar
+        currency: "TRY" (gram TL) veya "USD" (gram USD, kur uygulanmaz)
+
+    Returns:
+        {anahtar: seri veya None}
+    """
+    keys = [k for k in dict.fromkeys(keys) if k in DERIVED_INSTRUMENTS]
+    if not keys:
+        return {}
+    closes = get_daily_closes(
+        base_symbols(keys, include_fx=currency == "TRY"), period=period, start_date=start_date
+    )
+
+    fx = None
+    if currency == "TRY":
+        fx = closes.get(FX_SYMBOL)
+        if fx is None or fx.empty:
+            return {k: None for k in keys}
+
+    result = {}
+    for key in keys:
+        inst = DERIVED_INSTRUMENTS[key]
+        base = closes.get(inst.base_symbol)
+        if base is None or base.empty:
+            result[key] = None
+            continue
+        base = base.copy()
+        base.index = pd.to_datetime(base.index).tz_localize(None)
+        series = base * (inst.purity / OUNCE_GRAMS)
+        if fx is not None:
+            fx_aligned = (
+                fx.reindex(fx.index.union(base.index)).sort_index().ffill().reindex(base.index)
+            )
+            series = (series * fx_aligned).dropna()
+        result[key] = series.rename(key) if not series.empty else None
+    return result
@@ -0,0 +1,247 @@
+"""
+Disk Cache Module
+Yeniden başlatmalar ve Streamlit oturumları arasında paylaşılan SQLite tabanlı önbellek.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+
+from config import get_config
+from exceptions import CacheError
+
+# (tarih "YYYY-MM-DD", open, high, low, close, volume)
+Bar = Tuple[str, float, float, float, float, float]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ohlc (
+    symbol TEXT NOT NULL,
+    date TEXT NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    volume REAL,
+    PRIMARY KEY (symbol, date)
+);
+CREATE TABLE IF NOT EXISTS ohlc_meta (
+    symbol TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tefas_nav (
+    fund_code TEXT PRIMARY KEY,
+    curr REAL NOT NULL,
+    prev REAL NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS daily_base (
+    date TEXT NOT NULL,
+    kod TEXT NOT NULL,
+    saat TEXT,
+    fiyat REAL,
+    pb TEXT,
+    PRIMARY KEY (date, kod)
+);
+CREATE TABLE IF NOT EXISTS sheet_sync (
+    sheet TEXT PRIMARY KEY,
+    rows_synced INTEGER NOT NULL,
+    synced_at REAL NOT NULL
+);
+"""
+
+
+class DiskCache:
+    """Sembol bazlı OHLC geçmişi ve son TEFAS fiyatlarını saklayan SQLite önbelleği."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+        except (OSError, sqlite3.Error) as e:
+            raise CacheError(f"Disk cache açılamadı: {path} ({e})")
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._lock:
+            try:
+                rows = self._conn.execute(sql, params).fetchall()
+                self._conn.commit()
+                return rows
+            except sqlite3.Error as e:
+                raise CacheError(f"Disk cache sorgusu başarısız: {e}")
+
+    # --- OHLC geçmişi ---
+
+    def put_ohlc(self, symbol: str, bars: Iterable[Bar]) -> int:
+        """
+        Sembolün günlük barlarını yaz (aynı tarih varsa üzerine yazar).
+
+        Returns:
+            Yazılan bar sayısı
+        """
+        bars = list(bars)
+        with self._lock:
+            try:
+                if bars:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO ohlc (symbol, date, open, high, low, close, volume) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        [(symbol, *bar) for bar in bars],
+                    )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO ohlc_meta (symbol, updated_at) VALUES (?, ?)",
+                    (symbol, time.time()),
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                raise CacheError(f"OHLC yazılamadı ({symbol}): {e}")
+        return len(bars)
+
+    def get_ohlc(
+        self, symbol: str, start: Optional[str] = None, end: Optional[str] = None
+    ) -> List[Bar]:
+        """Sembolün [start, end] aralığındaki barlarını tarih sırasıyla döndür."""
+        sql = "SELECT date, open, high, low, close, volume FROM ohlc WHERE symbol = ?"
+        params: list = [symbol]
+        if start:
+            sql += " AND date >= ?"
+            params.append(start)
+        if end:
+            sql += " AND date <= ?"
+            params.append(end)
+        return self._execute(sql + " ORDER BY date", tuple(params))
+
+    def ohlc_first_date(self, symbol: str) -> Optional[str]:
+        """Sembol için saklanan ilk bar tarihi."""
+        rows = self._execute("SELECT MIN(date) FROM ohlc WHERE symbol = ?", (symbol,))
+        return rows[0][0] if rows else None
+
+    def ohlc_last_date(self, symbol: str) -> Optional[str]:
+        """Sembol için saklanan son bar tarihi."""
+        rows = self._execute("SELECT MAX(date) FROM ohlc WHERE symbol = ?", (symbol,))
+        return rows[0][0] if rows else None
+
+    def ohlc_updated_at(self, symbol: str) -> Optional[float]:
+        """Sembolün en son ağdan yenilendiği zaman (epoch saniye)."""
+        rows = self._execute("SELECT updated_at FROM ohlc_meta WHERE symbol = ?", (symbol,))
+        return rows[0][0] if rows else None
+
+    # --- TEFAS fiyatları ---
+
+    def put_tefas_nav(self, fund_code: str, curr: float, prev: float) -> None:
+        """Fonun son birim fiyatını zaman damgasıyla yaz."""
+        self._execute(
+            "INSERT OR REPLACE INTO tefas_nav (fund_code, curr, prev, fetched_at) VALUES (?, ?, ?, ?)",
+            (fund_code, float(curr), float(prev), time.time()),
+        )
+
+    def get_tefas_nav(
+        self, fund_code: str, max_age: Optional[float] = None
+    ) -> Optional[Tuple[float, float, float]]:
+        """
+        Fonun saklanan fiyatını döndür.
+
+        Args:
+            fund_code: Fon kodu
+            max_age: Saniye cinsinden en fazla yaş (None ise yaşa bakılmaz)
+
+        Returns:
+            (curr, prev, fetched_at) veya None
+        """
+        rows = self._execute(
+            "SELECT curr, prev, fetched_at FROM tefas_nav WHERE fund_code = ?", (fund_code,)
+        )
+        if not rows:
+            return None
+        curr, prev, fetched_at = rows[0]
+        if max_age is not None and time.time() - fetched_at > max_age:
+            return None
+        return curr, prev, fetched_at
+
+    # --- Günlük baz fiyat aynası ---
+
+    def put_daily_base(self, rows: Iterable[Tuple[str, str, str, float, str]]) -> int:
+        """
+        (tarih, saat, kod, fiyat, pb) satırlarını yaz; aynı gün aynı kod için son satır kalır.
+
+        Returns:
+            Yazılan satır sayısı
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        with self._lock:
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO daily_base (date, saat, kod, fiyat, pb) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                raise CacheError(f"Günlük baz fiyatlar yazılamadı: {e}")
+        return len(rows)
+
+    def get_daily_base(self, date: str) -> List[Tuple[str, float, str]]:
+        """Tarihin baz fiyatlarını (kod, fiyat, pb) olarak döndür."""
+        return self._execute(
+            "SELECT kod, fiyat, pb FROM daily_base WHERE date = ? ORDER BY kod", (date,)
+        )
+
+    def has_daily_base(self, date: str) -> bool:
+        """Tarih için en az bir baz fiyat kaydı var mı?"""
+        return bool(self._execute("SELECT 1 FROM daily_base WHERE date = ? LIMIT 1", (date,)))
+
+    def get_sheet_sync(self, sheet: str) -> Optional[Tuple[int, float]]:
+        """Sheet aynası için (senkronize edilen satır sayısı, zaman) bilgisi."""
+        rows = self._execute(
+            "SELECT rows_synced, synced_at FROM sheet_sync WHERE sheet = ?", (sheet,)
+        )
+        return rows[0] if rows else None
+
+    def set_sheet_sync(self, sheet: str, rows_synced: int) -> None:
+        """Sheet aynasının hangi satıra kadar okunduğunu kaydet."""
+        self._execute(
+            "INSERT OR REPLACE INTO sheet_sync (sheet, rows_synced, synced_at) VALUES (?, ?, ?)",
+            (sheet, int(rows_synced), time.time()),
+        )
+
+    def clear(self) -> None:
+        """Tüm önbelleği temizle."""
+        with self._lock:
+            try:
+                for table in ("ohlc", "ohlc_meta", "tefas_nav", "daily_base", "sheet_sync"):
+                    self._conn.execute(f"DELETE FROM {table}")
+                self._conn.commit()
+            except sqlite3.Error as e:
+                raise CacheError(f"Disk cache temizlenemedi: {e}")
+
+
+_disk_cache: Optional[DiskCache] = None
+_disk_cache_lock = threading.Lock()
+
+
+def get_disk_cache() -> Optional[DiskCache]:
+    """
+    Global disk cache instance'ını döndür.
+
+    Returns:
+        DiskCache veya disk kullanılamıyorsa None (çağıranlar ağa düşer)
+    """
+    global _disk_cache
+    if _disk_cache is None:
+        with _disk_cache_lock:
+            if _disk_cache is None:
+                path = os.path.join(get_config().app.cache_dir, "portfoy_cache.sqlite3")
+                try:
+                    _disk_cache = DiskCache(path)
+                except CacheError:
+                    return None
+    return _disk_cache
@@ -0,0 +1,109 @@
+"""
+Feed Pool
+Sorgu bazlı cache'li eşzamanlı akış havuzu ve haber kayıtlarının birleştirilmesi.
+Ağ erişimi (HTTP + RSS ayrıştırma) havuza fonksiyon olarak verilir (news_feed).
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional
+
+from tagged_cache import DOMAIN_NEWS, domain_tag, get_tagged_cache
+
+
+class FeedPool:
+    """
+    Sorgu -> kayıtlar akış havuzu.
+
+    Cache'te (TaggedCache, DOMAIN_NEWS) olan sorgular ağa çıkmaz; aynı sorgu aynı anda
+    sadece bir kez çekilir - devam eden çekim sonraki çağrılarca paylaşılır. Başarısız
+    çekimler cache'e yazılmaz, bir sonraki çağrıda tekrar denenir.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str], List[dict]],
+        ttl: float,
+        max_workers: int,
+        namespace: str = "news_feed",
+        on_error: Optional[Callable[[str, Exception], None]] = None,
+    ):
+        """
+        Args:
+            fetch: Sorgunun kayıtlarını döndüren fonksiyon - hata durumunda exception fırlatır
+            ttl: Cache süresi (saniye)
+            max_workers: Eşzamanlı çekim sınırı
+            namespace: TaggedCache namespace'i
+            on_error: Başarısız çekimde (sorgu, hata) ile çağrılır (loglama)
+        """
+        self.fetch = fetch
+        self.ttl = ttl
+        self.namespace = namespace
+        self.on_error = on_error
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="news-feed")
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _run(self, query: str) -> List[dict]:
+        try:
+            entries = self.fetch(query)
+        except Exception as e:
+            entries = None
+            if self.on_error is not None:
+                self.on_error(query, e)
+        with self._lock:
+            self._inflight.pop(query, None)
+            if entries is not None:
+                get_tagged_cache().set(
+                    self.namespace, query, entries, self.ttl, [domain_tag(DOMAIN_NEWS)]
+                )
+        return entries or []
+
+    def fetch_many(self, queries: Iterable[str], wait_timeout: float) -> Dict[str, List[dict]]:
+        """
+        Sorguların kayıtlarını eşzamanlı çeker, en fazla wait_timeout saniye bekler.
+
+        Returns:
+            {sorgu: kayıt listesi} - zamanında gelmeyen sorgular sözlükte yer almaz
+            (arka planda tamamlanıp cache'e yazılır)
+        """
+        results = {}
+        pending = {}
+        with self._lock:
+            for query in dict.fromkeys(q for q in queries if q):
+                entries = get_tagged_cache().get(self.namespace, query)
+                if entries is not None:
+                    results[query] = entries
+                    continue
+                future = self._inflight.get(query)
+                if future is None:
+                    future = self._executor.submit(self._run, query)
+                    self._inflight[query] = future
+                pending[query] = future
+
+        if pending:
+            wait(pending.values(), timeout=wait_timeout)
+            for query, future in pending.items():
+                if future.done():
+                    try:
+                        results[query] = future.result()
+                    except Exception:
+                        continue
+        return results
+
+
+def merge_news(items: Iterable[dict], limit: Optional[int] = None) -> List[dict]:
+    """
+    Haber kayıtlarını başlığa göre tekilleştirip yayın zamanına göre (en yeni önce) sıralar.
+    İlk görülen kayıt tutulur; sıralama 'timestamp' alanı üzerinden yapılır.
+    """
+    seen = set()
+    merged = []
+    for item in items:
+        title = item.get("title")
+        if not title or title in seen:
+            continue
+        seen.add(title)
+        merged.append(item)
+    merged.sort(key=lambda item: item.get("timestamp", 0.0), reverse=True)
+    return merged[:limit] if limit else merged
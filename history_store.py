@@ -0,0 +1,220 @@
+"""
+History Store
+Sembol bazlı artımlı günlük fiyat deposu - sadece eksik günler ağdan çekilir.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+import yfinance as yf
+
+from config import get_config
+from disk_cache import get_disk_cache
+from exceptions import CacheError
+from history_sync import Fetcher, sync_keys
+from logger import get_logger
+
+logger = get_logger()
+
+# Sembol -> tam Close serisi (disk'ten okunmuş); senkronizasyonda geçersiz kılınır
+_memory: Dict[str, pd.Series] = {}
+_memory_lock = threading.Lock()
+
+
+def period_to_days(period: str) -> int:
+    """
+    yfinance period string'ini gün sayısına çevir.
+
+    Args:
+        period: "60d", "1mo", "1y", "5y" gibi
+
+    Returns:
+        Gün sayısı (tanınmazsa 60)
+    """
+    period = str(period).strip().lower()
+    try:
+        if period.endswith("mo"):
+            return int(period[:-2]) * 31
+        if period.endswith("d"):
+            return int(period[:-1])
+        if period.endswith("y"):
+            return int(period[:-1]) * 366
+    except ValueError:
+        pass
+    return 60
+
+
+def _frame_to_bars(h: pd.DataFrame) -> list:
+    """yfinance OHLC DataFrame'ini disk cache bar listesine çevirir."""
+    h = h.dropna(subset=["Close"])
+    if h.empty:
+        return []
+    dates = pd.to_datetime(h.index).tz_localize(None).strftime("%Y-%m-%d")
+    volume = h["Volume"] if "Volume" in h.columns else pd.Series(0.0, index=h.index)
+    return list(
+        zip(
+            dates,
+            h.get("Open", h["Close"]).astype(float),
+            h.get("High", h["Close"]).astype(float),
+            h.get("Low", h["Close"]).astype(float),
+            h["Close"].astype(float),
+            volume.fillna(0).astype(float),
+        )
+    )
+
+
+def _bars_to_closes(bars: list) -> pd.Series:
+    """Disk cache barlarından tarih index'li Close serisi üretir."""
+    return pd.Series(
+        [bar[4] for bar in bars],
+        index=pd.to_datetime([bar[0] for bar in bars]),
+        name="Close",
+        dtype=float,
+    )
+
+
+def _download_from(symbols: List[str], start: str) -> Dict[str, list]:
+    """Aynı başlangıç tarihine sahip sembolleri tek istekte indirir."""
+    try:
+        data = yf.download(
+            tickers=" ".join(symbols),
+            start=start,
+            interval="1d",
+            group_by="ticker",
+            auto_adjust=False,
+            progress=False,
+            threads=True,
+            timeout=get_config().app.socket_timeout,
+        )
+    except Exception as e:
+        logger.warning(f"Tarihsel fiyat indirme başarısız ({start}): {e}")
+        return {}
+    if data is None or data.empty:
+        return {}
+
+    bars = {}
+    for sym in symbols:
+        try:
+            if isinstance(data.columns, pd.MultiIndex):
+                if sym not in data.columns.get_level_values(0):
+                    continue
+                bars[sym] = _frame_to_bars(data[sym])
+            elif len(symbols) == 1:
+                bars[sym] = _frame_to_bars(data)
+        except Exception:
+            continue
+    return bars
+
+
+def sync_store(keys: Iterable[str], start: str, fetch: Fetcher, force: bool = False) -> None:
+    """
+    Anahtarlı deponun ortak senkronizasyonu - Yahoo sembolleri ve fon NAV'ları (TEFAS:KOD)
+    aynı plan/kapsama/TTL kurallarıyla (history_sync) tamamlanır.
+
+    Args:
+        keys: Depo anahtarları
+        start: "YYYY-MM-DD" - deponun kapsaması gereken ilk tarih
+        fetch: (anahtarlar, başlangıç tarihi) -> {anahtar: barlar}
+        force: True ise TTL'e bakmadan boşluğu çek
+    """
+    disk = get_disk_cache()
+    stored = sync_keys(keys, start, fetch, disk, get_config().app.cache_ttl_history, force=force)
+    with _memory_lock:
+        for key, bars in stored.items():
+            if disk is not None:
+                _memory.pop(key, None)
+            else:
+                # Disk yoksa sadece bellekte tut
+                _memory[key] = _bars_to_closes(bars)
+
+
+def sync_symbols(symbols: Iterable[str], start: str, force: bool = False) -> None:
+    """
+    Sembollerin disk deposunu start tarihinden bugüne kadar tamamla.
+
+    Hiç geçmişi olmayan (veya start'ı COVERAGE_SLACK_DAYS payıyla kapsamayan) semboller
+    start'tan itibaren tam çekilir; diğerleri sadece son saklanan tarihten itibaren (boşluk)
+    çekilir. TTL içinde yenilenmiş semboller atlanır; veri gelmeyenler damgalanmaz.
+
+    Args:
+        symbols: Yahoo Finance sembolleri
+        start: "YYYY-MM-DD" - deponun kapsaması gereken ilk tarih
+        force: True ise TTL'e bakmadan boşluğu çek
+    """
+    sync_store(symbols, start, _download_from, force=force)
+
+
+def read_series(key: str) -> Optional[pd.Series]:
+    """Anahtarın tüm Close serisini bellekten, yoksa diskten okur (ağ erişimi yok)."""
+    with _memory_lock:
+        series = _memory.get(key)
+    if series is not None:
+        return series
+    disk = get_disk_cache()
+    if disk is None:
+        return None
+    try:
+        bars = disk.get_ohlc(key)
+    except CacheError:
+        return None
+    if not bars:
+        return None
+    series = _bars_to_closes(bars)
+    with _memory_lock:
+        _memory[key] = series
+    return series
+
+
+def window_start(period: str, start_date: Optional[pd.Timestamp] = None) -> pd.Timestamp:
+    """Pencerenin ilk günü: bugünden period kadar geri, start_date daha eskiyse o."""
+    start = pd.Timestamp.today().normalize() - pd.Timedelta(days=period_to_days(period))
+    if start_date is not None:
+        start = min(start, pd.to_datetime(start_date).normalize())
+    return start
+
+
+def read_window(keys: Iterable[str], start: pd.Timestamp) -> Dict[str, Optional[pd.Series]]:
+    """
+    Anahtarların start'tan itibaren serileri (depodan dilimlenir).
+
+    Returns:
+        {anahtar: seri veya None}
+    """
+    result = {}
+    for key in keys:
+        series = read_series(key)
+        if series is None:
+            result[key] = None
+            continue
+        window = series[series.index >= start]
+        result[key] = window.copy() if not window.empty else None
+    return result
+
+
+def get_daily_closes(
+    symbols: Iterable[str],
+    period: str = "60d",
+    start_date: Optional[pd.Timestamp] = None,
+) -> Dict[str, Optional[pd.Series]]:
+    """
+    Semboller için istenen penceredeki günlük kapanış serilerini döndür.
+
+    Depo önce artımlı olarak senkronize edilir, ardından pencere yerel
+    depodan dilimlenir; 60d, 1y, 5y gibi her uzunluk aynı yoldan okunur.
+
+    Args:
+        symbols: Yahoo Finance sembolleri
+        period: Pencere uzunluğu ("60d", "1y", ...)
+        start_date: Verilirse pencere en az bu tarihten başlar
+
+    Returns:
+        {sembol: Close serisi veya None}
+    """
+    symbols = [s for s in dict.fromkeys(symbols) if s]
+    if not symbols:
+        return {}
+
+    start = window_start(period, start_date)
+    sync_symbols(symbols, start.strftime("%Y-%m-%d"))
+    return read_window(symbols, start)
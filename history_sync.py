@@ -0,0 +1,115 @@
+"""
+History Sync
+Yerel OHLC deposunun artımlı senkronizasyonu - hangi anahtarın hangi tarihten çekileceği
+planlanır, çekilen barlar diske yazılır. Ağ erişimi çağırana aittir (Yahoo, TEFAS).
+"""
+
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+from exceptions import CacheError
+
+# Pencere başı hafta sonu/tatile denk gelirse ilk bar birkaç gün sonra olabilir
+COVERAGE_SLACK_DAYS = 4
+
+# (anahtarlar, başlangıç tarihi) -> {anahtar: barlar}; veri gelmeyen anahtarlar sonuçta yer almaz
+Fetcher = Callable[[List[str], str], Dict[str, list]]
+
+
+def covered_from(start: str, slack_days: int = COVERAGE_SLACK_DAYS) -> str:
+    """
+    start'ı kapsamış sayılmak için ilk barın en geç olabileceği tarih.
+
+    Args:
+        start: "YYYY-MM-DD"
+        slack_days: İşlem günü olmayan günler için tanınan pay
+
+    Returns:
+        "YYYY-MM-DD"
+    """
+    return (datetime.strptime(start, "%Y-%m-%d") + timedelta(days=slack_days)).strftime("%Y-%m-%d")
+
+
+def plan_sync(
+    keys: Iterable[str],
+    start: str,
+    disk,
+    ttl: float,
+    force: bool = False,
+    now: Optional[float] = None,
+) -> Dict[str, List[str]]:
+    """
+    Anahtarları çekilecekleri başlangıç tarihine göre grupla (her grup tek istek).
+
+    Hiç geçmişi olmayan (veya start'ı kapsamayan) anahtarlar start'tan itibaren tam çekilir;
+    diğerleri son saklanan tarihten itibaren (boşluk) çekilir. TTL içinde yenilenmiş
+    anahtarlar plana girmez.
+
+    Args:
+        keys: Depo anahtarları (Yahoo sembolü, TEFAS:KOD, ...)
+        start: "YYYY-MM-DD" - deponun kapsaması gereken ilk tarih
+        disk: DiskCache (None ise her anahtar start'tan çekilir)
+        ttl: Yenileme aralığı (saniye)
+        force: True ise TTL'e bakmadan boşluğu çek
+        now: Zaman damgası (None ise şimdi)
+
+    Returns:
+        {başlangıç tarihi: [anahtarlar]}
+    """
+    now = time.time() if now is None else now
+    coverage = covered_from(start)
+    groups: Dict[str, List[str]] = defaultdict(list)
+    for key in dict.fromkeys(keys):
+        if not key:
+            continue
+        fetch_from = start
+        if disk is not None:
+            try:
+                first_date = disk.ohlc_first_date(key)
+                last_date = disk.ohlc_last_date(key)
+                updated_at = disk.ohlc_updated_at(key)
+                if first_date and first_date <= coverage and last_date:
+                    if not force and updated_at and now - updated_at < ttl:
+                        continue
+                    # Son bar gün içinde eksik olabilir - o günden itibaren tekrar çek
+                    fetch_from = last_date
+            except CacheError:
+                pass
+        groups[fetch_from].append(key)
+    return dict(groups)
+
+
+def sync_keys(
+    keys: Iterable[str],
+    start: str,
+    fetch: Fetcher,
+    disk,
+    ttl: float,
+    force: bool = False,
+    now: Optional[float] = None,
+) -> Dict[str, list]:
+    """
+    Planı uygula: her grup fetch ile çekilir, gelen barlar diske yazılır.
+
+    Veri gelmeyen (başarısız ya da boş) anahtarlar için hiçbir şey yazılmaz - yenilenme
+    zamanı damgalanmadığından bir sonraki çağrıda TTL beklenmeden tekrar denenirler.
+
+    Returns:
+        Bar gelen anahtarlar -> barlar (disk yoksa çağıran bellekte tutar)
+    """
+    stored = {}
+    for fetch_from, group in plan_sync(keys, start, disk, ttl, force=force, now=now).items():
+        fetched = fetch(group, fetch_from)
+        for key in group:
+            bars = fetched.get(key)
+            if not bars:
+                continue
+            if disk is not None:
+                try:
+                    disk.put_ohlc(key, bars)
+                except CacheError:
+                    continue
+            stored[key] = bars
+    return stored
@@ -0,0 +1,111 @@
+"""
+News Feed
+Google News RSS akışlarını paylaşılan havuzla eşzamanlı çeken, sorgu bazlı cache'li haber katmanı.
+"""
+
+import calendar
+import threading
+import urllib.parse
+from typing import Dict, Iterable, List, Optional
+
+import feedparser
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import get_config
+from feed_pool import FeedPool
+from logger import get_logger
+
+logger = get_logger()
+
+GOOGLE_NEWS_URL = "https://news.google.com/rss/search?q={query}&hl=tr&gl=TR&ceid=TR:tr"
+
+FEED_NAMESPACE = "news_feed"  # Sorgu -> kayıtlar (TaggedCache, DOMAIN_NEWS)
+
+_session: Optional[requests.Session] = None
+_pool: Optional[FeedPool] = None
+_session_lock = threading.Lock()
+
+
+def _log_feed_error(query: str, error: Exception) -> None:
+    logger.warning(f"Haber akışı çekilemedi ({query}): {error}")
+
+
+def _get_session():
+    """Bağlantı havuzlu paylaşılan requests.Session ve akış havuzu."""
+    global _session, _pool
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                app = get_config().app
+                workers = app.news_max_workers
+                session = requests.Session()
+                session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=workers))
+                session.headers.update(
+                    {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
+                )
+                _pool = FeedPool(
+                    _fetch_feed,
+                    ttl=app.cache_ttl_news,
+                    max_workers=workers,
+                    namespace=FEED_NAMESPACE,
+                    on_error=_log_feed_error,
+                )
+                _session = session
+    return _session
+
+
+def feed_url(query: str) -> str:
+    """Google News RSS arama URL'i."""
+    return GOOGLE_NEWS_URL.format(query=urllib.parse.quote_plus(query))
+
+
+def _entry_timestamp(entry) -> float:
+    """Girdinin yayın zamanı (epoch, UTC); yoksa 0."""
+    parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+    if parsed:
+        try:
+            return float(calendar.timegm(parsed))
+        except (TypeError, ValueError, OverflowError):
+            pass
+    return 0.0
+
+
+def _fetch_feed(query: str) -> List[dict]:
+    """Tek akışı per-feed timeout ile çeker ve kayıtlara çevirir (hata olursa exception)."""
+    response = _get_session().get(feed_url(query), timeout=get_config().app.news_feed_timeout)
+    response.raise_for_status()
+    feed = feedparser.parse(response.content)
+    return [
+        {
+            "title": e.get("title", ""),
+            "link": e.get("link", ""),
+            "date": e.get("published", ""),
+            "timestamp": _entry_timestamp(e),
+        }
+        for e in feed.entries
+        if e.get("title")
+    ]
+
+
+def fetch_feeds(
+    queries: Iterable[str], wait_timeout: Optional[float] = None
+) -> Dict[str, List[dict]]:
+    """
+    Sorguların akışlarını eşzamanlı çeker.
+
+    Cache'te olan sorgular ağa çıkmaz; diğerleri paylaşılan havuza gönderilir ve
+    en fazla wait_timeout saniye beklenir. Süreyi aşan akışlar arka planda tamamlanıp
+    cache'e yazılır, bir sonraki render'da sonuçlara katılır.
+
+    Args:
+        queries: Arama sorguları
+        wait_timeout: Toplam bekleme süresi (None ise config.news_wait_timeout)
+
+    Returns:
+        {sorgu: kayıt listesi} - zamanında gelmeyen sorgular sözlükte yer almaz
+    """
+    if wait_timeout is None:
+        wait_timeout = get_config().app.news_wait_timeout
+    _get_session()
+    return _pool.fetch_many(queries, wait_timeout)
@@ -0,0 +1,216 @@
+"""
+Portfolio Time Series
+Portföyün günlük değer serisi - tek bir tarih × enstrüman fiyat matrisi ve
+enstrüman × adet vektörünün çarpımı olarak hesaplanır.
+Tarihsel grafik, karşılaştırma grafiği ve KPI sparkline'ları bu motoru kullanır.
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_loader import get_tefas_data, get_usd_try
+from derived_instruments import FX_SYMBOL, derived_history, resolve_derived
+from history_store import get_daily_closes, period_to_days
+from tefas_history import fund_key, get_fund_navs
+from utils import get_yahoo_symbol
+
+CASH_PREFIX = "NAKIT:"
+
+
+def asset_currency(kod: str, pazar: str) -> str:
+    """Varlığın fiyatlandığı para birimi (BIST, fon, emtia, nakit TRY; diğerleri USD)."""
+    pazar_upper = pazar.upper()
+    if (
+        "BIST" in pazar_upper
+        or "TL" in kod.upper()
+        or "FON" in pazar_upper
+        or "EMTIA" in pazar_upper
+        or "NAKIT" in pazar_upper
+    ):
+        return "TRY"
+    return "USD"
+
+
+def _holdings(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Portföy satırlarını enstrüman anahtarlarına çevirir.
+
+    Returns:
+        key index'li DataFrame: Adet (toplam), Currency (fiyat para birimi), Source (yahoo/derived/fund/cash)
+    """
+    rows = []
+    for _, row in df.iterrows():
+        kod = str(row.get("Kod", ""))
+        pazar = str(row.get("Pazar", ""))
+        adet = float(row.get("Adet", 0) or 0)
+        if adet == 0 or not kod:
+            continue
+        pazar_upper = pazar.upper()
+        if "NAKIT" in pazar_upper:
+            # USD nakit dolar bazında tutulur - TRY karşılığı tarihsel kurla hesaplanır
+            currency = "USD" if kod.upper() == "USD" else "TRY"
+            rows.append((f"{CASH_PREFIX}{kod.upper()}", adet, currency, "cash"))
+        elif "FON" in pazar_upper:
+            rows.append((fund_key(kod), adet, "TRY", "fund"))
+        else:
+            inst = resolve_derived(kod)
+            if inst is not None:
+                rows.append((inst.key, adet, "TRY", "derived"))
+            else:
+                rows.append(
+                    (get_yahoo_symbol(kod, pazar), adet, asset_currency(kod, pazar), "yahoo")
+                )
+    if not rows:
+        return pd.DataFrame(columns=["Adet", "Currency", "Source"])
+    holdings = pd.DataFrame(rows, columns=["key", "Adet", "Currency", "Source"])
+    return holdings.groupby("key", sort=False).agg(
+        Adet=("Adet", "sum"), Currency=("Currency", "first"), Source=("Source", "first")
+    )
+
+
+def holding_keys(df: pd.DataFrame) -> List[str]:
+    """Portföy satırlarının enstrüman anahtarları (fiyat matrisi sütunları)."""
+    return _holdings(df).index.tolist()
+
+
+@st.cache_data(ttl=600, show_spinner=False)  # 10 dakika cache - günlük seriler artımlı depodan
+def build_price_matrix(df: pd.DataFrame, period: str = "60d", start_date: pd.Timestamp = None):
+    """
+    Portföyün tarih × enstrüman fiyat matrisi (kendi para birimlerinde, forward fill'li).
+
+    Args:
+        df: Portföy DataFrame'i (Kod, Pazar, Adet)
+        period: Pencere ("60d", "1y", ...)
+        start_date: Verilirse pencere en az bu tarihten başlar
+
+    Returns:
+        (fiyat matrisi, holdings, USDTRY serisi) - fiyatı olmayan enstrümanlar matriste yer almaz;
+        veri yoksa None
+    """
+    holdings = _holdings(df)
+    if holdings.empty:
+        return None
+    today = pd.Timestamp.today().normalize()
+    source = holdings["Source"]
+
+    yahoo = holdings.index[source == "yahoo"].tolist()
+    derived = holdings.index[source == "derived"].tolist()
+    funds = holdings.index[source == "fund"].tolist()
+
+    # Tüm baz seriler + kur tek çağrıda yerel depodan
+    closes = get_daily_closes(yahoo + [FX_SYMBOL], period=period, start_date=start_date)
+    fx = closes.pop(FX_SYMBOL, None)
+    closes.update(derived_history(derived, period=period, start_date=start_date))
+    fund_codes = {key: key.split(":", 1)[1] for key in funds}
+    fund_navs = (
+        get_fund_navs(fund_codes.values(), period=period, start_date=start_date) if funds else {}
+    )
+    for key, code in fund_codes.items():
+        closes[key] = fund_navs.get(code)
+
+    columns = {}
+    for key, series in closes.items():
+        if series is None or series.empty:
+            continue
+        series = series.copy()
+        series.index = pd.to_datetime(series.index).tz_localize(None)
+        columns[key] = series[~series.index.duplicated(keep="last")]
+
+    if columns:
+        matrix = pd.DataFrame(columns).sort_index()
+    else:
+        window_start = today - pd.Timedelta(days=period_to_days(period))
+        matrix = pd.DataFrame(index=pd.date_range(window_start, today, freq="D"))
+    matrix.index.name = "Tarih"
+
+    # Geçmişi olmayan fonlar son fiyatla, nakit 1 ile sabit sütun
+    for key, code in fund_codes.items():
+        if key not in matrix.columns:
+            price, _ = get_tefas_data(code)
+            if price and price > 0:
+                matrix[key] = float(price)
+    for key in holdings.index[source == "cash"]:
+        matrix[key] = 1.0
+
+    if matrix.empty or matrix.shape[1] == 0:
+        return None
+    matrix = matrix.ffill()
+
+    # Kur serisi matris günlerine hizalanır (hafta sonları son kurla)
+    if fx is not None and not fx.empty:
+        fx.index = pd.to_datetime(fx.index).tz_localize(None)
+        fx = (
+            fx.reindex(fx.index.union(matrix.index))
+            .sort_index()
+            .ffill()
+            .bfill()
+            .reindex(matrix.index)
+        )
+    else:
+        fx = pd.Series(float("nan"), index=matrix.index)
+    return matrix, holdings.loc[matrix.columns], fx
+
+
+@st.cache_data(ttl=600, show_spinner=False)  # 10 dakika cache - (pencere, para birimi) başına
+def portfolio_value_series(
+    df: pd.DataFrame,
+    pb: str = "TRY",
+    period: str = "60d",
+    start_date: pd.Timestamp = None,
+    keys: Optional[Tuple[str, ...]] = None,
+) -> Optional[pd.Series]:
+    """
+    Portföyün günlük toplam değeri, pb para biriminde.
+
+    Fiyat matrisi görünüm para birimine çevrilir (USD sütunlar her günün TRY=X
+    kapanışıyla) ve adet vektörüyle tek matris-vektör çarpımıyla toplanır.
+    Spot kur cache anahtarında değildir; kur serisi yoksa güncel kur kullanılır.
+
+    keys verilirse sadece o enstrümanlar toplanır - pazar sekmeleri tüm portföyün tek
+    (cache'li) matrisinden kendi alt kümelerini okur.
+    """
+    built = build_price_matrix(df, period=period, start_date=start_date)
+    if built is None:
+        return None
+    matrix, holdings, fx = built
+    if keys is not None:
+        columns = [key for key in matrix.columns if key in set(keys)]
+        if not columns:
+            return None
+        matrix, holdings = matrix[columns], holdings.loc[columns]
+    fx = fx.fillna(get_usd_try())
+
+    # Günlük çevrim katsayıları: (tarih × 1) kur sütunu ile (enstrüman) para birimi maskesi
+    usd = (holdings["Currency"] == "USD").to_numpy()
+    fx_col = fx.to_numpy(dtype=float)[:, None]
+    scale = np.where(usd, fx_col, 1.0) if pb == "TRY" else np.where(usd, 1.0, 1.0 / fx_col)
+    prices = np.nan_to_num(matrix.to_numpy(dtype=float) * scale)
+    values = prices @ holdings["Adet"].to_numpy(dtype=float)
+    return pd.Series(values, index=matrix.index, name="ToplamDeğer")
+
+
+def portfolio_history_frame(
+    df: pd.DataFrame,
+    start_date: pd.Timestamp = None,
+    period: str = "60d",
+    keys: Optional[Tuple[str, ...]] = None,
+) -> pd.DataFrame:
+    """
+    Mevcut varlıkların fiyat geçmişinden read_portfolio_history biçiminde tarihçe üretir
+    (Tarih, Değer_TRY, Değer_USD) - loglanmış tarihçe yetersizken KPI'lar için.
+    keys verilirse df'in sadece bu enstrümanları toplanır.
+    """
+    value_try = portfolio_value_series(df, "TRY", period=period, start_date=start_date, keys=keys)
+    value_usd = portfolio_value_series(df, "USD", period=period, start_date=start_date, keys=keys)
+    if value_try is None or value_usd is None:
+        return pd.DataFrame(columns=["Tarih", "Değer_TRY", "Değer_USD"])
+    return pd.DataFrame(
+        {
+            "Tarih": value_try.index,
+            "Değer_TRY": value_try.to_numpy(),
+            "Değer_USD": value_usd.to_numpy(),
+        }
+    )
@@ -1,7 +1,7 @@
 import streamlit as st
 import yfinance as yf
 import pandas as pd
-import time
+import numpy as np
 import plotly.express as px
 from streamlit_option_menu import option_menu
 from datetime import datetime, timedelta
@@ -24,14 +24,16 @@ from profile_manager import (
     is_aggregate_profile,
     get_profile_display_name,
     get_profile_config,
+    get_individual_profiles,
 )
 
 # Use profile-aware data loader
 from data_loader_profiles import (
     get_data_from_sheet_profile as get_data_from_sheet,
-    save_data_to_sheet_profile as save_data_to_sheet,
+    queue_portfolio_save,
+    pop_portfolio_write_failures,
     get_sales_history_profile as get_sales_history,
-    add_sale_record_profile as add_sale_record,
+    record_sale_profile as record_sale,
     read_portfolio_history_profile as read_portfolio_history,
     write_portfolio_history_profile as write_portfolio_history,
     read_history_bist_profile as read_history_bist,
@@ -46,6 +48,8 @@ from data_loader_profiles import (
     write_history_nakit_profile as write_history_nakit,
     get_daily_base_prices_profile as get_daily_base_prices,
     update_daily_base_prices_profile as update_daily_base_prices,
+    invalidate_sheets_snapshot,
+    history_write_batch,
 )
 
 # Import non-profile specific functions from data_loader
@@ -55,9 +59,20 @@ from data_loader import (
     get_financial_news,
     get_portfolio_news,
     get_tefas_data,
+    get_tefas_prices,
     get_timeframe_changes,
     get_history_summary,
 )
+from price_engine import clear_price_cache
+from price_refresher import get_price_refresher, get_quote_frame, portfolio_price_symbols
+from derived_instruments import base_symbols, derived_keys, derived_quotes
+from portfolio_timeseries import holding_keys, portfolio_history_frame
+from tagged_cache import DOMAIN_SHEET, domain_tag, invalidate_tags
+
+def _flash(message, level="success"):
+    """Rerun sonrası bir kez gösterilecek mesaj (level: success / info / warning)."""
+    st.session_state.setdefault("_flash_messages", []).append((level, message))
+
 
 # Fon getirilerinin yeniden dahil edilme tarihi (varsayılan: yarın)
 def _init_fon_reset_date():
@@ -208,29 +223,7 @@ def render_portfolio_news_section(portfolio_df, watchlist_df=None):
     if selected_source != "Tümü":
         filtered_news = [n for n in filtered_news if n.get("source") == selected_source]
     
-    # Filtreleme sonrası tarihe göre tekrar sırala (en yeni önce)
-    try:
-        from datetime import datetime
-        def parse_date_for_sort(date_str):
-            """Tarih string'ini parse edip sıralama için kullanılabilir hale getirir"""
-            try:
-                # RFC 2822 formatını dene
-                return datetime.strptime(date_str[:25], '%a, %d %b %Y %H:%M:%S')
-            except:
-                try:
-                    # ISO formatını dene
-                    return datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                except:
-                    # Parse edilemezse string olarak kullan
-                    return date_str
-        filtered_news.sort(key=lambda x: parse_date_for_sort(x.get("date", "")), reverse=True)
-    except Exception:
-        # Hata durumunda string sıralaması yap
-        try:
-            filtered_news.sort(key=lambda x: x.get("date", ""), reverse=True)
-        except:
-            pass
-    
+    # Filtreleme sonrası sıra korunur - get_portfolio_news yayın zamanına göre (en yeni önce) sıralı döner
     if not filtered_news:
         st.info("Seçilen filtreler için haber bulunamadı.")
         return
@@ -274,20 +267,10 @@ col_refresh, col_space = st.columns([0.15, 0.85])
 with col_refresh:
     if st.button("🔄 Yenile", help="Tüm verileri yeniden yükle (cache'i temizle)", key="refresh_button"):
         # Tüm kritik cache'leri temizle
-        cache_functions = [
-            get_data_from_sheet,
-            get_usd_try,
-            get_tickers_data,
-            _fetch_batch_prices_bist_abd,
-            _fetch_batch_prices_crypto,
-            _fetch_batch_prices_emtia,
-        ]
-        for func in cache_functions:
-            if hasattr(func, 'clear'):
-                try:
-                    func.clear()
-                except Exception:
-                    pass
+        invalidate_tags(domain_tag(DOMAIN_SHEET))
+        invalidate_sheets_snapshot()
+        clear_price_cache()
+        get_price_refresher().refresh_now()
         st.rerun()
 
 # Lazy loading ile performans optimizasyonu
@@ -296,6 +279,23 @@ current_profile = get_current_profile()
 with st.spinner("📊 Portföy verileri yükleniyor..."):
     portfoy_df = get_data_from_sheet(profile_name=current_profile)
 
+# Bir önceki render'daki kaydın mesajı (rerun öncesi beklemek yerine burada gösterilir)
+for _level, _message in st.session_state.pop("_flash_messages", []):
+    getattr(st, _level)(_message)
+# Arka planda Sheets'e yazılamayan düzenlemeler geri alınmıştır
+for _profile, _error in pop_portfolio_write_failures():
+    st.error(f"❌ {_profile} profilindeki son düzenleme Google Sheets'e kaydedilemedi ve geri alındı. Hata: {_error}")
+
+# Arka plan fiyat yenileyicisine tüm profillerin sembollerini bildir (snapshot'tan okunur, ek istek yok)
+if not st.session_state.get("_price_universe_registered"):
+    price_refresher = get_price_refresher()
+    for _profile in get_individual_profiles():
+        try:
+            price_refresher.register_symbols(portfolio_price_symbols(get_data_from_sheet(profile_name=_profile)))
+        except Exception:
+            pass
+    st.session_state["_price_universe_registered"] = True
+
 # --- HEADER ---
 with st.spinner("💱 Döviz kuru alınıyor..."):
     USD_TRY = get_usd_try()
@@ -417,162 +417,6 @@ selected = option_menu(
 
 
 # --- ANALİZ ---
-@st.cache_data(ttl=600)  # 10 dakika cache - BIST ve ABD için optimize edildi
-def _fetch_batch_prices_bist_abd(symbols_list, period="5d"):
-    """Batch olarak BIST ve ABD fiyat verilerini çeker - borsa kapalıyken de son kapanış fiyatını döndürür"""
-    if not symbols_list:
-        return {}
-    prices = {}
-    
-    # Önce batch deneme - timeout ile optimize edilmiş
-    try:
-        tickers = yf.Tickers(" ".join(symbols_list))
-        for sym in symbols_list:
-            try:
-                # Timeout ekle - daha hızlı hata yakalama
-                h = tickers.tickers[sym].history(period=period, timeout=15)
-                if not h.empty:
-                    # Son geçerli fiyatı al (borsa kapalıysa son kapanış)
-                    curr = h["Close"].iloc[-1]
-                    # Önceki günü bul (eğer bugün veri yoksa, son iki günden birini al)
-                    if len(h) > 1:
-                        prev = h["Close"].iloc[-2]
-                    else:
-                        prev = curr
-                    prices[sym] = {"curr": curr, "prev": prev}
-                else:
-                    # Eğer period="2d" ile veri yoksa, daha uzun period dene
-                    h_longer = tickers.tickers[sym].history(period="5d")
-                    if not h_longer.empty:
-                        curr = h_longer["Close"].iloc[-1]
-                        prev = h_longer["Close"].iloc[-2] if len(h_longer) > 1 else curr
-                        prices[sym] = {"curr": curr, "prev": prev}
-                    else:
-                        prices[sym] = {"curr": 0, "prev": 0}
-            except Exception as e:
-                # Batch başarısız olursa, tek tek dene
-                try:
-                    ticker = yf.Ticker(sym)
-                    h = ticker.history(period="5d")
-                    if not h.empty:
-                        curr = h["Close"].iloc[-1]
-                        prev = h["Close"].iloc[-2] if len(h) > 1 else curr
-                        prices[sym] = {"curr": curr, "prev": prev}
-                    else:
-                        prices[sym] = {"curr": 0, "prev": 0}
-                except Exception:
-                    prices[sym] = {"curr": 0, "prev": 0}
-    except Exception:
-        # Batch tamamen başarısız olursa, her sembolü tek tek çek
-        for sym in symbols_list:
-            try:
-                ticker = yf.Ticker(sym)
-                h = ticker.history(period="5d")
-                if not h.empty:
-                    curr = h["Close"].iloc[-1]
-                    prev = h["Close"].iloc[-2] if len(h) > 1 else curr
-                    prices[sym] = {"curr": curr, "prev": prev}
-                else:
-                    prices[sym] = {"curr": 0, "prev": 0}
-            except Exception:
-                prices[sym] = {"curr": 0, "prev": 0}
-    
-    return prices
-
-@st.cache_data(ttl=300)  # 5 dakika cache - Kripto için optimize edildi
-def _fetch_batch_prices_crypto(symbols_list, period="5d"):
-    """Batch olarak Kripto fiyat verilerini çeker - optimize edilmiş"""
-    if not symbols_list:
-        return {}
-    prices = {}
-    
-    try:
-        tickers = yf.Tickers(" ".join(symbols_list))
-        for sym in symbols_list:
-            try:
-                # Timeout ekle - daha hızlı hata yakalama
-                h = tickers.tickers[sym].history(period=period, timeout=15)
-                if not h.empty:
-                    curr = h["Close"].iloc[-1]
-                    prev = h["Close"].iloc[-2] if len(h) > 1 else curr
-                    prices[sym] = {"curr": curr, "prev": prev}
-                else:
-                    prices[sym] = {"curr": 0, "prev": 0}
-            except Exception:
-                try:
-                    ticker = yf.Ticker(sym)
-                    h = ticker.history(period=period)
-                    if not h.empty:
-                        curr = h["Close"].iloc[-1]
-                        prev = h["Close"].iloc[-2] if len(h) > 1 else curr
-                        prices[sym] = {"curr": curr, "prev": prev}
-                    else:
-                        prices[sym] = {"curr": 0, "prev": 0}
-                except Exception:
-                    prices[sym] = {"curr": 0, "prev": 0}
-    except Exception:
-        for sym in symbols_list:
-            try:
-                ticker = yf.Ticker(sym)
-                h = ticker.history(period=period)
-                if not h.empty:
-                    curr = h["Close"].iloc[-1]
-                    prev = h["Close"].iloc[-2] if len(h) > 1 else curr
-                    prices[sym] = {"curr": curr, "prev": prev}
-                else:
-                    prices[sym] = {"curr": 0, "prev": 0}
-            except Exception:
-                prices[sym] = {"curr": 0, "prev": 0}
-    
-    return prices
-
-@st.cache_data(ttl=600)  # 10 dakika cache - EMTIA için optimize edildi
-def _fetch_batch_prices_emtia(symbols_list, period="5d"):
-    """Batch olarak EMTIA fiyat verilerini çeker"""
-    if not symbols_list:
-        return {}
-    prices = {}
-    
-    try:
-        tickers = yf.Tickers(" ".join(symbols_list))
-        for sym in symbols_list:
-            try:
-                # Timeout ekle - daha hızlı hata yakalama
-                h = tickers.tickers[sym].history(period=period, timeout=15)
-                if not h.empty:
-                    curr = h["Close"].iloc[-1]
-                    prev = h["Close"].iloc[-2] if len(h) > 1 else curr
-                    prices[sym] = {"curr": curr, "prev": prev}
-                else:
-                    prices[sym] = {"curr": 0, "prev": 0}
-            except Exception:
-                try:
-                    ticker = yf.Ticker(sym)
-                    h = ticker.history(period=period, timeout=15)
-                    if not h.empty:
-                        curr = h["Close"].iloc[-1]
-                        prev = h["Close"].iloc[-2] if len(h) > 1 else curr
-                        prices[sym] = {"curr": curr, "prev": prev}
-                    else:
-                        prices[sym] = {"curr": 0, "prev": 0}
-                except Exception:
-                    prices[sym] = {"curr": 0, "prev": 0}
-    except Exception:
-        for sym in symbols_list:
-            try:
-                ticker = yf.Ticker(sym)
-                h = ticker.history(period=period)
-                if not h.empty:
-                    curr = h["Close"].iloc[-1]
-                    prev = h["Close"].iloc[-2] if len(h) > 1 else curr
-                    prices[sym] = {"curr": curr, "prev": prev}
-                else:
-                    prices[sym] = {"curr": 0, "prev": 0}
-            except Exception:
-                prices[sym] = {"curr": 0, "prev": 0}
-    
-    return prices
-
 def _translate_sector(sector_en):
     """İngilizce sektör isimlerini Türkçe'ye çevirir"""
     sector_map = {
@@ -620,6 +464,49 @@ def _fetch_sector_info(symbols_list):
         pass
     return sectors
 
+def _get_fund_price(kod, maliyet):
+    """TEFAS fon fiyatını çeker ve şüpheli değerleri doğrular - (curr, prev) döndürür"""
+    # TEFAS fon fiyatını çek - kesinlikle TEFAS'tan, başka kaynaktan değil
+    try:
+        curr, prev = get_tefas_data(kod)
+    except Exception:
+        return 0, 0
+
+    # Fiyat validasyonu ve düzeltme
+    if curr == 0:
+        # TEFAS'tan fiyat çekilemedi - maliyet kullan
+        curr = maliyet if maliyet > 0 else 0
+        prev = curr
+    elif curr > 100:  # Çok yüksek fiyat - muhtemelen yanlış (TEFAS fonları genelde 0.01-50 TL arası)
+        # Şüpheli fiyat - cache'i temizle ve tekrar dene
+        try:
+            # Sadece bu fonun kaydını disk cache'ini atlayarak ağdan yenile
+            curr_new, prev_new = get_tefas_data.refresh(kod, force_refresh=True)
+            if curr_new > 0 and curr_new < 100:  # Makul aralıkta ise kullan
+                curr = curr_new
+                prev = prev_new
+            else:
+                # Hala sorun varsa maliyet kullan
+                curr = maliyet if maliyet > 0 else curr
+                prev = curr
+        except Exception:
+            # Hata olursa maliyet kullan
+            curr = maliyet if maliyet > 0 else curr
+            prev = curr
+    elif maliyet > 0 and curr > 0:
+        # Fiyat maliyetten çok farklıysa kontrol et
+        ratio = abs(curr - maliyet) / maliyet
+        if ratio > 10 and curr > 10:  # %1000'den fazla farklı VE yüksekse şüpheli
+            # Sadece bu fonun kaydını yenile ve tekrar dene
+            try:
+                curr_new, prev_new = get_tefas_data.refresh(kod, force_refresh=True)
+                if curr_new > 0 and curr_new < 100 and abs(curr_new - maliyet) / maliyet < 10:
+                    curr = curr_new
+                    prev = prev_new
+            except Exception:
+                pass
+    return curr, prev
+
 def run_analysis(df, usd_try_rate, view_currency):
     if df.empty:
         return pd.DataFrame(columns=ANALYSIS_COLS)
@@ -643,17 +530,20 @@ def run_analysis(df, usd_try_rate, view_currency):
     df_work["Adet"] = df_work["Adet"].apply(smart_parse)
     df_work["Maliyet"] = df_work["Maliyet"].apply(smart_parse)
     
-    # Symbol mapping
-    df_work["Symbol"] = df_work.apply(lambda row: get_yahoo_symbol(row["Kod"], row["Pazar"]), axis=1)
+    # Symbol mapping - benzersiz (Kod, Pazar) çiftleri üzerinden
+    pairs = df_work[["Kod", "Pazar"]].drop_duplicates()
+    symbol_lookup = pd.Series(
+        [get_yahoo_symbol(k, p) for k, p in pairs.itertuples(index=False)],
+        index=pd.MultiIndex.from_frame(pairs),
+    )
+    df_work["Symbol"] = symbol_lookup.reindex(pd.MultiIndex.from_frame(df_work[["Kod", "Pazar"]])).to_numpy()
     
     # Asset currency belirleme (vectorized)
-    df_work["AssetCurrency"] = df_work.apply(
-        lambda row: "TRY" if (
-            "BIST" in row["Pazar"] or "TL" in str(row["Kod"]) or 
-            "FON" in row["Pazar"] or "EMTIA" in row["Pazar"] or "NAKIT" in row["Pazar"]
-        ) else "USD",
-        axis=1
+    try_mask = (
+        df_work["Pazar"].str.contains("BIST|FON|EMTIA|NAKIT", na=False)
+        | df_work["Kod"].str.contains("TL", regex=False, na=False)
     )
+    df_work["AssetCurrency"] = np.where(try_mask, "TRY", "USD")
     
     # Sektör belirleme
     df_work["Sektör"] = ""
@@ -668,313 +558,115 @@ def run_analysis(df, usd_try_rate, view_currency):
         sector_info = _fetch_sector_info(sector_symbols)
         df_work.loc[bist_abd_mask, "Sektör"] = df_work[bist_abd_mask]["Symbol"].map(sector_info).fillna("Bilinmiyor")
     
-    # Fiyat verilerini batch olarak çek - varlık türüne göre ayrı cache
-    bist_abd_symbols = []
-    crypto_symbols = []
-    emtia_symbols = []
-    symbol_map = {}  # idx -> (symbol, asset_type) mapping
-    
-    for idx, row in df_work.iterrows():
-        kod = row["Kod"]
-        pazar = row["Pazar"]
-        symbol = row["Symbol"]
-        
-        if "NAKIT" in pazar.upper():
-            continue  # Nakitler özel işlenecek
-        elif "FON" in pazar:
-            continue  # Fonlar TEFAS'tan çekilecek, Yahoo Finance'ten değil
-        elif "Gram Gümüş" in kod or "GRAM GÜMÜŞ" in kod:
-            if "SI=F" not in emtia_symbols:
-                emtia_symbols.append("SI=F")
-            symbol_map[idx] = ("SI=F", "EMTIA")
-        elif "Gram Altın" in kod or "GRAM ALTIN" in kod or "22 Ayar" in kod or "22 AYAR" in kod:
-            if "GC=F" not in emtia_symbols:
-                emtia_symbols.append("GC=F")
-            symbol_map[idx] = ("GC=F", "EMTIA")
-        elif "KRIPTO" in pazar.upper():
-            if symbol not in crypto_symbols:
-                crypto_symbols.append(symbol)
-            symbol_map[idx] = (symbol, "KRIPTO")
-        elif "BIST" in pazar.upper() or "ABD" in pazar.upper():
-            if symbol not in bist_abd_symbols:
-                bist_abd_symbols.append(symbol)
-            symbol_map[idx] = (symbol, "BIST_ABD")
-        elif "EMTIA" in pazar.upper():
-            if symbol not in emtia_symbols:
-                emtia_symbols.append(symbol)
-            symbol_map[idx] = (symbol, "EMTIA")
-        else:
-            # Varsayılan olarak BIST/ABD gibi işle
-            if symbol not in bist_abd_symbols:
-                bist_abd_symbols.append(symbol)
-            symbol_map[idx] = (symbol, "BIST_ABD")
-    
-    # Varlık türüne göre farklı cache süreleri ile fiyat çekme
-    batch_prices = {}
-    
-    # BIST ve ABD: 5 dakika cache, borsa kapalıyken de çalışır
-    if bist_abd_symbols:
-        bist_abd_prices = _fetch_batch_prices_bist_abd(bist_abd_symbols, period="5d")
-        batch_prices.update(bist_abd_prices)
-    
-    # Kripto: 2 dakika cache
-    if crypto_symbols:
-        crypto_prices = _fetch_batch_prices_crypto(crypto_symbols, period="5d")
-        batch_prices.update(crypto_prices)
-    
-    # EMTIA: 5 dakika cache
-    gram_prices_5d = {}
-    if emtia_symbols:
-        emtia_prices = _fetch_batch_prices_emtia(emtia_symbols, period="5d")
-        batch_prices.update(emtia_prices)
-        # Gram altın/gümüş için özel mapping
-        if "SI=F" in emtia_prices:
-            gram_prices_5d["SI=F"] = emtia_prices["SI=F"]
-        if "GC=F" in emtia_prices:
-            gram_prices_5d["GC=F"] = emtia_prices["GC=F"]
-    
-    # EURTRY için özel - borsa kapalıyken de çalışması için period artır
-    eurtry_price = None
-    if (df_work["Pazar"].str.contains("NAKIT", case=False, na=False) & 
-        (df_work["Kod"] == "EUR")).any():
-        try:
-            ticker = yf.Ticker("EURTRY=X")
-            h = ticker.history(period="5d")
-            if not h.empty:
-                eurtry_price = h["Close"].iloc[-1]
-            else:
-                eurtry_price = 36.0
-        except Exception:
-            try:
-                # Fallback: daha uzun period dene
-                ticker = yf.Ticker("EURTRY=X")
-                h = ticker.history(period="1mo")
-                if not h.empty:
-                    eurtry_price = h["Close"].iloc[-1]
-                else:
-                    eurtry_price = 36.0
-            except Exception:
-                eurtry_price = 36.0
-    
-    # Fiyatları hesapla
-    results = []
-    for idx, row in df_work.iterrows():
-        kod = row["Kod"]
-        pazar = row["Pazar"]
-        tip = row["Tip"]
-        adet = row["Adet"]
-        maliyet = row["Maliyet"]
-        asset_currency = row["AssetCurrency"]
-        sector = row["Sektör"]
-        symbol = row["Symbol"]
-
-        curr, prev = 0, 0
-
-        try:
-            if "NAKIT" in pazar.upper():
-                if kod == "TL":
-                    curr = 1
-                elif kod == "USD":
-                    curr = usd_try_rate
-                elif kod == "EUR":
-                    curr = eurtry_price if eurtry_price else 36.0
-                prev = curr
-            elif "FON" in pazar:
-                # TEFAS fon fiyatını çek - kesinlikle TEFAS'tan, başka kaynaktan değil
-                curr, prev = get_tefas_data(kod)
-                
-                # Fiyat validasyonu ve düzeltme
-                if curr == 0:
-                    # TEFAS'tan fiyat çekilemedi - maliyet kullan
-                    curr = maliyet if maliyet > 0 else 0
-                    prev = curr
-                elif curr > 100:  # Çok yüksek fiyat - muhtemelen yanlış (TEFAS fonları genelde 0.01-50 TL arası)
-                    # Şüpheli fiyat - cache'i temizle ve tekrar dene
-                    try:
-                        # Bu fon için cache'i temizle
-                        get_tefas_data.clear()
-                        curr_new, prev_new = get_tefas_data(kod)
-                        if curr_new > 0 and curr_new < 100:  # Makul aralıkta ise kullan
-                            curr = curr_new
-                            prev = prev_new
-                        else:
-                            # Hala sorun varsa maliyet kullan
-                            curr = maliyet if maliyet > 0 else curr
-                            prev = curr
-                    except Exception:
-                        # Hata olursa maliyet kullan
-                        curr = maliyet if maliyet > 0 else curr
-                        prev = curr
-                elif maliyet > 0 and curr > 0:
-                    # Fiyat maliyetten çok farklıysa kontrol et
-                    ratio = abs(curr - maliyet) / maliyet
-                    if ratio > 10 and curr > 10:  # %1000'den fazla farklı VE yüksekse şüpheli
-                        # Cache'i temizle ve tekrar dene
-                        try:
-                            get_tefas_data.clear()
-                            curr_new, prev_new = get_tefas_data(kod)
-                            if curr_new > 0 and curr_new < 100 and abs(curr_new - maliyet) / maliyet < 10:
-                                curr = curr_new
-                                prev = prev_new
-                        except Exception:
-                            pass
-            elif "Gram Gümüş" in kod or "GRAM GÜMÜŞ" in kod:
-                if "SI=F" in gram_prices_5d:
-                    p_data = gram_prices_5d["SI=F"]
-                    curr = (p_data["curr"] * usd_try_rate) / 31.1035
-                    prev = (p_data["prev"] * usd_try_rate) / 31.1035
-            elif "22 Ayar" in kod or "22 AYAR" in kod:
-                # 22 ayar altın = 22/24 = 0.9167 (91.67% saf altın)
-                if "GC=F" in gram_prices_5d:
-                    p_data = gram_prices_5d["GC=F"]
-                    # Ons fiyatını grama çevir, sonra 22 ayar oranıyla çarp
-                    curr = ((p_data["curr"] * usd_try_rate) / 31.1035) * 0.9167
-                    prev = ((p_data["prev"] * usd_try_rate) / 31.1035) * 0.9167
-            elif "Gram Altın" in kod or "GRAM ALTIN" in kod:
-                # 24 ayar (saf) gram altın
-                if "GC=F" in gram_prices_5d:
-                    p_data = gram_prices_5d["GC=F"]
-                    curr = (p_data["curr"] * usd_try_rate) / 31.1035
-                    prev = (p_data["prev"] * usd_try_rate) / 31.1035
-            else:
-                if idx in symbol_map:
-                    sym_key, asset_type = symbol_map[idx]
-                    if sym_key in batch_prices:
-                        p_data = batch_prices[sym_key]
-                        curr = p_data["curr"]
-                        prev = p_data["prev"]
-                    else:
-                        # Batch'te yoksa, tek tek dene (borsa kapalıyken fallback)
-                        try:
-                            ticker = yf.Ticker(sym_key)
-                            h = ticker.history(period="5d")
-                            if not h.empty:
-                                curr = h["Close"].iloc[-1]
-                                prev = h["Close"].iloc[-2] if len(h) > 1 else curr
-                            else:
-                                # Daha uzun period dene
-                                h = ticker.history(period="1mo")
-                                if not h.empty:
-                                    curr = h["Close"].iloc[-1]
-                                    prev = h["Close"].iloc[-2] if len(h) > 1 else curr
-                                else:
-                                    curr = 0
-                                    prev = 0
-                        except Exception:
-                            curr = 0
-                            prev = 0
-                else:
-                    # Symbol map'te yoksa, direkt sembol ile dene
-                    try:
-                        ticker = yf.Ticker(symbol)
-                        h = ticker.history(period="5d")
-                        if not h.empty:
-                            curr = h["Close"].iloc[-1]
-                            prev = h["Close"].iloc[-2] if len(h) > 1 else curr
-                        else:
-                            # Daha uzun period dene
-                            h = ticker.history(period="1mo")
-                            if not h.empty:
-                                curr = h["Close"].iloc[-1]
-                                prev = h["Close"].iloc[-2] if len(h) > 1 else curr
-                            else:
-                                curr = 0
-                                prev = 0
-                    except Exception:
-                        curr = 0
-                        prev = 0
-        except Exception:
-            pass
+    # Varlık sınıflandırma maskeleri
+    pazar_upper = df_work["Pazar"].str.upper()
+    nakit_mask = pazar_upper.str.contains("NAKIT", na=False)
+    fon_mask = df_work["Pazar"].str.contains("FON", na=False) & ~nakit_mask
+    gram_keys = derived_keys(df_work["Kod"])
+    gram_mask = (gram_keys != "") & ~nakit_mask & ~fon_mask
+
+    # Fiyat sembolü: gram altın/gümüş türetilmiş enstrüman anahtarıyla okunur, nakit ve fonlar Yahoo'dan çekilmez
+    df_work["PriceSymbol"] = df_work["Symbol"]
+    df_work.loc[gram_mask, "PriceSymbol"] = gram_keys[gram_mask]
+    df_work.loc[nakit_mask | fon_mask, "PriceSymbol"] = ""
+
+    # Tüm varlık sınıfları tek toplu istekte - TTL politikası price_engine'de
+    price_symbols = df_work.loc[~gram_mask, "PriceSymbol"].unique().tolist()
+    if gram_mask.any():
+        price_symbols += base_symbols(gram_keys[gram_mask].unique(), include_fx=False)
+    eur_mask = nakit_mask & (df_work["Kod"] == "EUR")
+    if eur_mask.any():
+        price_symbols.append("EURTRY=X")
+    prices = get_quote_frame(price_symbols)
+    # Gram enstrümanlarının TRY curr/prev'i aynı panodan türetilir
+    prices = pd.concat([prices, derived_quotes(prices, usd_try_rate)])
+
+    yahoo_curr = df_work["PriceSymbol"].map(prices["curr"]).fillna(0.0).to_numpy(dtype=float)
+    yahoo_prev = df_work["PriceSymbol"].map(prices["prev"]).fillna(0.0).to_numpy(dtype=float)
+
+    eurtry_price = 36.0
+    if "EURTRY=X" in prices.index and prices.at["EURTRY=X", "curr"] > 0:
+        eurtry_price = float(prices.at["EURTRY=X", "curr"])
+
+    adet = df_work["Adet"].to_numpy(dtype=float)
+    maliyet = df_work["Maliyet"].to_numpy(dtype=float)
+
+    # Nakit: TL=1, USD/EUR kur ile
+    cash_price = np.select(
+        [df_work["Kod"] == "TL", df_work["Kod"] == "USD", df_work["Kod"] == "EUR"],
+        [1.0, float(usd_try_rate), eurtry_price],
+        default=0.0,
+    )
 
-        # Eğer hala fiyat yoksa, maliyet kullan (ama önce bir daha dene)
-        if curr == 0:
-            # Son bir deneme - daha uzun period ile
-            try:
-                if symbol and symbol not in ["TL", "USD", "EUR"]:
-                    ticker = yf.Ticker(symbol)
-                    h = ticker.history(period="1mo")
-                    if not h.empty:
-                        curr = h["Close"].iloc[-1]
-                        prev = h["Close"].iloc[-2] if len(h) > 1 else curr
-                    else:
-                        curr = maliyet
-                        prev = maliyet
-                else:
-                    curr = maliyet
-                    prev = maliyet
-            except Exception:
-                curr = maliyet
-                prev = maliyet
-        
-        if prev == 0:
-            prev = curr
-        if curr > 0 and maliyet > 0 and (maliyet / curr) > 50:
-            maliyet /= 100
-
-        val_native = curr * adet
-        cost_native = maliyet * adet
-        daily_chg_native = (curr - prev) * adet
-
-        if view_currency == "TRY":
-            if asset_currency == "USD":
-                f_g = curr * usd_try_rate
-                v_g = val_native * usd_try_rate
-                c_g = cost_native * usd_try_rate
-                d_g = daily_chg_native * usd_try_rate
-            else:
-                f_g = curr
-                v_g = val_native
-                c_g = cost_native
-                d_g = daily_chg_native
-        else:  # USD
-            if asset_currency == "TRY":
-                f_g = curr / usd_try_rate
-                v_g = val_native / usd_try_rate
-                c_g = cost_native / usd_try_rate
-                d_g = daily_chg_native / usd_try_rate
-            else:
-                f_g = curr
-                v_g = val_native
-                c_g = cost_native
-                d_g = daily_chg_native
+    # Fonlar: fon başına bir kez TEFAS (get_tefas_data cache'li)
+    fund_curr = np.zeros(len(df_work))
+    fund_prev = np.zeros(len(df_work))
+    if fon_mask.any():
+        fund_keys = df_work.loc[fon_mask, ["Kod", "Maliyet"]]
+        # Tüm fonları eşzamanlı ısıt - ardından _get_fund_price cache'ten okur
+        get_tefas_prices(fund_keys["Kod"].unique().tolist())
+        fund_prices = pd.DataFrame(
+            [_get_fund_price(k, m) for k, m in fund_keys.drop_duplicates().itertuples(index=False)],
+            index=pd.MultiIndex.from_frame(fund_keys.drop_duplicates()),
+            columns=["curr", "prev"],
+        ).reindex(pd.MultiIndex.from_frame(fund_keys))
+        fon_idx = fon_mask.to_numpy()
+        fund_curr[fon_idx] = fund_prices["curr"].to_numpy(dtype=float)
+        fund_prev[fon_idx] = fund_prices["prev"].to_numpy(dtype=float)
+
+    conditions = [nakit_mask.to_numpy(), fon_mask.to_numpy()]
+    curr = np.select(conditions, [cash_price, fund_curr], default=yahoo_curr)
+    prev = np.select(conditions, [cash_price, fund_prev], default=yahoo_prev)
+
+    # Fiyat yoksa maliyet kullan (toplu istekte uzun period zaten denendi)
+    no_price = curr == 0
+    curr = np.where(no_price, maliyet, curr)
+    prev = np.where(no_price, maliyet, prev)
+    prev = np.where(prev == 0, curr, prev)
+
+    # Maliyet kuruş cinsinden girilmişse düzelt
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kurus_mask = (curr > 0) & (maliyet > 0) & (maliyet / curr > 50)
+    maliyet = np.where(kurus_mask, maliyet / 100, maliyet)
+
+    # Görünüm para birimine çevrim katsayısı
+    usd_asset = (df_work["AssetCurrency"] == "USD").to_numpy()
+    if view_currency == "TRY":
+        fx = np.where(usd_asset, float(usd_try_rate), 1.0)
+    else:
+        fx = np.where(usd_asset, 1.0, 1.0 / float(usd_try_rate))
 
-        pnl = v_g - c_g
-        pnl_pct = (pnl / c_g * 100) if c_g > 0 else 0
+    f_g = curr * fx
+    prev_g = prev * fx
+    v_g = curr * adet * fx
+    c_g = maliyet * adet * fx
+    d_g = (curr - prev) * adet * fx
+    pnl = v_g - c_g
 
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pnl_pct = np.where(c_g > 0, pnl / c_g * 100, 0.0)
         # Günlük fiyat değişimi yüzdesi (izleme listesi için)
-        # prev ve curr'ü view_currency'ye çevir
-        if view_currency == "TRY":
-            if asset_currency == "USD":
-                prev_g = prev * usd_try_rate
-            else:
-                prev_g = prev
-        else:  # USD
-            if asset_currency == "TRY":
-                prev_g = prev / usd_try_rate
-            else:
-                prev_g = prev
-        
-        daily_pct_change = ((f_g - prev_g) / prev_g * 100) if prev_g > 0 else 0
-        
-        results.append({
-                "Kod": kod,
-                "Pazar": pazar,
-                "Tip": tip,
-                "Adet": adet,
-                "Maliyet": maliyet,
-                "Fiyat": f_g,
-            "PB": view_currency,
-                "Yatırılan": c_g,  # Yatırılan para = Adet * Maliyet (view_currency'de)
-                "Değer": v_g,
-                "Top. Kâr/Zarar": pnl,
-                "Top. %": pnl_pct,
-                "Gün. Kâr/Zarar": d_g,
-            "Günlük Değişim %": daily_pct_change,  # İzleme listesi için
-                "Notlar": row.get("Notlar", ""),
-                "Sektör": sector,
-        })
-
-    return pd.DataFrame(results)
+        daily_pct_change = np.where(prev_g > 0, (f_g - prev_g) / prev_g * 100, 0.0)
+
+    notlar = df_work["Notlar"] if "Notlar" in df_work.columns else ""
+
+    return pd.DataFrame({
+        "Kod": df_work["Kod"],
+        "Pazar": df_work["Pazar"],
+        "Tip": df_work["Tip"],
+        "Adet": adet,
+        "Maliyet": maliyet,
+        "Fiyat": f_g,
+        "PB": view_currency,
+        "Yatırılan": c_g,  # Yatırılan para = Adet * Maliyet (view_currency'de)
+        "Değer": v_g,
+        "Top. Kâr/Zarar": pnl,
+        "Top. %": pnl_pct,
+        "Gün. Kâr/Zarar": d_g,
+        "Günlük Değişim %": daily_pct_change,  # İzleme listesi için
+        "Notlar": notlar,
+        "Sektör": df_work["Sektör"],
+    }).reset_index(drop=True)
 
 
 # Session state ile önceki sonucu sakla - sekme değişimlerinde boş görünmesini önle
@@ -1017,6 +709,45 @@ def get_pnl_indicator(pct_value):
         return '<span style="color: #888; font-size: 16px;">⚪</span>'
 
 # --- GLOBAL INFO BAR ---
+def _index_daily_base_prices(daily_base_prices):
+    """
+    00:30 baz fiyatlarını Kod index'li (Fiyat, PB) tablosuna çevirir - her Kod için ilk kayıt.
+    Zaten index'li tablo verilirse olduğu gibi döner.
+    """
+    if daily_base_prices is None or daily_base_prices.empty:
+        return None
+    if "Kod" not in daily_base_prices.columns:
+        return daily_base_prices
+    base = daily_base_prices.drop_duplicates("Kod", keep="first")
+    pb = base["PB"] if "PB" in base.columns else pd.Series("TRY", index=base.index)
+    return pd.DataFrame(
+        {
+            "Fiyat": pd.to_numeric(base["Fiyat"], errors="coerce").to_numpy(),
+            "PB": pb.fillna("TRY").astype(str).to_numpy(),
+        },
+        index=pd.Index(base["Kod"].astype(str), name="Kod"),
+    )
+
+
+def _daily_base_values(df, daily_base_prices, usd_try_rate, gorunum_pb):
+    """
+    Her satırın 00:30 baz değerini (Adet * baz fiyat, görünüm para biriminde) tek bir
+    Kod join'i ile hesaplar. Baz fiyatı olmayan satırlar NaN döner.
+    """
+    base = _index_daily_base_prices(daily_base_prices)
+    if base is None or not usd_try_rate or df.empty:
+        return pd.Series(np.nan, index=df.index)
+    matched = base.reindex(df["Kod"].astype(str))
+    base_price = matched["Fiyat"].to_numpy(dtype=float)
+    base_pb = matched["PB"].fillna("TRY").to_numpy()
+    adet = pd.to_numeric(df["Adet"], errors="coerce").fillna(0.0).to_numpy(dtype=float) if "Adet" in df.columns else np.zeros(len(df))
+    if gorunum_pb == "TRY":
+        fx = np.where(base_pb == "USD", usd_try_rate, 1.0)
+    else:
+        fx = np.where(base_pb == "USD", 1.0, 1.0 / usd_try_rate)
+    return pd.Series(base_price * adet * fx, index=df.index)
+
+
 def render_kral_infobar(df, sym, gorunum_pb=None, usd_try_rate=None, timeframe=None, show_sparklines=False, daily_base_prices=None):
     """
     KRAL infobar:
@@ -1033,35 +764,10 @@ def render_kral_infobar(df, sym, gorunum_pb=None, usd_try_rate=None, timeframe=N
     
     # Günlük K/Z hesaplama - 00:30 baz fiyatlarını kullan
     if daily_base_prices is not None and not daily_base_prices.empty:
-        # Baz fiyatlardan günlük K/Z hesapla
-        daily_pnl = 0.0
-        for _, row in df.iterrows():
-            kod = row["Kod"]
-            current_value = row["Değer"]
-            adet = row.get("Adet", 0)
-            
-            # Baz fiyatı bul
-            base_row = daily_base_prices[daily_base_prices["Kod"] == kod]
-            if not base_row.empty:
-                base_price = float(base_row.iloc[0]["Fiyat"])
-                
-                # Para birimi dönüşümü
-                pb = row.get("PB", "TRY")
-                if gorunum_pb == "TRY":
-                    if pb == "USD":
-                        base_value = base_price * adet * usd_try_rate
-                    else:
-                        base_value = base_price * adet
-                else:  # USD
-                    if pb == "TRY":
-                        base_value = base_price * adet / usd_try_rate
-                    else:
-                        base_value = base_price * adet
-                
-                daily_pnl += (current_value - base_value)
-            else:
-                # Baz fiyat yoksa, eski yöntemi kullan (önceki günün kapanışı)
-                daily_pnl += row.get("Gün. Kâr/Zarar", 0)
+        # Baz fiyatı olanlar bazdan, olmayanlar önceki günün kapanışından (eski yöntem)
+        base_value = _daily_base_values(df, daily_base_prices, usd_try_rate, gorunum_pb)
+        has_base = base_value.notna()
+        daily_pnl = float((df["Değer"] - base_value)[has_base].sum()) + float(df.loc[~has_base, "Gün. Kâr/Zarar"].sum())
     else:
         # Baz fiyatlar yoksa, eski yöntemi kullan
         daily_pnl = df["Gün. Kâr/Zarar"].sum()
@@ -1240,6 +946,30 @@ def render_kpi_sparkline(values):
     return fig
 
 
+def _timeframe_with_price_history(timeframe, df, portfolio_df):
+    """
+    Loglanmış tarihçe sparkline için yetersizse (yeni profil/sekme), Haftalık/Aylık/YTD
+    KPI'larını mevcut varlıkların fiyat geçmişinden (portfolio_timeseries) türetir.
+    Fiyat matrisi tüm portföy (portfolio_df) için render başına bir kez kurulur (cache'li);
+    Dashboard ve pazar sekmeleri aynı matristen kendi enstrümanlarını toplar.
+    """
+    if timeframe and (timeframe.get("spark_week") or timeframe.get("spark_month")):
+        return timeframe
+    if df is None or df.empty:
+        return timeframe
+    try:
+        year_start = pd.Timestamp(datetime.now().year, 1, 1)
+        keys = tuple(holding_keys(df))
+        # Sadece pozisyon kolonları - canlı fiyat kolonları cache anahtarını her render değiştirmesin
+        holdings_df = portfolio_df[["Kod", "Pazar", "Adet"]].reset_index(drop=True)
+        simulated = get_timeframe_changes(
+            portfolio_history_frame(holdings_df, start_date=year_start, keys=keys)
+        )
+    except Exception:
+        return timeframe
+    return simulated or timeframe
+
+
 def _compute_daily_pct(df, daily_base_prices=None, usd_try_rate=None, gorunum_pb=None):
     """
     Günlük yüzde değişimi hesaplar.
@@ -1262,50 +992,28 @@ def _compute_daily_pct(df, daily_base_prices=None, usd_try_rate=None, gorunum_pb
     work = df.copy()
     work["Günlük %"] = 0.0
     
-    # Baz fiyatlar varsa, bunları kullanarak günlük değişim hesapla
+    safe_val = work["Değer"] - work["Gün. Kâr/Zarar"]
+    fallback = pd.Series(True, index=work.index)
+    
+    # Baz fiyatlar varsa, bunları kullanarak günlük değişim hesapla (tek vectorized join)
     if daily_base_prices is not None and not daily_base_prices.empty and usd_try_rate is not None and gorunum_pb is not None:
-        for idx, row in work.iterrows():
-            kod = row["Kod"]
-            current_value = row["Değer"]
-            adet = row.get("Adet", 0)
-            
-            # Baz fiyatı bul
-            base_row = daily_base_prices[daily_base_prices["Kod"] == kod]
-            if not base_row.empty and adet > 0:
-                base_price = float(base_row.iloc[0]["Fiyat"])
-                base_pb = base_row.iloc[0].get("PB", "TRY")
-                
-                # Para birimi dönüşümü
-                pb = row.get("PB", "TRY")
-                if gorunum_pb == "TRY":
-                    if base_pb == "USD":
-                        base_value = base_price * adet * usd_try_rate
-                    else:
-                        base_value = base_price * adet
-                else:  # USD
-                    if base_pb == "TRY":
-                        base_value = base_price * adet / usd_try_rate
-                    else:
-                        base_value = base_price * adet
-                
-                # Günlük değişim yüzdesi (00:30 baz fiyatına göre)
-                if base_value > 0:
-                    work.at[idx, "Günlük %"] = ((current_value - base_value) / base_value) * 100
-                    # Günlük K/Z'ı da güncelle (00:30 bazında)
-                    work.at[idx, "Gün. Kâr/Zarar"] = current_value - base_value
-            else:
-                # Baz fiyat bulunamazsa, eski yöntemi kullan
-                safe_val = current_value - row["Gün. Kâr/Zarar"]
-                if safe_val != 0:
-                    work.at[idx, "Günlük %"] = (row["Gün. Kâr/Zarar"] / safe_val) * 100
-    else:
-        # Baz fiyatlar yoksa, eski yöntemi kullan
-        safe_val = work["Değer"] - work["Gün. Kâr/Zarar"]
-        non_zero = safe_val.notna() & (safe_val != 0)
-        if non_zero.any():
-            work.loc[non_zero, "Günlük %"] = (
-                work.loc[non_zero, "Gün. Kâr/Zarar"] / safe_val[non_zero]
-            ) * 100
+        base_value = _daily_base_values(work, daily_base_prices, usd_try_rate, gorunum_pb)
+        adet = pd.to_numeric(work["Adet"], errors="coerce").fillna(0.0) if "Adet" in work.columns else pd.Series(0.0, index=work.index)
+        has_base = base_value.notna() & (adet > 0)
+        use_base = has_base & (base_value > 0)
+        diff = work["Değer"] - base_value
+        # Günlük değişim yüzdesi ve K/Z (00:30 baz fiyatına göre)
+        work.loc[use_base, "Günlük %"] = diff[use_base] / base_value[use_base] * 100
+        work.loc[use_base, "Gün. Kâr/Zarar"] = diff[use_base]
+        # Baz fiyat bulunamazsa, eski yöntemi kullan
+        fallback = ~has_base
+    
+    # Eski yöntem: önceki günün kapanış fiyatına göre
+    non_zero = fallback & safe_val.notna() & (safe_val != 0)
+    if non_zero.any():
+        work.loc[non_zero, "Günlük %"] = (
+            work.loc[non_zero, "Gün. Kâr/Zarar"] / safe_val[non_zero]
+        ) * 100
     
     work["Günlük %"] = work["Günlük %"].fillna(0.0)
     return work
@@ -1554,6 +1262,36 @@ st.markdown("---")
 
 # --- MENÜ İÇERİKLERİ ---
 
+def _log_market_histories(df):
+    """BIST/ABD/FON/EMTIA/NAKIT toplamlarını günlük history sheet'lerine tek batch'te yazar."""
+    if df.empty:
+        return
+    writers = {
+        "BIST": write_history_bist,
+        "ABD": write_history_abd,
+        "FON": write_history_fon,
+        "EMTIA": write_history_emtia,
+        "NAKIT": write_history_nakit,
+    }
+    pazar_str = df["Pazar"].astype(str)
+    with history_write_batch():
+        for pazar, writer in writers.items():
+            market_df = df[pazar_str.str.contains(pazar, case=False, na=False)]
+            if market_df.empty:
+                continue
+            try:
+                t_v = float(market_df["Değer"].sum())
+                if GORUNUM_PB == "TRY":
+                    total_try = t_v
+                    total_usd = t_v / USD_TRY if USD_TRY else 0.0
+                else:
+                    total_usd = t_v
+                    total_try = t_v * USD_TRY
+                writer(total_try, total_usd)
+            except Exception:
+                pass
+
+
 if selected == "Dashboard":
     if not portfoy_only.empty:
         # Dashboard genel portföy görünümü
@@ -1575,9 +1313,6 @@ if selected == "Dashboard":
                 total_usd = float(t_v)
                 total_try = float(t_v * USD_TRY)
 
-            # Günlük portföy logunu yaz (aynı günse data_loader içinde atlanıyor)
-            write_portfolio_history(total_try, total_usd)
-
             # Fon toplamını ayrıca logla (haftalık/aylık hesaplardan düşebilmek için)
             fon_mask = spot_only["Pazar"].astype(str).str.contains("FON", case=False, na=False)
             fon_total_view = float(spot_only.loc[fon_mask, "Değer"].sum()) if fon_mask.any() else 0.0
@@ -1587,7 +1322,11 @@ if selected == "Dashboard":
             else:
                 fon_usd = fon_total_view
                 fon_try = fon_total_view * USD_TRY
-            write_history_fon(fon_try, fon_usd)
+
+            # Günlük logları tek istekte yaz (aynı günse data_loader içinde atlanıyor)
+            with history_write_batch():
+                write_portfolio_history(total_try, total_usd)
+                write_history_fon(fon_try, fon_usd)
 
             history_df = read_portfolio_history()
             history_fon = read_history_fon()
@@ -1606,7 +1345,8 @@ if selected == "Dashboard":
         # Günlük baz fiyatları al (00:30'da kaydedilen)
         daily_base_prices = None
         try:
-            daily_base_prices = get_daily_base_prices()
+            # Kod index'li tabloya bir kez çevir - infobar, hareket edenler ve ısı haritası aynı index'i kullanır
+            daily_base_prices = _index_daily_base_prices(get_daily_base_prices())
             
             # 00:30'dan sonraysa ve henüz bugün için kayıt yoksa, baz fiyatları güncelle
             current_prices_for_base = spot_only[["Kod", "Fiyat", "PB"]].copy()
@@ -1617,21 +1357,9 @@ if selected == "Dashboard":
         # ⚠️ ANORMAL GÜNLÜK K/Z UYARISI (Güvenlik Önlemi)
         # Eğer günlük K/Z portföyün %15'inden fazla düşüş gösteriyorsa uyar
         if daily_base_prices is not None and not daily_base_prices.empty:
-            daily_pnl_check = 0.0
-            for _, row in spot_only.iterrows():
-                kod = row["Kod"]
-                current_value = row["Değer"]
-                adet = row.get("Adet", 0)
-                base_row = daily_base_prices[daily_base_prices["Kod"] == kod]
-                if not base_row.empty and adet > 0:
-                    base_price = float(base_row.iloc[0]["Fiyat"])
-                    pb = row.get("PB", "TRY")
-                    base_pb = base_row.iloc[0].get("PB", "TRY")
-                    if GORUNUM_PB == "TRY":
-                        base_value = base_price * adet * (USD_TRY if base_pb == "USD" else 1)
-                    else:
-                        base_value = base_price * adet * (1 if base_pb == "USD" else 1/USD_TRY)
-                    daily_pnl_check += (current_value - base_value)
+            base_value = _daily_base_values(spot_only, daily_base_prices, USD_TRY, GORUNUM_PB)
+            base_mask = base_value.notna() & (pd.to_numeric(spot_only["Adet"], errors="coerce").fillna(0.0) > 0)
+            daily_pnl_check = float((spot_only["Değer"] - base_value)[base_mask].sum())
             
             # Portföy değerinin %15'inden fazla düşüş varsa uyar
             portfolio_value = spot_only["Değer"].sum()
@@ -1660,7 +1388,7 @@ if selected == "Dashboard":
             sym,
             gorunum_pb=GORUNUM_PB,
             usd_try_rate=USD_TRY,
-            timeframe=kpi_timeframe,
+            timeframe=_timeframe_with_price_history(kpi_timeframe, spot_only, portfoy_only),
             show_sparklines=True,
             daily_base_prices=daily_base_prices,
         )
@@ -1976,6 +1704,9 @@ elif selected == "Portföy":
         ["Tümü", "BIST", "ABD", "FON", "Emtia", "Kripto", "Nakit"]
     )
 
+    # Pazar bazlı günlük logları sekmelerden önce tek istekte yaz
+    _log_market_histories(portfoy_only)
+
     # Tümü
     with tab_tumu:
         render_kral_infobar(portfoy_only, sym)
@@ -2024,15 +1755,6 @@ elif selected == "Portföy":
         timeframe_bist = None
         if not bist_df.empty:
             try:
-                t_v = float(bist_df["Değer"].sum())
-                if GORUNUM_PB == "TRY":
-                    total_try = t_v
-                    total_usd = t_v / USD_TRY if USD_TRY else 0.0
-                else:
-                    total_usd = t_v
-                    total_try = t_v * USD_TRY
-
-                write_history_bist(total_try, total_usd)
                 hist_bist = read_history_bist()
                 timeframe_bist = get_timeframe_changes(hist_bist)
             except Exception:
@@ -2043,7 +1765,7 @@ elif selected == "Portföy":
             sym,
             gorunum_pb=GORUNUM_PB,
             usd_try_rate=USD_TRY,
-            timeframe=timeframe_bist,
+            timeframe=_timeframe_with_price_history(timeframe_bist, bist_df, portfoy_only),
             show_sparklines=True,
         )
 
@@ -2120,15 +1842,6 @@ elif selected == "Portföy":
         timeframe_abd = None
         if not abd_df.empty:
             try:
-                t_v = float(abd_df["Değer"].sum())
-                if GORUNUM_PB == "TRY":
-                    total_try = t_v
-                    total_usd = t_v / USD_TRY if USD_TRY else 0.0
-                else:
-                    total_usd = t_v
-                    total_try = t_v * USD_TRY
-
-                write_history_abd(total_try, total_usd)
                 hist_abd = read_history_abd()
                 timeframe_abd = get_timeframe_changes(hist_abd)
             except Exception:
@@ -2139,7 +1852,7 @@ elif selected == "Portföy":
             sym,
             gorunum_pb=GORUNUM_PB,
             usd_try_rate=USD_TRY,
-            timeframe=timeframe_abd,
+            timeframe=_timeframe_with_price_history(timeframe_abd, abd_df, portfoy_only),
             show_sparklines=True,
         )
 
@@ -2216,15 +1929,6 @@ elif selected == "Portföy":
         timeframe_fon = None
         if not fon_df.empty:
             try:
-                t_v = float(fon_df["Değer"].sum())
-                if GORUNUM_PB == "TRY":
-                    total_try = t_v
-                    total_usd = t_v / USD_TRY if USD_TRY else 0.0
-                else:
-                    total_usd = t_v
-                    total_try = t_v * USD_TRY
-
-                write_history_fon(total_try, total_usd)
                 hist_fon = read_history_fon()
                 timeframe_fon = get_timeframe_changes(hist_fon)
             except Exception:
@@ -2235,7 +1939,7 @@ elif selected == "Portföy":
             sym,
             gorunum_pb=GORUNUM_PB,
             usd_try_rate=USD_TRY,
-            timeframe=timeframe_fon,
+            timeframe=_timeframe_with_price_history(timeframe_fon, fon_df, portfoy_only),
             show_sparklines=True,
         )
 
@@ -2283,15 +1987,6 @@ elif selected == "Portföy":
         timeframe_emtia = None
         if not emtia_df.empty:
             try:
-                t_v = float(emtia_df["Değer"].sum())
-                if GORUNUM_PB == "TRY":
-                    total_try = t_v
-                    total_usd = t_v / USD_TRY if USD_TRY else 0.0
-                else:
-                    total_usd = t_v
-                    total_try = t_v * USD_TRY
-
-                write_history_emtia(total_try, total_usd)
                 hist_emtia = read_history_emtia()
                 timeframe_emtia = get_timeframe_changes(hist_emtia)
             except Exception:
@@ -2302,7 +1997,7 @@ elif selected == "Portföy":
             sym,
             gorunum_pb=GORUNUM_PB,
             usd_try_rate=USD_TRY,
-            timeframe=timeframe_emtia,
+            timeframe=_timeframe_with_price_history(timeframe_emtia, emtia_df, portfoy_only),
             show_sparklines=True,
         )
 
@@ -2390,15 +2085,6 @@ elif selected == "Portföy":
         timeframe_nakit = None
         if not nakit_df.empty:
             try:
-                t_v = float(nakit_df["Değer"].sum())
-                if GORUNUM_PB == "TRY":
-                    total_try = t_v
-                    total_usd = t_v / USD_TRY if USD_TRY else 0.0
-                else:
-                    total_usd = t_v
-                    total_try = t_v * USD_TRY
-
-                write_history_nakit(total_try, total_usd)
                 hist_nakit = read_history_nakit()
                 timeframe_nakit = get_timeframe_changes(hist_nakit)
             except Exception:
@@ -2409,7 +2095,7 @@ elif selected == "Portföy":
             sym,
             gorunum_pb=GORUNUM_PB,
             usd_try_rate=USD_TRY,
-            timeframe=timeframe_nakit,
+            timeframe=_timeframe_with_price_history(timeframe_nakit, nakit_df, portfoy_only),
             show_sparklines=True,
         )
 
@@ -2580,11 +2266,9 @@ elif selected == "İzleme":
                     # portfoy_df'den bu kodu ve Tip="Takip" olan satırı sil
                     kod = row['Kod']
                     portfoy_df = portfoy_df[~((portfoy_df["Kod"] == kod) & (portfoy_df["Tip"] == "Takip"))]
-                    # Get current profile explicitly before saving
-                    current_profile = get_current_profile()
-                    save_data_to_sheet(portfoy_df, profile_name=current_profile)
-                    st.success(f"{kod} izleme listesinden silindi!")
-                    time.sleep(1)
+                    # Yerel kopyaya hemen uygulanır, Sheets'e arka planda yazılır
+                    queue_portfolio_save(portfoy_df, profile_name=get_current_profile())
+                    _flash(f"{kod} izleme listesinden silindi!")
                     st.rerun()
     else:
         st.info("İzleme listesi boş. Varlık eklemek için 'Ekle/Çıkar' sekmesine gidin.")
@@ -2808,16 +2492,14 @@ elif selected == "Ekle/Çıkar":
                     }
                 )
                 portfoy_df = pd.concat([portfoy_df, new_row], ignore_index=True)
-                # Get current profile explicitly before saving
-                current_profile = get_current_profile()
-                save_data_to_sheet(portfoy_df, profile_name=current_profile)
+                # Yerel kopyaya hemen uygulanır, Sheets'e arka planda yazılır
+                queue_portfolio_save(portfoy_df, profile_name=get_current_profile())
 
-                st.success(
+                _flash(
                     "İzleme listesine eklendi!"
                     if is_takip
                     else "Portföye eklendi!"
                 )
-                time.sleep(1)
                 st.rerun()
 
 
@@ -2844,11 +2526,9 @@ elif selected == "Ekle/Çıkar":
                     portfoy_df = pd.concat(
                         [portfoy_df, new_row], ignore_index=True
                     )
-                    # Get current profile explicitly before saving
-                    current_profile = get_current_profile()
-                    save_data_to_sheet(portfoy_df, profile_name=current_profile)
-                    st.success("Güncellendi!")
-                    time.sleep(1)
+                    # Yerel kopyaya hemen uygulanır, Sheets'e arka planda yazılır
+                    queue_portfolio_save(portfoy_df, profile_name=get_current_profile())
+                    _flash("Güncellendi!")
                     st.rerun()
 
     # SİL / SAT
@@ -2866,11 +2546,9 @@ elif selected == "Ekle/Çıkar":
                 s = st.selectbox("Silinecek Kod", portfoy_df["Kod"].unique(), key="del")
                 if st.button("🗑️ Sil"):
                     portfoy_df = portfoy_df[portfoy_df["Kod"] != s]
-                    # Get current profile explicitly before saving
-                    current_profile = get_current_profile()
-                    save_data_to_sheet(portfoy_df, profile_name=current_profile)
-                    st.success("Silindi!")
-                    time.sleep(1)
+                    # Yerel kopyaya hemen uygulanır, Sheets'e arka planda yazılır
+                    queue_portfolio_save(portfoy_df, profile_name=get_current_profile())
+                    _flash("Silindi!")
                     st.rerun()
 
             else:  # Satış Kaydı
@@ -2903,20 +2581,6 @@ elif selected == "Ekle/Çıkar":
                         maliyet_tutar = sat_adet * birim_maliyet
                         kar_zarar = toplam_satis - maliyet_tutar
 
-                        # Satış kaydını Sheets'e yaz
-                        # Get current profile explicitly before saving
-                        current_profile = get_current_profile()
-                        add_sale_record(
-                            datetime.now().date(),
-                            kod_sec,
-                            pazar,
-                            sat_adet,
-                            satis_fiyat,
-                            maliyet_tutar,
-                            kar_zarar,
-                            profile_name=current_profile,
-                        )
-
                         # Portföyde adeti güncelle / sıfırsa satır sil
                         kalan_adet = mevcut_adet - sat_adet
                         if kalan_adet <= 0:
@@ -2926,16 +2590,25 @@ elif selected == "Ekle/Çıkar":
                                 portfoy_df["Kod"] == kod_sec, "Adet"
                             ] = kalan_adet
 
+                        # Satış kaydı + pozisyon güncellemesi tek atomik Sheets isteğinde
                         # Get current profile explicitly before saving
                         current_profile = get_current_profile()
-                        save_data_to_sheet(portfoy_df, profile_name=current_profile)
-
-                        st.success(
-                            f"Satış kaydedildi. Toplam satış: {toplam_satis:,.2f}, "
-                            f"Maliyet: {maliyet_tutar:,.2f}, Kâr/Zarar: {kar_zarar:,.2f}"
-                        )
-                        time.sleep(1)
-                        st.rerun()
+                        if record_sale(
+                            portfoy_df,
+                            datetime.now().date(),
+                            kod_sec,
+                            pazar,
+                            sat_adet,
+                            satis_fiyat,
+                            maliyet_tutar,
+                            kar_zarar,
+                            profile_name=current_profile,
+                        ):
+                            _flash(
+                                f"Satış kaydedildi. Toplam satış: {toplam_satis:,.2f}, "
+                                f"Maliyet: {maliyet_tutar:,.2f}, Kâr/Zarar: {kar_zarar:,.2f}"
+                            )
+                            st.rerun()
 
 
 elif selected == "Profil Yönetimi":
@@ -3029,7 +2702,7 @@ elif selected == "Profil Yönetimi":
                     }
                     
                     if save_profile_to_sheets(profile_data):
-                        st.success(f"✅ '{display_name}' profili başarıyla eklendi!")
+                        _flash(f"✅ '{display_name}' profili başarıyla eklendi!")
                         
                         # Create worksheet for the profile if not aggregate
                         if not is_aggregate:
@@ -3051,11 +2724,10 @@ elif selected == "Profil Yönetimi":
                                         )
                                         headers = ["Kod", "Pazar", "Adet", "Maliyet", "Tip", "Notlar"]
                                         ws.append_row(headers)
-                                        st.info(f"📄 '{profile_name}' için worksheet oluşturuldu.")
+                                        _flash(f"📄 '{profile_name}' için worksheet oluşturuldu.", "info")
                             except Exception as e:
-                                st.warning(f"⚠️ Worksheet oluşturulamadı: {str(e)}")
+                                _flash(f"⚠️ Worksheet oluşturulamadı: {str(e)}", "warning")
                         
-                        time.sleep(1.5)
                         st.rerun()
                     else:
                         st.error("❌ Profil kaydedilemedi. Google Sheets bağlantısını kontrol edin.")
@@ -3128,8 +2800,7 @@ elif selected == "Profil Yönetimi":
                             }
                             
                             if save_profile_to_sheets(profile_data):
-                                st.success(f"✅ '{new_display_name}' profili başarıyla güncellendi!")
-                                time.sleep(1.5)
+                                _flash(f"✅ '{new_display_name}' profili başarıyla güncellendi!")
                                 st.rerun()
                             else:
                                 st.error("❌ Profil güncellenemedi. Google Sheets bağlantısını kontrol edin.")
@@ -3185,13 +2856,12 @@ elif selected == "Profil Yönetimi":
                         else:
                             try:
                                 if delete_profile_from_sheets(selected_profile):
-                                    st.success(f"✅ '{profile_info['display_name']}' profili başarıyla silindi!")
+                                    _flash(f"✅ '{profile_info['display_name']}' profili başarıyla silindi!")
                                     
                                     # Switch to default profile if deleted profile was active
                                     if get_current_profile() == selected_profile:
                                         set_current_profile("MERT")
                                     
-                                    time.sleep(1.5)
                                     st.rerun()
                                 else:
                                     st.error("❌ Profil silinemedi. Google Sheets bağlantısını kontrol edin.")
@@ -0,0 +1,234 @@
+"""
+Price Engine
+Tüm varlık sınıfları için tek istekte toplu fiyat çekimi.
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+import yfinance as yf
+
+from config import get_config
+from logger import get_logger
+
+logger = get_logger()
+
+PRICE_COLUMNS = ["curr", "prev"]
+
+# Sembol -> {"curr", "prev", "ts"} - process içi fiyat deposu
+_quote_store: Dict[str, Dict[str, float]] = {}
+_store_lock = threading.Lock()
+
+
+def get_ttl_policy() -> Dict[str, int]:
+    """
+    Varlık sınıfına göre fiyat tazelik süreleri (saniye).
+
+    Returns:
+        Varlık sınıfı -> TTL sözlüğü
+    """
+    app = get_config().app
+    return {
+        "BIST_ABD": app.cache_ttl_bist_abd,
+        "KRIPTO": app.cache_ttl_crypto,
+        "EMTIA": app.cache_ttl_emtia,
+        "FX": app.cache_ttl_fx,
+    }
+
+
+def asset_class_for_symbol(symbol: str) -> str:
+    """
+    Yahoo sembolünden varlık sınıfını çıkar.
+
+    Args:
+        symbol: Yahoo Finance sembolü (örn: THYAO.IS, BTC-USD, GC=F, TRY=X)
+
+    Returns:
+        BIST_ABD, KRIPTO, EMTIA veya FX
+    """
+    if symbol.endswith("=X"):
+        return "FX"
+    if symbol.endswith("=F"):
+        return "EMTIA"
+    if symbol.endswith("-USD"):
+        return "KRIPTO"
+    return "BIST_ABD"
+
+
+def _extract_curr_prev(closes: pd.Series) -> Optional[Tuple[float, float]]:
+    """Kapanış serisinden son ve bir önceki geçerli fiyatı döndürür."""
+    closes = closes.dropna()
+    closes = closes[closes > 0]
+    if closes.empty:
+        return None
+    curr = float(closes.iloc[-1])
+    prev = float(closes.iloc[-2]) if len(closes) > 1 else curr
+    return curr, prev
+
+
+def _download_closes(symbols: List[str], period: str) -> Dict[str, Tuple[float, float]]:
+    """
+    Tüm sembolleri tek bir yf.download çağrısıyla çeker.
+
+    Borsa kapalıyken de son kapanış fiyatları döner; veri gelmeyen
+    semboller sonuçta yer almaz.
+    """
+    if not symbols:
+        return {}
+    try:
+        data = yf.download(
+            tickers=" ".join(symbols),
+            period=period,
+            interval="1d",
+            group_by="ticker",
+            auto_adjust=False,
+            progress=False,
+            threads=True,
+            timeout=get_config().app.socket_timeout,
+        )
+    except Exception as e:
+        logger.warning(f"Toplu fiyat indirme başarısız ({period}): {e}")
+        return {}
+
+    if data is None or data.empty:
+        return {}
+
+    prices = {}
+    if isinstance(data.columns, pd.MultiIndex):
+        available = set(data.columns.get_level_values(0))
+        for sym in symbols:
+            if sym not in available:
+                continue
+            try:
+                result = _extract_curr_prev(data[sym]["Close"])
+            except Exception:
+                result = None
+            if result:
+                prices[sym] = result
+    elif "Close" in data.columns and len(symbols) == 1:
+        # Eski yfinance sürümleri tek sembolde düz kolon döndürür
+        result = _extract_curr_prev(data["Close"])
+        if result:
+            prices[symbols[0]] = result
+    return prices
+
+
+def _refresh_symbols(symbols: List[str]) -> Dict[str, Tuple[float, float]]:
+    """
+    Sembolleri tek istekte yeniler; eksikler için tek bir uzun period denemesi yapar.
+
+    Veri gelmeyen sembollerin depodaki son iyi fiyatı ve zaman damgası korunur -
+    böylece bir sonraki çağrıda yine bayat sayılıp tekrar denenirler.
+
+    Returns:
+        Başarıyla çekilen semboller -> (curr, prev)
+    """
+    app = get_config().app
+    fetched = _download_closes(symbols, app.yahoo_period_default)
+    missing = [s for s in symbols if s not in fetched]
+    if missing:
+        fetched.update(_download_closes(missing, app.yahoo_period_fallback))
+
+    now = time.time()
+    with _store_lock:
+        for sym, (curr, prev) in fetched.items():
+            _quote_store[sym] = {"curr": curr, "prev": prev, "ts": now}
+    return fetched
+
+
+def _stale_symbols(symbols: Iterable[str], now: float) -> List[str]:
+    """TTL politikasına göre süresi dolmuş (veya hiç çekilmemiş) sembolleri döndürür."""
+    policy = get_ttl_policy()
+    stale = []
+    with _store_lock:
+        for sym in symbols:
+            entry = _quote_store.get(sym)
+            ttl = policy.get(asset_class_for_symbol(sym), policy["BIST_ABD"])
+            if entry is None or now - entry["ts"] >= ttl:
+                stale.append(sym)
+    return stale
+
+
+def seconds_until_stale(symbols: Iterable[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Şu an taze olan semboller arasında TTL'i en erken dolacak olana kalan süre.
+
+    Args:
+        symbols: Yahoo Finance sembolleri
+        now: Zaman damgası (None ise şimdi)
+
+    Returns:
+        Saniye; taze sembol yoksa None (eksik/bayat semboller zaten yenilenecektir)
+    """
+    now = time.time() if now is None else now
+    policy = get_ttl_policy()
+    remaining = []
+    with _store_lock:
+        for sym in symbols:
+            entry = _quote_store.get(sym)
+            if entry is None:
+                continue
+            ttl = policy.get(asset_class_for_symbol(sym), policy["BIST_ABD"])
+            left = ttl - (now - entry["ts"])
+            if left > 0:
+                remaining.append(left)
+    return min(remaining) if remaining else None
+
+
+def _missing_symbols(symbols: Iterable[str]) -> List[str]:
+    """Depoda hiç bulunmayan sembolleri döndürür."""
+    with _store_lock:
+        return [sym for sym in symbols if sym not in _quote_store]
+
+
+def get_price_frame(symbols: Iterable[str], force: bool = False, only_missing: bool = False) -> pd.DataFrame:
+    """
+    Verilen semboller için güncel ve önceki kapanış fiyatlarını döndür.
+
+    Tüm varlık sınıfları (BIST, ABD, kripto, emtia, döviz) tek bir toplu
+    istekle çekilir; yalnızca kendi sınıfının TTL'i dolmuş semboller yenilenir.
+
+    Args:
+        symbols: Yahoo Finance sembolleri
+        force: True ise TTL'e bakmadan tüm sembolleri yenile
+        only_missing: True ise TTL'e bakılmaz, sadece depoda olmayanlar çekilir
+            (arka plan yenileyicisi depoyu taze tutarken kullanılır)
+
+    Returns:
+        Sembol index'li, curr/prev kolonlu DataFrame (fiyat yoksa 0)
+    """
+    unique = list(dict.fromkeys(s for s in symbols if s))
+    if not unique:
+        return pd.DataFrame(columns=PRICE_COLUMNS, dtype=float)
+
+    if force:
+        stale = unique
+    elif only_missing:
+        stale = _missing_symbols(unique)
+    else:
+        stale = _stale_symbols(unique, time.time())
+    if stale:
+        _refresh_symbols(stale)
+
+    with _store_lock:
+        rows = {sym: _quote_store.get(sym, {"curr": 0.0, "prev": 0.0}) for sym in unique}
+    frame = pd.DataFrame.from_dict(rows, orient="index")[PRICE_COLUMNS].astype(float)
+    frame.index.name = "Symbol"
+    return frame
+
+
+def clear_price_cache(symbols: Optional[Iterable[str]] = None) -> None:
+    """
+    Fiyat deposunu temizle.
+
+    Args:
+        symbols: Temizlenecek semboller (None ise tümü)
+    """
+    with _store_lock:
+        if symbols is None:
+            _quote_store.clear()
+        else:
+            for sym in symbols:
+                _quote_store.pop(sym, None)
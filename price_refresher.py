@@ -0,0 +1,188 @@
+"""
+Price Refresher
+Fiyat deposunu arka planda taze tutan tekil yenileyici thread.
+Sayfa render'ları ağa çıkmadan bu depodan okur.
+"""
+
+import threading
+import time
+from datetime import datetime, time as dtime
+from typing import Iterable, List, Optional
+
+import pandas as pd
+import pytz
+
+from config import get_config
+from logger import get_logger
+from price_engine import get_price_frame, seconds_until_stale
+from utils import get_yahoo_symbol
+
+logger = get_logger()
+
+# (saat dilimi, açılış, kapanış) - hafta içi seans saatleri
+MARKET_SESSIONS = [
+    ("Europe/Istanbul", dtime(9, 55), dtime(18, 10)),  # BIST
+    ("America/New_York", dtime(9, 30), dtime(16, 0)),  # NYSE / NASDAQ
+]
+
+# TTL'i az önce dolan semboller için turlar arası en kısa bekleme
+MIN_WAIT_SECONDS = 5
+
+
+def is_market_open(now: Optional[datetime] = None) -> bool:
+    """
+    BIST veya ABD seanslarından biri açık mı?
+
+    Args:
+        now: Zaman damgası (timezone'lu; None ise şimdi)
+
+    Returns:
+        Seanslardan en az biri açıksa True
+    """
+    now = now or datetime.now(pytz.utc)
+    for tz_name, open_at, close_at in MARKET_SESSIONS:
+        local = now.astimezone(pytz.timezone(tz_name))
+        if local.weekday() < 5 and open_at <= local.time() <= close_at:
+            return True
+    return False
+
+
+def portfolio_price_symbols(df: pd.DataFrame) -> List[str]:
+    """
+    Portföy DataFrame'inden Yahoo'dan çekilecek fiyat sembollerini çıkar.
+    Nakit ve fonlar atlanır; gram altın/gümüş ons sembolüne eşlenir.
+    """
+    if df is None or df.empty or "Kod" not in df.columns or "Pazar" not in df.columns:
+        return []
+    known_funds = set(get_config().market.known_funds)
+    symbols = []
+    for kod, pazar in df[["Kod", "Pazar"]].astype(str).drop_duplicates().itertuples(index=False):
+        pazar_upper = pazar.upper()
+        if not kod.strip() or kod in known_funds or "FON" in pazar_upper:
+            continue
+        if "NAKIT" in pazar_upper:
+            if kod.upper() == "EUR":
+                symbols.append("EURTRY=X")
+            continue
+        if "FIZIKI" in pazar_upper:
+            pazar = "EMTIA"
+        symbols.append(get_yahoo_symbol(kod, pazar))
+    return list(dict.fromkeys(symbols))
+
+
+class PriceRefresher:
+    """
+    Kayıtlı sembollerin fiyatlarını periyodik olarak price_engine deposuna yazan thread.
+
+    Sembol evreni, render'ların register_symbols ile bildirdiği sembollerin
+    (tüm profiller) ve MarketConfig.market_symbols'ün birleşimidir.
+    """
+
+    def __init__(self, interval_open: int, interval_closed: int):
+        self.interval_open = interval_open
+        self.interval_closed = interval_closed
+        self._symbols = {}  # sıralı küme
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_refresh = 0.0
+
+    def register_symbols(self, symbols: Iterable[str]) -> None:
+        """Sembolleri yenileme evrenine ekle."""
+        with self._lock:
+            for sym in symbols:
+                if sym:
+                    self._symbols.setdefault(sym, None)
+
+    def symbols(self) -> List[str]:
+        """Yenilenen sembollerin listesi."""
+        with self._lock:
+            return list(self._symbols)
+
+    def next_interval(self, now: Optional[datetime] = None) -> int:
+        """Piyasa saatine göre bir sonraki yenilemeye kadar beklenecek en uzun süre."""
+        return self.interval_open if is_market_open(now) else self.interval_closed
+
+    def next_wait(self, symbols: List[str]) -> float:
+        """
+        Bir sonraki tura kadar beklenecek süre: piyasa aralığı ile en erken
+        bayatlayacak sembolün TTL'inden kısa olanı (her sınıf kendi TTL'inde yenilenir).
+        """
+        wait = self.next_interval()
+        remaining = seconds_until_stale(symbols)
+        if remaining is not None:
+            wait = min(wait, max(remaining, MIN_WAIT_SECONDS))
+        return wait
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Thread'i başlat (zaten çalışıyorsa bir şey yapmaz)."""
+        with self._lock:
+            if self.is_running():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="price-refresher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Thread'i durdur."""
+        self._stop.set()
+        self._wake.set()
+
+    def refresh_now(self) -> None:
+        """Bekleme süresini kısaltıp hemen yenile."""
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            symbols = self.symbols()
+            if symbols:
+                try:
+                    # Sadece kendi sınıfının TTL'i dolmuş semboller çekilir; veri gelmeyenlerin
+                    # son iyi fiyatı korunur (price_engine)
+                    get_price_frame(symbols)
+                    self.last_refresh = time.time()
+                except Exception as e:
+                    logger.warning(f"Arka plan fiyat yenileme başarısız: {e}")
+            self._wake.wait(self.next_wait(symbols))
+            self._wake.clear()
+
+
+_refresher: Optional[PriceRefresher] = None
+_refresher_lock = threading.Lock()
+
+
+def get_price_refresher() -> PriceRefresher:
+    """
+    Process başına tek PriceRefresher instance'ı (ilk çağrıda başlatılır).
+    Streamlit rerun'ları modülü yeniden yüklemediği için thread bir kez açılır.
+    """
+    global _refresher
+    if _refresher is None:
+        with _refresher_lock:
+            if _refresher is None:
+                config = get_config()
+                refresher = PriceRefresher(
+                    config.app.price_refresh_interval_open,
+                    config.app.price_refresh_interval_closed,
+                )
+                refresher.register_symbols(sym for _, sym in config.market.market_symbols)
+                refresher.start()
+                _refresher = refresher
+    return _refresher
+
+
+def get_quote_frame(symbols: Iterable[str]) -> pd.DataFrame:
+    """
+    Fiyat panosundan curr/prev okur.
+
+    Semboller yenileme evrenine eklenir; yenileyici çalışıyorsa sadece
+    depoda hiç olmayan semboller (ilk görüş) senkron çekilir.
+    """
+    symbols = [s for s in dict.fromkeys(symbols) if s]
+    refresher = get_price_refresher()
+    refresher.register_symbols(symbols)
+    return get_price_frame(symbols, only_missing=refresher.is_running())
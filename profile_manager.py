@@ -11,6 +11,8 @@ import gspread
 from oauth2client.service_account import ServiceAccountCredentials
 import pandas as pd
 import time
+from quota_scheduler import READ, WRITE, get_quota_scheduler
+from tagged_cache import invalidate_tags, profile_tag
 
 # Profile definitions
 PROFILES = {
@@ -128,8 +130,9 @@ def set_current_profile(profile_name: str):
     
     if profile_name in PROFILES:
         st.session_state["current_profile"] = profile_name
-        # Clear cache when switching profiles
-        st.cache_data.clear()
+        # Only the target profile's sheet entries are refreshed - market data,
+        # TEFAS prices, history and news stay warm for every session
+        invalidate_tags(profile_tag(profile_name))
     else:
         raise ValueError(f"Invalid profile: {profile_name}")
 
@@ -233,8 +236,8 @@ def render_profile_selector():
         st.info(f"🔄 **{config['display_name']}**: Tüm profillerin birleşik görünümü")
         
         def on_berguzar_change():
-            # Cache'i temizle ve sayfayı yenile
-            st.cache_data.clear()
+            # Sadece TOTAL kayıtlarını temizle ve sayfayı yenile
+            invalidate_tags(profile_tag(current_profile))
             st.rerun()
         
         new_value = st.checkbox(
@@ -345,15 +348,18 @@ def _get_gspread_client():
         return None
 
 
-def _retry_with_backoff(func, max_retries=3, initial_delay=1.0, max_delay=60.0, backoff_factor=2.0):
+def _retry_with_backoff(func, max_retries=3, initial_delay=1.0, max_delay=60.0, backoff_factor=2.0, kind=READ):
     """
     Retry mechanism with exponential backoff for API calls.
     Handles 429 (quota exceeded) errors specifically.
+    Each attempt takes a token from the shared quota scheduler ("read" or "write").
     """
     last_exception = None
+    scheduler = get_quota_scheduler()
     
     for attempt in range(max_retries):
         try:
+            scheduler.acquire(kind)
             return func()
         except gspread.exceptions.APIError as e:
             last_exception = e
@@ -370,6 +376,7 @@ def _retry_with_backoff(func, max_retries=3, initial_delay=1.0, max_delay=60.0,
             
             # 429 error (quota exceeded) - use longer backoff
             if error_code == 429 or '429' in str(e) or 'Quota exceeded' in str(e) or 'quota' in str(e).lower():
+                scheduler.record_quota_error(kind)
                 if attempt < max_retries - 1:
                     delay = min(initial_delay * (backoff_factor ** attempt), max_delay)
                     st.warning(
@@ -401,6 +408,21 @@ def _retry_with_backoff(func, max_retries=3, initial_delay=1.0, max_delay=60.0,
         raise last_exception
 
 
+def _sheets_call(func, kind=WRITE):
+    """
+    Single metered Google Sheets call without retry (for non-idempotent writes such as
+    append_row / delete_rows, or lookups whose failure has its own handling).
+    """
+    scheduler = get_quota_scheduler()
+    scheduler.acquire(kind)
+    try:
+        return func()
+    except Exception as e:
+        if '429' in str(e) or 'quota' in str(e).lower():
+            scheduler.record_quota_error(kind)
+        raise
+
+
 def _get_profiles_sheet():
     """Get or create the profiles configuration sheet."""
     try:
@@ -408,18 +430,17 @@ def _get_profiles_sheet():
         if client is None:
             return None
         
-        spreadsheet = client.open("PortfoyData")
+        spreadsheet = _retry_with_backoff(lambda: client.open("PortfoyData"), max_retries=2, initial_delay=2.0, max_delay=30.0)
         
         # Try to find existing profiles sheet
         try:
-            ws = spreadsheet.worksheet("Profiller")
+            ws = _sheets_call(lambda: spreadsheet.worksheet("Profiller"), kind=READ)
             return ws
-        except:
+        except gspread.exceptions.WorksheetNotFound:
             # Create new profiles sheet
-            ws = spreadsheet.add_worksheet(title="Profiller", rows=100, cols=10)
-            # Add headers
+            ws = _sheets_call(lambda: spreadsheet.add_worksheet(title="Profiller", rows=100, cols=10))
+            # Headers
             headers = ["name", "display_name", "icon", "color", "is_aggregate", "description", "order"]
-            ws.append_row(headers)
             
             # Add default profiles
             default_profiles = [
@@ -429,8 +450,8 @@ def _get_profiles_sheet():
                 ["İKRAMİYE", "🎁 İkramiye", "🎁", "#10b981", "False", "İkramiye portföyü", "4"],
                 ["TOTAL", "📊 TOPLAM", "📊", "#f59e0b", "True", "Tüm profillerin toplamı", "5"],
             ]
-            for profile in default_profiles:
-                ws.append_row(profile)
+            # Headers and default profiles in a single write
+            _sheets_call(lambda: ws.append_rows([headers] + default_profiles))
             
             return ws
     except Exception as e:
@@ -472,7 +493,7 @@ def load_profiles_from_sheets(force_reload=False) -> Dict[str, Dict]:
     
     try:
         # Get profiles sheet with retry mechanism
-        ws = _retry_with_backoff(_get_profiles_sheet, max_retries=2, initial_delay=2.0, max_delay=30.0)
+        ws = _get_profiles_sheet()
         if ws is None:
             # Return cached or default profiles
             if _profiles_cache is not None:
@@ -552,43 +573,41 @@ def save_profile_to_sheets(profile_data: Dict) -> bool:
         return False
     
     try:
-        def _fetch_and_save():
-            data = ws.get_all_records()
-            
-            # Check if profile exists
-            existing_row = None
-            for idx, row in enumerate(data, start=2):  # Start from row 2 (skip header)
-                if row.get("name", "").strip().upper() == profile_data["name"].upper():
-                    existing_row = idx
-                    break
-            
-            # Prepare row data
-            row_data = [
-                profile_data["name"],
-                profile_data["display_name"],
-                profile_data["icon"],
-                profile_data["color"],
-                str(profile_data.get("is_aggregate", False)),
-                profile_data.get("description", ""),
-                str(profile_data.get("order", len(data) + 1))
-            ]
-            
-            if existing_row:
-                # Update existing profile
-                ws.update(f"A{existing_row}:G{existing_row}", [row_data])
-            else:
-                # Add new profile
-                ws.append_row(row_data)
-            
-            return True
+        # Read and write are metered separately (the read retries, the write is a single call)
+        data = _retry_with_backoff(ws.get_all_records, max_retries=3, initial_delay=2.0, max_delay=60.0)
+        
+        # Check if profile exists
+        existing_row = None
+        for idx, row in enumerate(data, start=2):  # Start from row 2 (skip header)
+            if row.get("name", "").strip().upper() == profile_data["name"].upper():
+                existing_row = idx
+                break
+        
+        # Prepare row data
+        row_data = [
+            profile_data["name"],
+            profile_data["display_name"],
+            profile_data["icon"],
+            profile_data["color"],
+            str(profile_data.get("is_aggregate", False)),
+            profile_data.get("description", ""),
+            str(profile_data.get("order", len(data) + 1))
+        ]
         
-        # Use retry mechanism for saving
-        result = _retry_with_backoff(_fetch_and_save, max_retries=3, initial_delay=2.0, max_delay=60.0)
+        if existing_row:
+            # Update existing profile (idempotent - retried)
+            _retry_with_backoff(
+                lambda: ws.update(f"A{existing_row}:G{existing_row}", [row_data]),
+                max_retries=3, initial_delay=2.0, max_delay=60.0, kind=WRITE,
+            )
+        else:
+            # Add new profile (not idempotent - single call)
+            _sheets_call(lambda: ws.append_row(row_data))
         
         # Clear cache and force reload
         clear_profiles_cache()
         load_profiles_from_sheets(force_reload=True)
-        return result
+        return True
     except Exception as e:
         st.error(f"Profil kaydetme hatası: {str(e)}")
         return False
@@ -601,18 +620,15 @@ def delete_profile_from_sheets(profile_name: str) -> bool:
         return False
     
     try:
-        def _fetch_and_delete():
-            data = ws.get_all_records()
-            
-            # Find and delete row
-            for idx, row in enumerate(data, start=2):  # Start from row 2 (skip header)
-                if row.get("name", "").strip().upper() == profile_name.upper():
-                    ws.delete_rows(idx)
-                    return True
-            return False
+        data = _retry_with_backoff(ws.get_all_records, max_retries=3, initial_delay=2.0, max_delay=60.0)
         
-        # Use retry mechanism for deletion
-        result = _retry_with_backoff(_fetch_and_delete, max_retries=3, initial_delay=2.0, max_delay=60.0)
+        # Find and delete row (not idempotent - a retry could delete the next row, so a single call)
+        result = False
+        for idx, row in enumerate(data, start=2):  # Start from row 2 (skip header)
+            if row.get("name", "").strip().upper() == profile_name.upper():
+                _sheets_call(lambda: ws.delete_rows(idx))
+                result = True
+                break
         
         if result:
             # Clear cache and force reload
@@ -632,7 +648,7 @@ def get_next_profile_order() -> int:
         return len(PROFILE_ORDER) + 1
     
     try:
-        data = ws.get_all_records()
+        data = _sheets_call(ws.get_all_records, kind=READ)
         if not data:
             return 1
         max_order = max([int(row.get("order", 0)) for row in data], default=0)
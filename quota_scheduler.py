@@ -0,0 +1,174 @@
+"""
+Quota Scheduler
+Google Sheets API çağrıları için thread-safe token-bucket kota planlayıcı.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from config import get_config
+
+READ = "read"
+WRITE = "write"
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+_lane_state = threading.local()
+
+
+class TokenBucket:
+    """Sabit hızla dolan token kovası (thread-safe değildir, QuotaScheduler kilidi altında kullanılır)."""
+
+    def __init__(self, capacity: float, refill_per_second: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self.tokens = float(capacity)
+        self._clock = clock
+        self._last_refill = clock()
+
+    def refill(self) -> None:
+        """Geçen süreye göre token ekle."""
+        now = self._clock()
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+            self._last_refill = now
+
+    def seconds_until(self, level: float) -> float:
+        """Token seviyesi 'level'e ulaşana kadar gereken süre."""
+        missing = level - self.tokens
+        if missing <= 0:
+            return 0.0
+        return missing / self.refill_per_second
+
+
+class QuotaScheduler:
+    """
+    Okuma ve yazma için ayrı token kovaları olan, öncelik şeritli kota planlayıcı.
+
+    Interactive (kullanıcı işlemi) istekler kovanın tamamını kullanabilir; background
+    (tarihçe loglama gibi) istekler kovanın bir kısmını interactive için ayırır ve
+    bekleyen interactive istek varsa sıraya girer.
+    """
+
+    def __init__(
+        self,
+        read_per_minute: int = 60,
+        write_per_minute: int = 60,
+        background_reserve: float = 0.25,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._buckets = {
+            READ: TokenBucket(read_per_minute, read_per_minute / 60.0, clock),
+            WRITE: TokenBucket(write_per_minute, write_per_minute / 60.0, clock),
+        }
+        self._background_reserve = background_reserve
+        self._waiting_interactive = {READ: 0, WRITE: 0}
+        self._counters: Dict[str, float] = {}
+
+    def _count(self, name: str, amount: float = 1) -> None:
+        self._counters[name] = self._counters.get(name, 0) + amount
+
+    def acquire(self, kind: str = READ, priority: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+        """
+        Bir API çağrısı için token al, gerekirse bekle.
+
+        Args:
+            kind: "read" veya "write"
+            priority: "interactive" veya "background" (None ise aktif şerit)
+            timeout: Saniye cinsinden en fazla bekleme (None ise sınırsız)
+
+        Returns:
+            Token alındıysa True, zaman aşımında False
+        """
+        if kind not in self._buckets:
+            raise ValueError(f"Bilinmeyen kota tipi: {kind}")
+        priority = priority or current_priority()
+        interactive = priority != BACKGROUND
+        bucket = self._buckets[kind]
+        reserve = 0.0 if interactive else bucket.capacity * self._background_reserve
+        start = self._clock()
+        deadline = None if timeout is None else start + timeout
+
+        with self._cond:
+            if interactive:
+                self._waiting_interactive[kind] += 1
+            try:
+                while True:
+                    bucket.refill()
+                    blocked_by_priority = not interactive and self._waiting_interactive[kind] > 0
+                    if not blocked_by_priority and bucket.tokens >= reserve + 1:
+                        bucket.tokens -= 1
+                        waited = self._clock() - start
+                        self._count(f"{kind}_{priority}_granted")
+                        if waited > 0:
+                            self._count(f"{kind}_wait_seconds", waited)
+                            self._count(f"{kind}_throttled")
+                        return True
+
+                    wait = bucket.seconds_until(reserve + 1) if not blocked_by_priority else 0.05
+                    if deadline is not None:
+                        remaining = deadline - self._clock()
+                        if remaining <= 0:
+                            self._count(f"{kind}_{priority}_timeouts")
+                            return False
+                        wait = min(wait, remaining)
+                    self._cond.wait(max(wait, 0.001))
+            finally:
+                if interactive:
+                    self._waiting_interactive[kind] -= 1
+                self._cond.notify_all()
+
+    def record_quota_error(self, kind: str = READ) -> None:
+        """429 alındığında kovayı boşalt - sonraki istekler doğal olarak yavaşlar."""
+        with self._cond:
+            self._buckets[kind].refill()
+            self._buckets[kind].tokens = 0.0
+            self._count(f"{kind}_quota_errors")
+
+    def stats(self) -> Dict[str, float]:
+        """Sayaçların ve mevcut token seviyelerinin kopyası."""
+        with self._cond:
+            snapshot = dict(self._counters)
+            for kind, bucket in self._buckets.items():
+                bucket.refill()
+                snapshot[f"{kind}_tokens"] = round(bucket.tokens, 2)
+            return snapshot
+
+
+def current_priority() -> str:
+    """Bu thread'in aktif öncelik şeridi."""
+    return getattr(_lane_state, "priority", INTERACTIVE)
+
+
+@contextmanager
+def background_lane():
+    """Blok içindeki Sheets çağrılarını background şeridinde çalıştır."""
+    previous = current_priority()
+    _lane_state.priority = BACKGROUND
+    try:
+        yield
+    finally:
+        _lane_state.priority = previous
+
+
+_scheduler: Optional[QuotaScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_quota_scheduler() -> QuotaScheduler:
+    """Paylaşılan global QuotaScheduler instance'ı."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                app = get_config().app
+                _scheduler = QuotaScheduler(
+                    read_per_minute=app.sheets_read_quota_per_minute,
+                    write_per_minute=app.sheets_write_quota_per_minute,
+                )
+    return _scheduler
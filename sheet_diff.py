@@ -0,0 +1,198 @@
+"""
+Sheet Diff
+Worksheet hücre ızgarası (başlık + satırlar) için diff - son okunan değerler ile yazılacak
+değerler karşılaştırılır, sadece silinen satırlar, değişen hücreler ve yeni satırlar üretilir.
+Diff'ler ve satır eklemeleri tek spreadsheets.batchUpdate isteğinin request'lerine çevrilir.
+"""
+
+import difflib
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence, Tuple
+
+
+@dataclass
+class SheetDiff:
+    """
+    Izgara diff'i (tüm indeksler 0 tabanlı, satır 0 = başlık).
+
+    deletes: Silinecek satırlar - eski ızgara konumları, azalan sırada (alttan uygulanır)
+    updates: (satır, başlangıç kolonu, değerler) - silmeler uygulandıktan sonraki konumlar;
+        ızgara sonuna eklenen satırlar da burada yer alır
+    """
+
+    deletes: List[int] = field(default_factory=list)
+    updates: List[Tuple[int, int, List[Any]]] = field(default_factory=list)
+    base_rows: int = 0
+
+    @property
+    def empty(self) -> bool:
+        return not self.deletes and not self.updates
+
+    @property
+    def kept_rows(self) -> int:
+        """Silmelerden sonra ızgarada kalan satır sayısı (bundan sonraki satırlar eklemedir)."""
+        return self.base_rows - len(self.deletes)
+
+    @property
+    def changed_cells(self) -> int:
+        return sum(len(values) for _, _, values in self.updates)
+
+
+def cell_key(value: Any) -> Any:
+    """Karşılaştırma için hücre değeri - 10, 10.0 ve "10" eşit; None/NaN boş hücre."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return str(value).upper()
+    if isinstance(value, (int, float)):
+        number = float(value)
+        return "" if math.isnan(number) else number
+    text = str(value).strip()
+    try:
+        number = float(text)
+    except ValueError:
+        return text
+    return text if math.isnan(number) or math.isinf(number) else number
+
+
+def _row_keys(row: Sequence[Any], width: int) -> Tuple[Any, ...]:
+    keys = [cell_key(value) for value in list(row)[:width]]
+    return tuple(keys + [""] * (width - len(keys)))
+
+
+def _changed_runs(
+    old: Tuple[Any, ...], new: Tuple[Any, ...], values: List[Any]
+) -> List[Tuple[int, List[Any]]]:
+    """Bir satırdaki ardışık değişen hücre grupları: [(başlangıç kolonu, değerler)]."""
+    runs = []
+    start = None
+    for col, (a, b) in enumerate(zip(old, new)):
+        if a != b:
+            if start is None:
+                start = col
+        elif start is not None:
+            runs.append((start, values[start:col]))
+            start = None
+    if start is not None:
+        runs.append((start, values[start:]))
+    return runs
+
+
+def diff_grid(base: Sequence[Sequence[Any]], target: Sequence[Sequence[Any]]) -> SheetDiff:
+    """
+    base ızgarasını target'a çeviren en küçük yazma kümesi.
+
+    Veri satırları satır bazında eşleştirilir: target'ta karşılığı olmayan eski satırlar
+    silinir (alttaki satırlar yeniden yazılmaz), kalanlar konumsal olarak hücre hücre
+    karşılaştırılır, fazla target satırları sona eklenir. Başlık satırı hiç silinmez.
+
+    Args:
+        base: Son okunan değerler (values API satırları - sondaki boş hücreler eksik olabilir)
+        target: Yazılacak değerler (başlık + satırlar)
+
+    Returns:
+        SheetDiff
+    """
+    width = max([len(row) for row in target] + [len(row) for row in base] + [0])
+    base_keys = [_row_keys(row, width) for row in base]
+    target_rows = [list(row) + [""] * (width - len(row)) for row in target]
+    target_keys = [_row_keys(row, width) for row in target_rows]
+
+    # Target'ta eşi olmayan veri satırları silinir (başlık satırı 0 hariç)
+    deletes = set()
+    matcher = difflib.SequenceMatcher(None, base_keys[1:], target_keys[1:], autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "delete":
+            deletes.update(range(i1 + 1, i2 + 1))
+        elif tag == "replace" and i2 - i1 > j2 - j1:
+            # Düzenleme + silme aynı blokta: önce ilk hücresi (Kod) target'ta kalmayan satırlar silinir
+            wanted = {key[0] for key in target_keys[j1 + 1 : j2 + 1]}
+            candidates = [i for i in range(i1 + 1, i2 + 1) if base_keys[i][0] not in wanted]
+            candidates += [i for i in reversed(range(i1 + 1, i2 + 1)) if i not in candidates]
+            deletes.update(candidates[: (i2 - i1) - (j2 - j1)])
+    kept = [i for i in range(len(base_keys)) if i not in deletes]
+
+    updates = []
+    for row, target_key in enumerate(target_keys):
+        if row < len(kept):
+            for col, values in _changed_runs(base_keys[kept[row]], target_key, target_rows[row]):
+                updates.append((row, col, values))
+        else:
+            updates.append((row, 0, target_rows[row]))
+    # Target'tan uzun kalan eski satırlar da silinir
+    deletes.update(kept[len(target_keys) :])
+    if 0 in deletes:
+        deletes.discard(0)
+        if not target_keys:
+            updates.append((0, 0, [""] * width))
+    return SheetDiff(
+        deletes=sorted(deletes, reverse=True), updates=updates, base_rows=len(base_keys)
+    )
+
+
+def cell_data(value: Any) -> Dict[str, Any]:
+    """Hücre değerini batchUpdate CellData'ya çevirir (RAW yazma ile aynı tipler; boş değer hücreyi temizler)."""
+    if value is None or value == "":
+        return {}
+    if isinstance(value, bool):
+        return {"userEnteredValue": {"boolValue": value}}
+    if isinstance(value, (int, float)):
+        if math.isnan(value) or math.isinf(value):
+            return {}
+        return {"userEnteredValue": {"numberValue": value}}
+    return {"userEnteredValue": {"stringValue": str(value)}}
+
+
+def _row_data(values: Sequence[Any]) -> Dict[str, Any]:
+    return {"values": [cell_data(value) for value in values]}
+
+
+def append_request(sheet_id: int, rows: Sequence[Sequence[Any]]) -> Dict[str, Any]:
+    """Satırları sheet'teki son dolu satırın altına ekleyen request (ızgara gerekirse büyür)."""
+    return {
+        "appendCells": {
+            "sheetId": sheet_id,
+            "rows": [_row_data(row) for row in rows],
+            "fields": "userEnteredValue",
+        }
+    }
+
+
+def diff_requests(diff: SheetDiff, sheet_id: int) -> List[Dict[str, Any]]:
+    """
+    SheetDiff'i batchUpdate request'lerine çevirir.
+
+    Sıra: satır silmeleri (alttan üste), mevcut satırlardaki hücre güncellemeleri, sona eklenen
+    satırlar. Request'ler sırayla ve tek işlem olarak uygulanır - hepsi ya da hiçbiri.
+    """
+    requests = [
+        {
+            "deleteDimension": {
+                "range": {
+                    "sheetId": sheet_id,
+                    "dimension": "ROWS",
+                    "startIndex": row,
+                    "endIndex": row + 1,
+                }
+            }
+        }
+        for row in diff.deletes
+    ]
+    appended = []
+    for row, col, values in diff.updates:
+        if row >= diff.kept_rows:
+            appended.append(values)
+            continue
+        requests.append(
+            {
+                "updateCells": {
+                    "start": {"sheetId": sheet_id, "rowIndex": row, "columnIndex": col},
+                    "rows": [_row_data(values)],
+                    "fields": "userEnteredValue",
+                }
+            }
+        )
+    if appended:
+        requests.append(append_request(sheet_id, appended))
+    return requests
@@ -0,0 +1,222 @@
+"""
+Tagged Cache
+Etiketli (profil / veri alanı) süreç içi cache - st.cache_data.clear() yerine sadece
+etkilenen kayıtlar geçersiz kılınır.
+"""
+
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+DOMAIN_SHEET = "sheet"
+DOMAIN_PRICES = "prices"
+DOMAIN_HISTORY = "history"
+DOMAIN_NEWS = "news"
+
+_MISSING = object()
+
+
+def profile_tag(profile_name: str) -> str:
+    """Profile ait kayıtların etiketi."""
+    return f"profile:{profile_name}"
+
+
+def domain_tag(domain: str) -> str:
+    """Veri alanı etiketi (sheet, prices, history, news)."""
+    return f"domain:{domain}"
+
+
+def namespace_tag(namespace: str) -> str:
+    """Tek bir cache'lenmiş fonksiyonun tüm kayıtlarının etiketi."""
+    return f"ns:{namespace}"
+
+
+class TaggedCache:
+    """
+    (namespace, key) -> değer cache'i; her kayıt TTL ve etiket kümesi taşır.
+
+    invalidate(*tags) sadece o etiketlerden birini taşıyan kayıtları siler;
+    diğer profillerin ve alanların kayıtları sıcak kalır.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, Any], Tuple[float, Any, frozenset]] = {}
+        self._tag_index: Dict[str, Set[Tuple[str, Any]]] = {}
+        self._counters: Dict[str, int] = {}
+
+    def _count(self, name: str) -> None:
+        self._counters[name] = self._counters.get(name, 0) + 1
+
+    def _drop(self, entry_key: Tuple[str, Any]) -> None:
+        """Kilit altında çağrılır."""
+        entry = self._entries.pop(entry_key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tag_index.get(tag)
+            if keys is not None:
+                keys.discard(entry_key)
+                if not keys:
+                    del self._tag_index[tag]
+
+    def get(self, namespace: str, key: Any, default: Any = None) -> Any:
+        """Süresi geçmemiş kaydı döndür; yoksa default."""
+        entry_key = (namespace, key)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is None:
+                self._count("misses")
+                return default
+            if entry[0] <= self._clock():
+                self._drop(entry_key)
+                self._count("expired")
+                return default
+            self._count("hits")
+            return entry[1]
+
+    def set(self, namespace: str, key: Any, value: Any, ttl: float, tags: Iterable[str] = ()) -> None:
+        """Kaydı TTL ve etiketlerle yaz (namespace etiketi otomatik eklenir)."""
+        entry_key = (namespace, key)
+        tags = frozenset(tags) | {namespace_tag(namespace)}
+        with self._lock:
+            self._drop(entry_key)
+            self._entries[entry_key] = (self._clock() + ttl, value, tags)
+            for tag in tags:
+                self._tag_index.setdefault(tag, set()).add(entry_key)
+
+    def evict(self, namespace: str, key: Any) -> bool:
+        """Tek kaydı sil; kayıt varsa True."""
+        with self._lock:
+            found = (namespace, key) in self._entries
+            self._drop((namespace, key))
+            if found:
+                self._count("evictions")
+            return found
+
+    def invalidate(self, *tags: str, namespace: Optional[str] = None) -> int:
+        """
+        Etiketlerden herhangi birini taşıyan kayıtları sil.
+
+        Args:
+            tags: Etiketler
+            namespace: Verilirse sadece bu namespace'teki kayıtlar silinir
+
+        Returns:
+            Silinen kayıt sayısı
+        """
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys |= self._tag_index.get(tag, set())
+            if namespace is not None:
+                keys = {entry_key for entry_key in keys if entry_key[0] == namespace}
+            for entry_key in keys:
+                self._drop(entry_key)
+            self._counters["evictions"] = self._counters.get("evictions", 0) + len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        """Tüm kayıtları sil."""
+        with self._lock:
+            self._entries.clear()
+            self._tag_index.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Sayaçlar ve kayıt sayısı."""
+        with self._lock:
+            snapshot = dict(self._counters)
+            snapshot["entries"] = len(self._entries)
+            return snapshot
+
+
+_cache: Optional[TaggedCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_tagged_cache() -> TaggedCache:
+    """Paylaşılan global TaggedCache instance'ı."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TaggedCache()
+    return _cache
+
+
+def invalidate_tags(*tags: str) -> int:
+    """Paylaşılan cache'te etiketleri geçersiz kıl."""
+    return get_tagged_cache().invalidate(*tags)
+
+
+def tagged_cache(
+    domain: str,
+    ttl: float,
+    key: Optional[Callable[..., Any]] = None,
+    tags: Optional[Callable[..., Iterable[str]]] = None,
+    copy: bool = True,
+):
+    """
+    Fonksiyon sonucunu paylaşılan TaggedCache'te saklayan dekoratör.
+
+    Args:
+        domain: Veri alanı (DOMAIN_SHEET, DOMAIN_PRICES, ...) - etiket olarak eklenir
+        ttl: Saniye cinsinden yaşam süresi
+        key: Argümanlardan cache anahtarı üreten fonksiyon (None ise argümanların kendisi)
+        tags: Argümanlardan ek etiketler üreten fonksiyon (örn. profil etiketi)
+        copy: True ise .copy() destekleyen değerler (DataFrame) kopyalanarak döndürülür
+
+    Dekore edilen fonksiyona clear(), evict(*args, **kwargs), refresh(*args, **kwargs)
+    ve invalidate(*tags) eklenir.
+    """
+    def decorator(func):
+        namespace = f"{func.__module__}.{func.__qualname__}"
+
+        def _key(args, kwargs):
+            if key is not None:
+                return key(*args, **kwargs)
+            return args, tuple(sorted(kwargs.items()))
+
+        def _out(value):
+            return value.copy() if copy and hasattr(value, "copy") else value
+
+        def _compute(args, kwargs, cache_key):
+            value = func(*args, **kwargs)
+            extra = tags(*args, **kwargs) if tags is not None else ()
+            get_tagged_cache().set(namespace, cache_key, value, ttl, [domain_tag(domain), *extra])
+            return value
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            cache_key = _key(args, kwargs)
+            value = get_tagged_cache().get(namespace, cache_key, _MISSING)
+            if value is _MISSING:
+                value = _compute(args, kwargs, cache_key)
+            return _out(value)
+
+        def refresh(*args, **kwargs):
+            """Bu argümanların kaydını yeniden hesapla ve aynı anahtara yaz."""
+            return _out(_compute(args, kwargs, _key(args, kwargs)))
+
+        def evict(*args, **kwargs):
+            """Bu argümanların kaydını sil."""
+            return get_tagged_cache().evict(namespace, _key(args, kwargs))
+
+        def invalidate(*tag_names):
+            """Bu fonksiyonun etiketlerden birini taşıyan kayıtlarını sil."""
+            return get_tagged_cache().invalidate(*tag_names, namespace=namespace)
+
+        def clear():
+            """Bu fonksiyonun tüm kayıtlarını sil."""
+            get_tagged_cache().invalidate(namespace_tag(namespace))
+
+        wrapper.evict = evict
+        wrapper.refresh = refresh
+        wrapper.invalidate = invalidate
+        wrapper.clear = clear
+        wrapper.namespace = namespace
+        return wrapper
+
+    return decorator
@@ -0,0 +1,177 @@
+"""
+TEFAS History
+Fon birim fiyatı (NAV) geçmişi - sadece tutulan fonlar, fon başına paylaşılan TEFAS havuzunda
+eşzamanlı çekilir; seriler history_store ile aynı yerel OHLC deposunda artımlı saklanır.
+"""
+
+from collections import defaultdict
+from concurrent.futures import as_completed
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from config import get_config
+from data_loader import Crawler, get_tefas_fund_pool, get_tefas_session
+from history_store import read_window, sync_store, window_start
+from logger import get_logger
+
+logger = get_logger()
+
+FUND_KEY_PREFIX = "TEFAS:"
+MAX_WINDOW_DAYS = 90  # TEFAS tek istekte en fazla ~3 aylık aralık döndürür
+
+
+def fund_key(fund_code: str) -> str:
+    """Fonun yerel depodaki anahtarı (Yahoo sembolleriyle çakışmaz)."""
+    return f"{FUND_KEY_PREFIX}{str(fund_code).upper().strip()}"
+
+
+def _parse_nav_records(records: list, codes: set) -> Dict[str, List[tuple]]:
+    """BindHistoryInfo kayıtlarından {fon: [(tarih, fiyat), ...]} üretir."""
+    navs = defaultdict(list)
+    for record in records:
+        code = str(record.get("FONKODU", "")).upper().strip()
+        if code not in codes:
+            continue
+        try:
+            price = float(record.get("FIYAT"))
+            stamp = pd.to_datetime(int(record.get("TARIH")), unit="ms", utc=True)
+        except (TypeError, ValueError):
+            continue
+        if price > 0:
+            navs[code].append((stamp.tz_convert("Europe/Istanbul").strftime("%Y-%m-%d"), price))
+    return navs
+
+
+def _fetch_window_api(code: str, start: datetime, end: datetime) -> List[tuple]:
+    """Fonun [start, end] NAV'larını tek POST isteğiyle çeker (fonkod filtreli)."""
+    app = get_config().app
+    payload = {
+        "fontip": "YAT",
+        "sfontur": "",
+        "fonkod": code,
+        "fongrup": "",
+        "bastarih": start.strftime("%d.%m.%Y"),
+        "bittarih": end.strftime("%d.%m.%Y"),
+        "fonturkod": "",
+        "fonunvantip": "",
+    }
+    r = get_tefas_session().post(app.tefas_api_url, data=payload, timeout=app.tefas_timeout)
+    r.raise_for_status()
+    data = r.json()
+    records = data.get("data", []) if isinstance(data, dict) else data
+    return _parse_nav_records(records or [], {code}).get(code, [])
+
+
+def _fetch_window_crawler(code: str, start: datetime, end: datetime) -> List[tuple]:
+    """tefas-crawler ile aynı fon ve pencere (API başarısızsa)."""
+    if Crawler is None:
+        return []
+    res = Crawler().fetch(
+        start=start.strftime("%Y-%m-%d"),
+        end=end.strftime("%Y-%m-%d"),
+        name=code,
+        columns=["code", "date", "price"],
+    )
+    if res is None or res.empty:
+        return []
+    res = res[res["code"] == code].dropna(subset=["price"])
+    return [
+        (pd.Timestamp(date).strftime("%Y-%m-%d"), float(price))
+        for date, price in res[["date", "price"]].itertuples(index=False)
+        if price > 0
+    ]
+
+
+def _fetch_fund_navs(code: str, start: datetime) -> List[tuple]:
+    """Fonun start'tan bugüne NAV'ları - pencere MAX_WINDOW_DAYS'lik parçalara bölünür."""
+    end = datetime.now()
+    rows = []
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=MAX_WINDOW_DAYS - 1), end)
+        try:
+            chunk = _fetch_window_api(code, chunk_start, chunk_end)
+        except Exception as e:
+            logger.warning(f"TEFAS geçmişi API'den alınamadı ({code}, {chunk_start:%Y-%m-%d}): {e}")
+            try:
+                chunk = _fetch_window_crawler(code, chunk_start, chunk_end)
+            except Exception as e:
+                logger.warning(
+                    f"TEFAS geçmişi crawler ile alınamadı ({code}, {chunk_start:%Y-%m-%d}): {e}"
+                )
+                chunk = []
+        rows.extend(chunk)
+        chunk_start = chunk_end + timedelta(days=1)
+    return rows
+
+
+def _fetch_navs(start: datetime, codes: set) -> Dict[str, List[tuple]]:
+    """Fonların start'tan bugüne NAV'ları - fon başına istekler paylaşılan TEFAS havuzunda."""
+    pool = get_tefas_fund_pool()
+    futures = {pool.submit(_fetch_fund_navs, code, start): code for code in codes}
+    navs = {}
+    for future in as_completed(futures):
+        try:
+            rows = future.result()
+        except Exception as e:
+            logger.warning(f"TEFAS geçmişi alınamadı ({futures[future]}): {e}")
+            continue
+        if rows:
+            navs[futures[future]] = rows
+    return navs
+
+
+def _fetch_fund_bars(keys: List[str], start: str) -> Dict[str, list]:
+    """Depo anahtarları (TEFAS:KOD) için start'tan NAV barları (fon/pencere başına tek istek)."""
+    codes = {key[len(FUND_KEY_PREFIX) :] for key in keys}
+    navs = _fetch_navs(datetime.strptime(start, "%Y-%m-%d"), codes)
+    return {
+        fund_key(code): [(date, p, p, p, p, 0.0) for date, p in sorted(rows)]
+        for code, rows in navs.items()
+        if rows
+    }
+
+
+def sync_funds(fund_codes: Iterable[str], start: str, force: bool = False) -> None:
+    """
+    Fonların NAV deposunu start tarihinden bugüne kadar tamamla.
+
+    Yahoo sembolleriyle aynı senkronizasyon (history_store.sync_store): fonlar ihtiyaç
+    duydukları başlangıç tarihine göre gruplanır, gruptaki her fon kendi kodu ile (fon ve pencere
+    başına tek istek) çekilir. TTL içinde yenilenmiş fonlar atlanır; NAV gelmeyenler damgalanmaz.
+
+    Args:
+        fund_codes: TEFAS fon kodları
+        start: "YYYY-MM-DD" - deponun kapsaması gereken ilk tarih
+        force: True ise TTL'e bakmadan boşluğu çek
+    """
+    codes = [c for c in dict.fromkeys(str(c).upper().strip() for c in fund_codes) if c]
+    sync_store([fund_key(code) for code in codes], start, _fetch_fund_bars, force=force)
+
+
+def get_fund_navs(
+    fund_codes: Iterable[str],
+    period: str = "60d",
+    start_date: Optional[pd.Timestamp] = None,
+) -> Dict[str, Optional[pd.Series]]:
+    """
+    Fonlar için istenen penceredeki günlük NAV serileri.
+
+    Args:
+        fund_codes: TEFAS fon kodları
+        period: Pencere uzunluğu ("60d", "1y", ...)
+        start_date: Verilirse pencere en az bu tarihten başlar
+
+    Returns:
+        {fon_kodu: NAV serisi veya None}
+    """
+    codes = [c for c in dict.fromkeys(str(c).upper().strip() for c in fund_codes) if c]
+    if not codes:
+        return {}
+
+    start = window_start(period, start_date)
+    sync_funds(codes, start.strftime("%Y-%m-%d"))
+    windows = read_window([fund_key(code) for code in codes], start)
+    return {code: windows[fund_key(code)] for code in codes}
@@ -0,0 +1,97 @@
+"""
+Disk Cache Tests
+Disk cache modülü için unit testler.
+"""
+
+import os
+import tempfile
+import time
+import unittest
+
+from disk_cache import DiskCache
+
+
+class TestDiskCache(unittest.TestCase):
+    """SQLite disk cache için testler."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = DiskCache(os.path.join(self.tmp_dir.name, "sub", "cache.sqlite3"))
+
+    def tearDown(self):
+        self.cache._conn.close()
+        self.tmp_dir.cleanup()
+
+    def test_ohlc_roundtrip(self):
+        """OHLC barları yazılıp tarih sırasıyla okunabilmeli."""
+        bars = [
+            ("2024-01-03", 10.0, 11.0, 9.0, 10.5, 100.0),
+            ("2024-01-02", 9.0, 10.0, 8.0, 9.5, 200.0),
+        ]
+        self.assertEqual(self.cache.put_ohlc("THYAO.IS", bars), 2)
+        stored = self.cache.get_ohlc("THYAO.IS")
+        self.assertEqual([b[0] for b in stored], ["2024-01-02", "2024-01-03"])
+        self.assertEqual(self.cache.ohlc_first_date("THYAO.IS"), "2024-01-02")
+        self.assertEqual(self.cache.ohlc_last_date("THYAO.IS"), "2024-01-03")
+        self.assertIsNotNone(self.cache.ohlc_updated_at("THYAO.IS"))
+
+    def test_ohlc_range_and_overwrite(self):
+        """Aynı tarih tekrar yazılınca güncellenmeli, aralık filtresi çalışmalı."""
+        self.cache.put_ohlc("GC=F", [("2024-01-01", 1, 1, 1, 1.0, 0), ("2024-01-02", 2, 2, 2, 2.0, 0)])
+        self.cache.put_ohlc("GC=F", [("2024-01-02", 3, 3, 3, 3.0, 0)])
+        stored = self.cache.get_ohlc("GC=F", start="2024-01-02")
+        self.assertEqual(len(stored), 1)
+        self.assertEqual(stored[0][4], 3.0)
+
+    def test_missing_symbol(self):
+        """Bilinmeyen sembol için boş sonuç dönmeli."""
+        self.assertEqual(self.cache.get_ohlc("YOK"), [])
+        self.assertIsNone(self.cache.ohlc_last_date("YOK"))
+        self.assertIsNone(self.cache.ohlc_updated_at("YOK"))
+
+    def test_tefas_nav_max_age(self):
+        """TEFAS fiyatı yaş sınırına göre döndürülmeli."""
+        self.cache.put_tefas_nav("YHB", 1.25, 1.2)
+        curr, prev, fetched_at = self.cache.get_tefas_nav("YHB", max_age=60)
+        self.assertEqual((curr, prev), (1.25, 1.2))
+        self.assertLessEqual(fetched_at, time.time())
+        self.cache._execute("UPDATE tefas_nav SET fetched_at = ?", (time.time() - 120,))
+        self.assertIsNone(self.cache.get_tefas_nav("YHB", max_age=60))
+        self.assertIsNotNone(self.cache.get_tefas_nav("YHB"))
+
+    def test_daily_base_last_row_wins(self):
+        """Aynı gün aynı kod için son yazılan baz fiyat kalmalı."""
+        self.assertFalse(self.cache.has_daily_base("2024-05-02"))
+        self.cache.put_daily_base([
+            ("2024-05-01", "00:31:00", "THYAO", 300.0, "TRY"),
+            ("2024-05-02", "00:31:00", "THYAO", 310.0, "TRY"),
+            ("2024-05-02", "00:45:00", "THYAO", 312.0, "TRY"),
+            ("2024-05-02", "00:45:00", "AAPL", 190.0, "USD"),
+        ])
+        self.assertTrue(self.cache.has_daily_base("2024-05-02"))
+        self.assertEqual(
+            self.cache.get_daily_base("2024-05-02"),
+            [("AAPL", 190.0, "USD"), ("THYAO", 312.0, "TRY")],
+        )
+
+    def test_sheet_sync(self):
+        """Senkronize edilen satır sayısı saklanmalı."""
+        self.assertIsNone(self.cache.get_sheet_sync("daily_base_prices"))
+        self.cache.set_sheet_sync("daily_base_prices", 42)
+        rows_synced, synced_at = self.cache.get_sheet_sync("daily_base_prices")
+        self.assertEqual(rows_synced, 42)
+        self.assertLessEqual(synced_at, time.time())
+
+    def test_clear(self):
+        """Clear tüm tabloları boşaltmalı."""
+        self.cache.put_tefas_nav("TTE", 2.0, 2.0)
+        self.cache.put_ohlc("AAPL", [("2024-01-01", 1, 1, 1, 1.0, 0)])
+        self.cache.put_daily_base([("2024-01-01", "00:31:00", "AAPL", 1.0, "USD")])
+        self.cache.clear()
+        self.assertIsNone(self.cache.get_tefas_nav("TTE"))
+        self.assertEqual(self.cache.get_ohlc("AAPL"), [])
+        self.assertFalse(self.cache.has_daily_base("2024-01-01"))
+
+
+if __name__ == "__main__":
+    unittest.main()
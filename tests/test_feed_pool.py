@@ -0,0 +1,107 @@
+"""
+Feed Pool Tests
+Feed Pool modülü için unit testler.
+"""
+
+import threading
+import unittest
+
+import tagged_cache
+from feed_pool import FeedPool, merge_news
+from tagged_cache import DOMAIN_NEWS, TaggedCache, domain_tag, invalidate_tags
+
+
+class FakeFeed:
+    """Çağrıları sayan, istenirse serbest bırakılana kadar bekleyen akış çekici."""
+
+    def __init__(self, entries=None, fail=False):
+        self.entries = entries or {}
+        self.fail = fail
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+        self._lock = threading.Lock()
+
+    def __call__(self, query):
+        with self._lock:
+            self.calls.append(query)
+        self.release.wait(5)
+        if self.fail:
+            raise RuntimeError("akış çekilemedi")
+        return self.entries.get(query, [])
+
+
+def news(title, timestamp):
+    return {"title": title, "link": "", "date": "", "timestamp": timestamp}
+
+
+class TestMergeNews(unittest.TestCase):
+    """merge_news için testler."""
+
+    def test_orders_newest_first(self):
+        """Kayıtlar yayın zamanına göre en yeni önce sıralanmalı; zamanı olmayan sona kalmalı."""
+        merged = merge_news([news("A", 100.0), {"title": "B"}, news("C", 300.0), news("D", 200.0)])
+        self.assertEqual([item["title"] for item in merged], ["C", "D", "A", "B"])
+
+    def test_dedup_keeps_first_seen(self):
+        """Aynı başlık bir kez yer almalı, ilk görülen kayıt tutulmalı; başlıksızlar atlanmalı."""
+        first = dict(news("A", 100.0), source="Portföy")
+        merged = merge_news([first, news("", 500.0), dict(news("A", 400.0), source="İzleme")])
+        self.assertEqual(merged, [first])
+
+    def test_limit(self):
+        """limit verilirse en yeni limit kadar kayıt dönmeli."""
+        merged = merge_news([news(str(i), float(i)) for i in range(5)], limit=2)
+        self.assertEqual([item["title"] for item in merged], ["4", "3"])
+
+
+class TestFeedPool(unittest.TestCase):
+    """FeedPool cache ve devam eden çekim paylaşımı testleri."""
+
+    def setUp(self):
+        tagged_cache._cache = TaggedCache()
+
+    def tearDown(self):
+        tagged_cache._cache = None
+
+    def test_cache_hit_skips_fetch(self):
+        """Cache'teki sorgu tekrar çekilmemeli; domain invalidation sonrası yeniden çekilmeli."""
+        fetch = FakeFeed({"THYAO": [news("A", 1.0)]})
+        pool = FeedPool(fetch, ttl=60, max_workers=2)
+        self.assertEqual(pool.fetch_many(["THYAO", "THYAO"], 5), {"THYAO": [news("A", 1.0)]})
+        self.assertEqual(pool.fetch_many(["THYAO"], 5), {"THYAO": [news("A", 1.0)]})
+        self.assertEqual(fetch.calls, ["THYAO"])
+
+        invalidate_tags(domain_tag(DOMAIN_NEWS))
+        pool.fetch_many(["THYAO"], 5)
+        self.assertEqual(fetch.calls, ["THYAO", "THYAO"])
+
+    def test_inflight_fetch_is_shared(self):
+        """Devam eden çekim sonraki çağrılarca paylaşılmalı; zamanında gelmeyen sorgu sonuçta olmamalı."""
+        fetch = FakeFeed({"AAPL": [news("B", 2.0)]})
+        fetch.release.clear()
+        pool = FeedPool(fetch, ttl=60, max_workers=2)
+
+        self.assertEqual(pool.fetch_many(["AAPL"], 0.05), {})
+        self.assertEqual(pool.fetch_many(["AAPL"], 0.05), {})
+        self.assertEqual(fetch.calls, ["AAPL"])
+
+        fetch.release.set()
+        self.assertEqual(pool.fetch_many(["AAPL"], 5), {"AAPL": [news("B", 2.0)]})
+        self.assertEqual(fetch.calls, ["AAPL"])
+
+    def test_failed_fetch_not_cached(self):
+        """Başarısız çekim boş dönmeli, on_error çağrılmalı ve bir sonraki çağrıda tekrar denenmeli."""
+        errors = []
+        fetch = FakeFeed(fail=True)
+        pool = FeedPool(fetch, ttl=60, max_workers=1, on_error=lambda q, e: errors.append(q))
+        self.assertEqual(pool.fetch_many(["BTC"], 5), {"BTC": []})
+        self.assertEqual(errors, ["BTC"])
+
+        fetch.fail = False
+        pool.fetch_many(["BTC"], 5)
+        self.assertEqual(fetch.calls, ["BTC", "BTC"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+History Sync Tests
+Tarihsel fiyat senkronizasyonu modülü için unit testler.
+"""
+
+import os
+import tempfile
+import unittest
+
+from disk_cache import DiskCache
+from history_sync import covered_from, plan_sync, sync_keys
+
+TTL = 600
+
+
+def bar(date, close=1.0):
+    return (date, close, close, close, close, 0.0)
+
+
+class FakeFetcher:
+    """Çağrıları kaydeden, verilen barları döndüren indirici."""
+
+    def __init__(self, bars=None):
+        self.bars = bars or {}
+        self.calls = []
+
+    def __call__(self, keys, start):
+        self.calls.append((sorted(keys), start))
+        return {key: self.bars[key] for key in keys if key in self.bars}
+
+
+class TestHistorySync(unittest.TestCase):
+    """plan_sync ve sync_keys için testler (gerçek SQLite deposuyla)."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.disk = DiskCache(os.path.join(self.tmp_dir.name, "cache.sqlite3"))
+
+    def tearDown(self):
+        self.disk._conn.close()
+        self.tmp_dir.cleanup()
+
+    def test_covered_from(self):
+        """Kapsama payı takvim günü olarak eklenmeli."""
+        self.assertEqual(covered_from("2024-01-05"), "2024-01-09")
+        self.assertEqual(covered_from("2024-01-05", slack_days=0), "2024-01-05")
+
+    def test_coverage_slack(self):
+        """Pencere başı hafta sonuna denk gelse de depo kapsıyor sayılmalı; pay aşılırsa tam çekilmeli."""
+        # 2024-01-06 Cumartesi - ilk bar Pazartesi
+        self.disk.put_ohlc("THYAO.IS", [bar("2024-01-08"), bar("2024-01-10")])
+        self.disk.put_ohlc("AAPL", [bar("2024-01-15"), bar("2024-01-16")])
+        groups = plan_sync(
+            ["THYAO.IS", "AAPL", "BTC-USD"], "2024-01-06", self.disk, TTL, force=True
+        )
+        self.assertEqual(groups, {"2024-01-10": ["THYAO.IS"], "2024-01-06": ["AAPL", "BTC-USD"]})
+
+    def test_ttl_skips_fresh_keys(self):
+        """TTL içinde yenilenmiş anahtar atlanmalı; süre dolunca veya force ile boşluk çekilmeli."""
+        self.disk.put_ohlc("GC=F", [bar("2024-01-02"), bar("2024-01-03")])
+        stamped = self.disk.ohlc_updated_at("GC=F")
+        self.assertEqual(plan_sync(["GC=F"], "2024-01-02", self.disk, TTL, now=stamped + 1), {})
+        self.assertEqual(
+            plan_sync(["GC=F"], "2024-01-02", self.disk, TTL, now=stamped + TTL),
+            {"2024-01-03": ["GC=F"]},
+        )
+        self.assertEqual(
+            plan_sync(["GC=F"], "2024-01-02", self.disk, TTL, force=True, now=stamped + 1),
+            {"2024-01-03": ["GC=F"]},
+        )
+
+    def test_gap_fetch_extends_store(self):
+        """Boşluk son saklanan tarihten çekilmeli ve mevcut barlara eklenmeli."""
+        self.disk.put_ohlc("THYAO.IS", [bar("2024-01-02", 10.0), bar("2024-01-03", 11.0)])
+        fetcher = FakeFetcher({"THYAO.IS": [bar("2024-01-03", 11.5), bar("2024-01-04", 12.0)]})
+        stored = sync_keys(["THYAO.IS"], "2024-01-02", fetcher, self.disk, TTL, force=True)
+        self.assertEqual(fetcher.calls, [(["THYAO.IS"], "2024-01-03")])
+        self.assertEqual(list(stored), ["THYAO.IS"])
+        closes = [(b[0], b[4]) for b in self.disk.get_ohlc("THYAO.IS")]
+        self.assertEqual(closes, [("2024-01-02", 10.0), ("2024-01-03", 11.5), ("2024-01-04", 12.0)])
+
+    def test_failed_fetch_writes_no_metadata(self):
+        """Veri gelmeyen anahtar damgalanmamalı ve bir sonraki çağrıda tekrar denenmeli."""
+        self.disk.put_ohlc("AAPL", [bar("2024-01-02"), bar("2024-01-03")])
+        before = self.disk.ohlc_updated_at("AAPL")
+        fetcher = FakeFetcher()
+        stored = sync_keys(["AAPL", "MSFT"], "2024-01-02", fetcher, self.disk, TTL, force=True)
+        self.assertEqual(stored, {})
+        self.assertEqual(self.disk.ohlc_updated_at("AAPL"), before)
+        self.assertIsNone(self.disk.ohlc_updated_at("MSFT"))
+        sync_keys(["MSFT"], "2024-01-02", fetcher, self.disk, TTL)
+        self.assertEqual(fetcher.calls[-1], (["MSFT"], "2024-01-02"))
+
+    def test_without_disk(self):
+        """Disk yoksa her anahtar start'tan çekilip çağırana döndürülmeli."""
+        fetcher = FakeFetcher({"EURTRY=X": [bar("2024-01-02")]})
+        stored = sync_keys(["EURTRY=X", "USDTRY=X"], "2024-01-02", fetcher, None, TTL)
+        self.assertEqual(fetcher.calls, [(["EURTRY=X", "USDTRY=X"], "2024-01-02")])
+        self.assertEqual(stored, {"EURTRY=X": [bar("2024-01-02")]})
+
+
+if __name__ == "__main__":
+    unittest.main()
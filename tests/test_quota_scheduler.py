@@ -0,0 +1,113 @@
+"""
+Quota Scheduler Tests
+Kota planlayıcı modülü için unit testler.
+"""
+
+import unittest
+
+from quota_scheduler import (
+    BACKGROUND,
+    INTERACTIVE,
+    READ,
+    WRITE,
+    QuotaScheduler,
+    TokenBucket,
+    background_lane,
+    current_priority,
+)
+
+
+class FakeClock:
+    """Elle ilerletilen saat."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+    """TokenBucket için testler."""
+
+    def test_refill_is_capped(self):
+        """Kova zamanla dolmalı ama kapasiteyi aşmamalı."""
+        clock = FakeClock()
+        bucket = TokenBucket(10, 1.0, clock)
+        bucket.tokens = 0
+        clock.advance(4)
+        bucket.refill()
+        self.assertAlmostEqual(bucket.tokens, 4.0)
+        self.assertAlmostEqual(bucket.seconds_until(6), 2.0)
+        clock.advance(100)
+        bucket.refill()
+        self.assertEqual(bucket.tokens, 10.0)
+
+
+class TestQuotaScheduler(unittest.TestCase):
+    """QuotaScheduler için testler."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = QuotaScheduler(read_per_minute=4, write_per_minute=2, clock=self.clock)
+
+    def test_grants_up_to_capacity(self):
+        """Kapasite kadar token anında verilmeli, sonrası zaman aşımına düşmeli."""
+        for _ in range(4):
+            self.assertTrue(self.scheduler.acquire(READ, timeout=0))
+        self.assertFalse(self.scheduler.acquire(READ, timeout=0))
+        stats = self.scheduler.stats()
+        self.assertEqual(stats["read_interactive_granted"], 4)
+        self.assertEqual(stats["read_interactive_timeouts"], 1)
+
+    def test_read_and_write_buckets_are_separate(self):
+        """Okuma kovası boşken yazma token'ı alınabilmeli."""
+        for _ in range(4):
+            self.scheduler.acquire(READ, timeout=0)
+        self.assertTrue(self.scheduler.acquire(WRITE, timeout=0))
+
+    def test_refill_over_time(self):
+        """Boşalan kova geçen süreyle tekrar token vermeli."""
+        for _ in range(2):
+            self.scheduler.acquire(WRITE, timeout=0)
+        self.assertFalse(self.scheduler.acquire(WRITE, timeout=0))
+        self.clock.advance(30)  # 2/dakika -> 30 saniyede 1 token
+        self.assertTrue(self.scheduler.acquire(WRITE, timeout=0))
+
+    def test_background_reserve(self):
+        """Background istekler kovanın interactive payını tüketmemeli."""
+        granted = 0
+        while self.scheduler.acquire(READ, priority=BACKGROUND, timeout=0):
+            granted += 1
+        self.assertEqual(granted, 3)  # 4 kapasite, %25 rezerv
+        self.assertTrue(self.scheduler.acquire(READ, priority=INTERACTIVE, timeout=0))
+        self.assertEqual(self.scheduler.stats()["read_background_timeouts"], 1)
+
+    def test_quota_error_drains_bucket(self):
+        """429 kaydı kovayı boşaltmalı ve sayaca yazılmalı."""
+        self.scheduler.record_quota_error(READ)
+        self.assertFalse(self.scheduler.acquire(READ, timeout=0))
+        stats = self.scheduler.stats()
+        self.assertEqual(stats["read_quota_errors"], 1)
+        self.assertEqual(stats["read_tokens"], 0)
+
+    def test_unknown_kind(self):
+        """Bilinmeyen kota tipi hata vermeli."""
+        with self.assertRaises(ValueError):
+            self.scheduler.acquire("delete", timeout=0)
+
+    def test_background_lane(self):
+        """background_lane bloğu içinde öncelik background olmalı."""
+        self.assertEqual(current_priority(), INTERACTIVE)
+        with background_lane():
+            self.assertEqual(current_priority(), BACKGROUND)
+            self.assertTrue(self.scheduler.acquire(READ, timeout=0))
+        self.assertEqual(current_priority(), INTERACTIVE)
+        self.assertEqual(self.scheduler.stats()["read_background_granted"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
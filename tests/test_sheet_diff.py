@@ -0,0 +1,117 @@
+"""
+Sheet Diff Tests
+Sheet diff modülü için unit testler.
+"""
+
+import unittest
+
+from sheet_diff import append_request, cell_data, cell_key, diff_grid, diff_requests
+
+HEADER = ["Kod", "Pazar", "Adet", "Maliyet", "Tip", "Notlar"]
+
+
+class TestSheetDiff(unittest.TestCase):
+    """diff_grid için testler."""
+
+    def setUp(self):
+        # values API biçimi: sayılar metin, sondaki boş hücreler eksik
+        self.base = [
+            HEADER,
+            ["THYAO", "BIST", "100", "250.5", "Portfoy"],
+            ["AAPL", "ABD", "10", "150", "Portfoy", "uzun vade"],
+            ["TERA", "FON", "1000", "1.25", "Portfoy"],
+        ]
+        self.target = [
+            HEADER,
+            ["THYAO", "BIST", 100.0, 250.5, "Portfoy", ""],
+            ["AAPL", "ABD", 10, 150.0, "Portfoy", "uzun vade"],
+            ["TERA", "FON", 1000, 1.25, "Portfoy", ""],
+        ]
+
+    def test_cell_key(self):
+        """Sayısal değerler tipten bağımsız, boş ve NaN aynı sayılmalı."""
+        self.assertEqual(cell_key("10"), cell_key(10.0))
+        self.assertEqual(cell_key(None), cell_key(float("nan")))
+        self.assertEqual(cell_key(" BIST "), "BIST")
+        self.assertNotEqual(cell_key("1,5"), cell_key(1.5))
+
+    def test_unchanged_grid_is_empty(self):
+        """Aynı içerik (tip/biçim farkı hariç) hiç yazma üretmemeli."""
+        self.assertTrue(diff_grid(self.base, self.target).empty)
+
+    def test_single_cell_edit(self):
+        """Tek hücre düzenlemesi tek hücrelik güncelleme olmalı."""
+        self.target[2][2] = 12
+        diff = diff_grid(self.base, self.target)
+        self.assertEqual(diff.deletes, [])
+        self.assertEqual(diff.updates, [(2, 2, [12])])
+
+    def test_delete_middle_row_does_not_rewrite_rest(self):
+        """Ortadaki satır silinince alttaki satırlar yeniden yazılmamalı."""
+        del self.target[2]
+        diff = diff_grid(self.base, self.target)
+        self.assertEqual(diff.deletes, [2])
+        self.assertEqual(diff.updates, [])
+
+    def test_append_and_trailing_delete(self):
+        """Yeni satır sona eklenmeli; boşaltılan portföyde başlık kalmalı."""
+        self.target.append(["BTC", "KRIPTO", 0.5, 60000, "Portfoy", ""])
+        diff = diff_grid(self.base, self.target)
+        self.assertEqual(diff.updates, [(4, 0, ["BTC", "KRIPTO", 0.5, 60000, "Portfoy", ""])])
+        emptied = diff_grid(self.base, [HEADER])
+        self.assertEqual(emptied.deletes, [3, 2, 1])
+        self.assertEqual(emptied.updates, [])
+
+    def test_multi_row_edit_with_delete(self):
+        """Çok satırlı düzenleme + silme tek diff'te, silme sonrası konumlarla gelmeli."""
+        del self.target[1]
+        self.target[2][3] = 1.3  # TERA maliyeti (silmeden sonra satır 2)
+        diff = diff_grid(self.base, self.target)
+        self.assertEqual(diff.deletes, [1])
+        self.assertEqual(diff.updates, [(2, 3, [1.3])])
+        self.assertEqual(diff.changed_cells, 1)
+
+    def test_edit_and_delete_in_same_block(self):
+        """Aynı blokta düzenleme + silme: Kod'u kalmayan satır silinmeli, alttakiler yeniden yazılmamalı."""
+        self.target[1][2] = 120
+        del self.target[2]
+        diff = diff_grid(self.base, self.target)
+        self.assertEqual(diff.deletes, [2])
+        self.assertEqual(diff.updates, [(1, 2, [120])])
+
+
+class TestDiffRequests(unittest.TestCase):
+    """batchUpdate request üretimi için testler."""
+
+    def test_cell_data_types(self):
+        """Sayılar numberValue, metinler stringValue; boş/NaN hücreyi temizlemeli."""
+        self.assertEqual(cell_data(1.5), {"userEnteredValue": {"numberValue": 1.5}})
+        self.assertEqual(cell_data("THYAO"), {"userEnteredValue": {"stringValue": "THYAO"}})
+        self.assertEqual(cell_data(True), {"userEnteredValue": {"boolValue": True}})
+        self.assertEqual(cell_data(""), {})
+        self.assertEqual(cell_data(float("nan")), {})
+
+    def test_request_order(self):
+        """Silmeler önce (alttan), sonra hücre güncellemesi, en son ekleme gelmeli."""
+        base = [HEADER, ["A", "BIST", "1"], ["B", "BIST", "2"], ["C", "BIST", "3"]]
+        target = [HEADER, ["A", "BIST", 5], ["C", "BIST", 3], ["D", "ABD", 4]]
+        requests = diff_requests(diff_grid(base, target), sheet_id=7)
+        kinds = [next(iter(r)) for r in requests]
+        self.assertEqual(kinds, ["deleteDimension", "updateCells", "appendCells"])
+        self.assertEqual(requests[0]["deleteDimension"]["range"]["startIndex"], 2)
+        self.assertEqual(
+            requests[1]["updateCells"]["start"], {"sheetId": 7, "rowIndex": 1, "columnIndex": 2}
+        )
+        appended = requests[2]["appendCells"]["rows"][0]["values"]
+        self.assertEqual(appended[0], {"userEnteredValue": {"stringValue": "D"}})
+
+    def test_append_request(self):
+        """Satır ekleme request'i her satır için bir RowData içermeli."""
+        request = append_request(3, [["2024-01-01", "THYAO", 10.0]])
+        self.assertEqual(request["appendCells"]["sheetId"], 3)
+        self.assertEqual(len(request["appendCells"]["rows"]), 1)
+        self.assertEqual(request["appendCells"]["fields"], "userEnteredValue")
+
+
+if __name__ == "__main__":
+    unittest.main()
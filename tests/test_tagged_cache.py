@@ -0,0 +1,147 @@
+"""
+Tagged Cache Tests
+Etiketli cache modülü için unit testler.
+"""
+
+import unittest
+
+import tagged_cache
+from tagged_cache import (
+    DOMAIN_PRICES,
+    DOMAIN_SHEET,
+    TaggedCache,
+    domain_tag,
+    profile_tag,
+    tagged_cache as cached,
+)
+
+
+class FakeClock:
+    """Elle ilerletilen saat."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTaggedCache(unittest.TestCase):
+    """TaggedCache için testler."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = TaggedCache(clock=self.clock)
+
+    def test_get_set_and_ttl(self):
+        """Kayıt TTL boyunca okunmalı, süresi dolunca düşmeli."""
+        self.cache.set("ns", "k", 1, ttl=10)
+        self.assertEqual(self.cache.get("ns", "k"), 1)
+        self.clock.now = 11
+        self.assertIsNone(self.cache.get("ns", "k"))
+        self.assertEqual(self.cache.stats()["expired"], 1)
+
+    def test_invalidate_only_tagged_entries(self):
+        """Bir profilin etiketi geçersiz kılınınca diğer profil ve alanlar kalmalı."""
+        self.cache.set("sheet", "MERT", "m", ttl=60, tags=[profile_tag("MERT"), domain_tag(DOMAIN_SHEET)])
+        self.cache.set("sheet", "ANNEM", "a", ttl=60, tags=[profile_tag("ANNEM"), domain_tag(DOMAIN_SHEET)])
+        self.cache.set("prices", "AAPL", 1.0, ttl=60, tags=[domain_tag(DOMAIN_PRICES)])
+        self.assertEqual(self.cache.invalidate(profile_tag("MERT")), 1)
+        self.assertIsNone(self.cache.get("sheet", "MERT"))
+        self.assertEqual(self.cache.get("sheet", "ANNEM"), "a")
+        self.assertEqual(self.cache.get("prices", "AAPL"), 1.0)
+
+    def test_evict_single_key(self):
+        """evict sadece verilen anahtarı silmeli."""
+        self.cache.set("ns", "a", 1, ttl=60)
+        self.cache.set("ns", "b", 2, ttl=60)
+        self.assertTrue(self.cache.evict("ns", "a"))
+        self.assertFalse(self.cache.evict("ns", "a"))
+        self.assertEqual(self.cache.get("ns", "b"), 2)
+
+    def test_overwrite_drops_old_tags(self):
+        """Aynı anahtar yeniden yazılınca eski etiketler kaydı silmemeli."""
+        self.cache.set("ns", "k", 1, ttl=60, tags=["old"])
+        self.cache.set("ns", "k", 2, ttl=60, tags=["new"])
+        self.assertEqual(self.cache.invalidate("old"), 0)
+        self.assertEqual(self.cache.get("ns", "k"), 2)
+
+
+class TestTaggedCacheDecorator(unittest.TestCase):
+    """tagged_cache dekoratörü için testler."""
+
+    def setUp(self):
+        tagged_cache._cache = TaggedCache()
+        self.calls = []
+
+        @cached(DOMAIN_SHEET, ttl=60, tags=lambda name: [profile_tag(name)])
+        def load(name):
+            self.calls.append(name)
+            return {"name": name}
+
+        self.load = load
+
+    def tearDown(self):
+        tagged_cache._cache = None
+
+    def test_caches_per_argument(self):
+        """Aynı argüman ikinci kez hesaplanmamalı, sonuç kopya olarak dönmeli."""
+        first = self.load("MERT")
+        first["name"] = "changed"
+        self.assertEqual(self.load("MERT"), {"name": "MERT"})
+        self.load("ANNEM")
+        self.assertEqual(self.calls, ["MERT", "ANNEM"])
+
+    def test_evict_and_clear(self):
+        """evict tek kaydı, clear fonksiyonun tüm kayıtlarını silmeli."""
+        self.load("MERT")
+        self.load("ANNEM")
+        self.assertTrue(self.load.evict("MERT"))
+        self.load("MERT")
+        self.load("ANNEM")
+        self.assertEqual(self.calls, ["MERT", "ANNEM", "MERT"])
+        self.load.clear()
+        self.load("ANNEM")
+        self.assertEqual(self.calls[-1], "ANNEM")
+        self.assertEqual(len(self.calls), 4)
+
+    def test_profile_tag_invalidation(self):
+        """Profil etiketi geçersiz kılınınca sadece o profil yeniden hesaplanmalı."""
+        self.load("MERT")
+        self.load("ANNEM")
+        tagged_cache.invalidate_tags(profile_tag("ANNEM"))
+        self.load("MERT")
+        self.load("ANNEM")
+        self.assertEqual(self.calls, ["MERT", "ANNEM", "ANNEM"])
+
+    def test_refresh_rewrites_single_key(self):
+        """refresh sadece o anahtarı yeniden hesaplayıp yazmalı; anahtar dışı argümanlar yok sayılmalı."""
+        @cached(DOMAIN_PRICES, ttl=60, key=lambda code, force=False: code.upper())
+        def price(code, force=False):
+            self.calls.append((code, force))
+            return 2.0 if force else 1.0
+
+        self.assertEqual(price("tera"), 1.0)
+        price("AFT")
+        self.assertEqual(price.refresh("TERA", force=True), 2.0)
+        self.assertEqual(price("tera"), 2.0)
+        price("AFT")
+        self.assertEqual(self.calls, [("tera", False), ("AFT", False), ("TERA", True)])
+
+    def test_invalidate_scoped_to_function(self):
+        """Fonksiyonun invalidate'i aynı etiketli diğer fonksiyonların kayıtlarına dokunmamalı."""
+        @cached(DOMAIN_SHEET, ttl=60, tags=lambda name: [profile_tag(name)])
+        def sales(name):
+            self.calls.append(("sales", name))
+            return [name]
+
+        self.load("MERT")
+        sales("MERT")
+        self.assertEqual(self.load.invalidate(profile_tag("MERT")), 1)
+        self.load("MERT")
+        sales("MERT")
+        self.assertEqual(self.calls, ["MERT", ("sales", "MERT"), "MERT"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Ticker Tape Tests
+Fiyat bandı modülü için unit testler.
+"""
+
+import unittest
+
+import ticker_tape
+from ticker_tape import clear_card_cache, format_price, quote_card, render_tape, value_card
+
+
+class TestTickerTape(unittest.TestCase):
+    """Kart üretimi ve cache için testler."""
+
+    def setUp(self):
+        clear_card_cache()
+
+    def test_format_price(self):
+        """Endeksler tam sayı, küçük fiyatlar 4 hane gösterilmeli."""
+        self.assertEqual(format_price("XU100.IS", 9876.5), "9,876")
+        self.assertEqual(format_price("AAPL", 189.123), "189.12")
+        self.assertEqual(format_price("DOGE-USD", 0.12345), "0.1235")
+
+    def test_quote_card_direction(self):
+        """Yükselişte yeşil ▲, düşüşte kırmızı ▼ rozeti olmalı."""
+        up = quote_card("AAPL", "Apple", 110.0, 100.0)
+        self.assertIn("▲ +10.0%", up)
+        self.assertIn("Apple", up)
+        down = quote_card("MSFT", None, 90.0, 100.0)
+        self.assertIn("▼ -10.0%", down)
+        self.assertIn("MSFT", down)
+
+    def test_invalid_price_returns_empty(self):
+        """Sıfır veya eksik fiyat boş kart üretmeli."""
+        self.assertEqual(quote_card("AAPL", None, 0.0, 100.0), "")
+        self.assertEqual(quote_card("AAPL", None, 100.0, None), "")
+
+    def test_unchanged_card_is_reused(self):
+        """Görünen değer değişmedikçe kart yeniden üretilmemeli."""
+        first = quote_card("AAPL", None, 110.0, 100.0)
+        original = ticker_tape.TICKER_CARD_TEMPLATE
+        ticker_tape.TICKER_CARD_TEMPLATE = "changed"
+        try:
+            self.assertIs(quote_card("AAPL", None, 110.001, 100.0), first)
+            self.assertEqual(quote_card("AAPL", None, 120.0, 100.0), "changed")
+        finally:
+            ticker_tape.TICKER_CARD_TEMPLATE = original
+
+    def test_cache_slot_per_label(self):
+        """Aynı sembol farklı etiketlerle gösterilince kartlar birbirinin slotunu ezmemeli."""
+        market = quote_card("GC=F", "ONS", 2000.0, 1990.0)
+        portfolio = quote_card("GC=F", "Altın", 2000.0, 1990.0)
+        self.assertIn("ONS", market)
+        self.assertIn("Altın", portfolio)
+        original = ticker_tape.TICKER_CARD_TEMPLATE
+        ticker_tape.TICKER_CARD_TEMPLATE = "changed"
+        try:
+            self.assertIs(quote_card("GC=F", "ONS", 2000.0, 1990.0), market)
+            self.assertIs(quote_card("GC=F", "Altın", 2000.0, 1990.0), portfolio)
+        finally:
+            ticker_tape.TICKER_CARD_TEMPLATE = original
+
+    def test_render_tape(self):
+        """Bant içeriği animasyon için iki kez tekrarlanmalı, boşsa yedek metin kullanılmalı."""
+        card = value_card("BTC.D", "BTC.D", "52.10%")
+        html = render_tape([card, ""], "animate-market")
+        self.assertTrue(html.startswith('<div class="ticker-text animate-market">'))
+        self.assertEqual(html.count("52.10%"), 2)
+        self.assertIn("Portföy boş.", render_tape([], "animate-portfolio", "Portföy boş."))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+"""
+Write Behind Tests
+Write-behind kuyruğu modülü için unit testler.
+"""
+
+import threading
+import unittest
+
+from write_behind import WriteBehindQueue
+
+
+class FakeWriter:
+    """Yazmaları kaydeden, istenen sayıda başarısız olan yazıcı."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.writes = []
+
+    def __call__(self, profile, frame):
+        if self.failures > 0:
+            self.failures -= 1
+            raise RuntimeError("429 Quota exceeded")
+        self.writes.append((profile, list(frame)))
+
+
+class TestWriteBehindQueue(unittest.TestCase):
+    """WriteBehindQueue için testler (thread başlatılmadan, flush senkron)."""
+
+    def setUp(self):
+        self.sleeps = []
+        self.settled = []
+
+    def _queue(self, writer, max_retries=3):
+        return WriteBehindQueue(
+            writer,
+            max_retries=max_retries,
+            retry_delay=1.0,
+            on_settled=self.settled.append,
+            sleep=self.sleeps.append,
+        )
+
+    def test_pending_copy_is_authoritative(self):
+        """Gönderilen kopya yazılana kadar okunmalı ve dışarıdan değiştirilememeli."""
+        queue = self._queue(FakeWriter())
+        frame = ["THYAO"]
+        queue.submit("MERT", frame)
+        frame.append("AAPL")
+        self.assertEqual(queue.pending_frame("MERT"), ["THYAO"])
+        self.assertIsNone(queue.pending_frame("ANNEM"))
+        queue.flush()
+        self.assertIsNone(queue.pending_frame("MERT"))
+        self.assertEqual(self.settled, ["MERT"])
+
+    def test_edits_are_coalesced(self):
+        """Aynı profile art arda gelen düzenlemeler tek yazmada birleşmeli."""
+        writer = FakeWriter()
+        queue = self._queue(writer)
+        queue.submit("MERT", ["A"])
+        queue.submit("MERT", ["A", "B"])
+        queue.submit("ANNEM", ["C"])
+        queue.flush()
+        self.assertEqual(writer.writes, [("MERT", ["A", "B"]), ("ANNEM", ["C"])])
+        self.assertFalse(queue.has_pending())
+
+    def test_retry_with_backoff(self):
+        """Geçici hatada artan beklemeyle tekrar denenmeli, hata bildirilmemeli."""
+        writer = FakeWriter(failures=2)
+        queue = self._queue(writer)
+        queue.submit("MERT", ["A"])
+        queue.flush()
+        self.assertEqual(writer.writes, [("MERT", ["A"])])
+        self.assertEqual(self.sleeps, [1.0, 2.0])
+        self.assertEqual(queue.pop_failures(), [])
+
+    def test_failure_drops_copy_and_reports(self):
+        """Denemeler biterse kopya düşmeli ve hata bir kez bildirilmeli."""
+        queue = self._queue(FakeWriter(failures=5), max_retries=2)
+        queue.submit("MERT", ["A"])
+        queue.flush()
+        self.assertIsNone(queue.pending_frame("MERT"))
+        failures = queue.pop_failures()
+        self.assertEqual(len(failures), 1)
+        self.assertEqual(failures[0][0], "MERT")
+        self.assertIn("429", failures[0][1])
+        self.assertEqual(queue.pop_failures(), [])
+        self.assertEqual(self.settled, ["MERT"])
+
+    def test_newer_copy_survives_write_of_older(self):
+        """Yazma sırasında gelen yeni kopya, eski kopyanın yazılmasıyla düşmemeli."""
+        queue = None
+
+        def writer(profile, frame):
+            if frame == ["A"]:
+                queue.submit(profile, ["A", "B"])
+
+        queue = self._queue(writer)
+        queue.submit("MERT", ["A"])
+        queue.flush()
+        self.assertEqual(queue.pending_frame("MERT"), ["A", "B"])
+        self.assertEqual(self.settled, [])
+
+    def test_discard(self):
+        """discard bekleyen kopyayı yazmadan düşürmeli."""
+        writer = FakeWriter()
+        queue = self._queue(writer)
+        queue.submit("MERT", ["A"])
+        with queue.exclusive("MERT"):
+            queue.discard("MERT")
+        queue.flush()
+        self.assertEqual(writer.writes, [])
+
+
+class TestCommitExclusive(unittest.TestCase):
+    """Senkron yazma (satış) ile arka plan yazmasının sıralaması için testler."""
+
+    def test_edit_queued_then_sale(self):
+        """Satış, devam eden arka plan yazmasını beklemeli ve diff'i onun sonucuna göre kurmalı."""
+        sheet = ["A"]
+        writing = threading.Event()
+        release = threading.Event()
+        writes = []
+
+        def writer(profile, frame):
+            writing.set()
+            release.wait(5)
+            writes.append(list(frame))
+            sheet[:] = frame
+
+        queue = WriteBehindQueue(writer, max_retries=1, sleep=lambda _: None)
+        queue.submit("MERT", ["A", "B"])
+        worker = threading.Thread(target=queue.flush)
+        worker.start()
+        self.assertTrue(writing.wait(5))
+
+        seen = []
+
+        def sale():
+            seen.append(list(sheet))  # diff tabanı kilit içinde okunur
+            sheet[:] = ["A", "B", "SATIS"]
+            return True
+
+        seller = threading.Thread(target=queue.commit_exclusive, args=("MERT", sale))
+        seller.start()
+        seller.join(0.2)
+        self.assertTrue(seller.is_alive())  # yazma bitene kadar bekler
+        release.set()
+        worker.join(5)
+        seller.join(5)
+
+        self.assertEqual(seen, [["A", "B"]])
+        self.assertEqual(writes, [["A", "B"]])
+        self.assertEqual(sheet, ["A", "B", "SATIS"])
+        self.assertFalse(queue.has_pending())
+
+    def test_sale_supersedes_queued_copy(self):
+        """Başarılı satış bekleyen kopyayı düşürmeli; yazma yapmayan satış kopyayı bırakmalı."""
+        writes = []
+        queue = WriteBehindQueue(lambda profile, frame: writes.append(frame), sleep=lambda _: None)
+        queue.submit("MERT", ["A"])
+        queue.commit_exclusive("MERT", lambda: False)
+        self.assertTrue(queue.has_pending("MERT"))
+        queue.commit_exclusive("MERT", lambda: True)
+        queue.flush()
+        self.assertEqual(writes, [])
+        self.assertFalse(queue.has_pending())
+
+
+if __name__ == "__main__":
+    unittest.main()
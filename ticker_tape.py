@@ -0,0 +1,106 @@
+"""
+Ticker Tape
+Kayan fiyat bandı HTML'i - kartlar tek şablondan üretilir ve sembol bazında cache'lenir.
+"""
+
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+TICKER_CARD_TEMPLATE = (
+    '<span style="display: inline-block; background: {bg}; border: 1px solid {color}; border-radius: 5px; '
+    "padding: 3px 8px; margin: 0 2px; font-family: 'Inter', -apple-system, sans-serif;\">"
+    '<span style="color: #8b9aff; font-size: 12px; font-weight: 700; letter-spacing: 0.2px;">{label}</span>'
+    '<span style="color: {value_color}; font-size: 13px; font-weight: 800; margin: 0 4px;">{value}</span>'
+    "{badge}</span>"
+)
+TICKER_BADGE_TEMPLATE = (
+    '<span style="color: {color}; font-size: 12px; font-weight: 800; background: rgba(0,0,0,0.3); '
+    'padding: 2px 4px; border-radius: 3px;">{arrow} {change}</span>'
+)
+
+UP_STYLE = ("#00e676", "rgba(0, 230, 118, 0.15)", "▲")
+DOWN_STYLE = ("#ff5252", "rgba(255, 82, 82, 0.15)", "▼")
+HIGHLIGHT_STYLE = ("#f2a900", "rgba(242, 169, 0, 0.15)")
+
+# (sembol, etiket) -> (görünen değerler anahtarı, kart HTML'i); sadece değişen kartlar yeniden
+# üretilir - aynı sembol farklı etiketlerle (piyasa/portföy bandı) birbirinin slotunu ezmez
+_card_cache: Dict[Tuple[str, str], Tuple[tuple, str]] = {}
+_card_lock = threading.Lock()
+
+
+def format_price(symbol: str, price: float) -> str:
+    """Bant için fiyat formatı (endeksler tam sayı, küçük fiyatlar 4 hane)."""
+    if "XU100" in symbol or "^" in symbol:
+        return f"{price:,.0f}"
+    return f"{price:,.2f}" if price > 1 else f"{price:,.4f}"
+
+
+def _cached_card(symbol: str, label: str, key: tuple, build) -> str:
+    """Anahtar değişmediyse önceki HTML'i döndür, değiştiyse build() ile üret."""
+    slot = (symbol, label)
+    with _card_lock:
+        hit = _card_cache.get(slot)
+        if hit is not None and hit[0] == key:
+            return hit[1]
+    html = build()
+    with _card_lock:
+        _card_cache[slot] = (key, html)
+    return html
+
+
+def quote_card(symbol: str, label: Optional[str], price: float, prev: float) -> str:
+    """
+    Fiyat/değişim kartı.
+
+    Args:
+        symbol: Cache anahtarı olarak kullanılan sembol
+        label: Kartta görünen isim (None ise sembol)
+        price: Güncel fiyat
+        prev: Önceki kapanış
+
+    Returns:
+        Kart HTML'i; geçersiz fiyatta boş string
+    """
+    if not price or not prev or price <= 0 or prev <= 0:
+        return ""
+    label = label or symbol
+    value = format_price(symbol, price)
+    change = f"{(price - prev) / prev * 100:+.1f}%"
+    up = price >= prev
+    key = (label, value, change, up)
+
+    def build():
+        color, bg, arrow = UP_STYLE if up else DOWN_STYLE
+        badge = TICKER_BADGE_TEMPLATE.format(color=color, arrow=arrow, change=change)
+        return TICKER_CARD_TEMPLATE.format(
+            bg=bg, color=color, label=label, value_color="#ffffff", value=value, badge=badge
+        )
+
+    return _cached_card(symbol, label, key, build)
+
+
+def value_card(symbol: str, label: str, value: str) -> str:
+    """Değişim rozeti olmayan vurgulu kart (BTC.D gibi)."""
+
+    def build():
+        color, bg = HIGHLIGHT_STYLE
+        return TICKER_CARD_TEMPLATE.format(
+            bg=bg, color=color, label=label, value_color=color, value=value, badge=""
+        )
+
+    return _cached_card(symbol, label, (label, value), build)
+
+
+def render_tape(cards: Iterable[str], css_class: str, empty_html: str = "") -> str:
+    """
+    Kartları kayan bant div'ine yerleştir.
+    Sonsuz kaydırma animasyonu için içerik iki kez tekrarlanır.
+    """
+    body = " ".join(card for card in cards if card) or empty_html
+    return f'<div class="ticker-text {css_class}">{body} {body}</div>'
+
+
+def clear_card_cache() -> None:
+    """Kart cache'ini temizle."""
+    with _card_lock:
+        _card_cache.clear()
@@ -0,0 +1,189 @@
+"""
+Write Behind
+Portföy düzenlemeleri için süreç içi write-behind kuyruğu.
+Düzenleme anında yerel (yetkili) kopyaya uygulanır, UI bu kopyadan çizilir; arka plan
+thread'i profil başına sadece en son kopyayı (birleştirilmiş) Sheets'e yazar.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def _copy(frame: Any) -> Any:
+    return frame.copy() if hasattr(frame, "copy") else frame
+
+
+class WriteBehindQueue:
+    """
+    Profil -> bekleyen kopya kuyruğu.
+
+    submit() kopyayı hemen yetkili yapar ve thread'i uyandırır; aynı profile art arda gelen
+    düzenlemeler tek yazmada birleşir. Yazma başarısız olursa artan beklemeyle tekrar
+    denenir; denemeler biterse kopya düşürülür (UI Sheets'teki duruma döner) ve hata
+    pop_failures() ile UI'a bildirilir.
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[str, Any], None],
+        max_retries: int = 5,
+        retry_delay: float = 2.0,
+        on_settled: Optional[Callable[[str], None]] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Args:
+            writer: (profil, kopya) yazan fonksiyon - hata durumunda exception fırlatır
+            max_retries: Bir kopya için en fazla yazma denemesi
+            retry_delay: İlk tekrar öncesi bekleme (her denemede iki katına çıkar)
+            on_settled: Kopya yazıldığında ya da düşürüldüğünde profil ile çağrılır (cache temizliği)
+            sleep: Bekleme fonksiyonu (testlerde değiştirilir)
+        """
+        self.writer = writer
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.on_settled = on_settled
+        self._sleep = sleep
+        self._pending: Dict[str, Tuple[int, Any]] = {}
+        self._version = 0
+        self._failures: List[Tuple[str, str]] = []
+        self._profile_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _profile_lock(self, profile: str) -> threading.Lock:
+        with self._lock:
+            return self._profile_locks.setdefault(profile, threading.Lock())
+
+    def submit(self, profile: str, frame: Any) -> None:
+        """Kopyayı yetkili yap ve arka planda yazılmak üzere kuyruğa al."""
+        with self._lock:
+            self._version += 1
+            self._pending[profile] = (self._version, _copy(frame))
+        self._wake.set()
+
+    def pending_frame(self, profile: str) -> Any:
+        """Henüz yazılmamış kopya (kopyası); yoksa None."""
+        with self._lock:
+            entry = self._pending.get(profile)
+        return _copy(entry[1]) if entry is not None else None
+
+    def has_pending(self, profile: Optional[str] = None) -> bool:
+        with self._lock:
+            return bool(self._pending) if profile is None else profile in self._pending
+
+    def discard(self, profile: str, version: Optional[int] = None) -> None:
+        """
+        Bekleyen kopyayı yazmadan düşür (aynı değişikliği içeren senkron bir yazma yapıldıysa).
+        version verilirse sadece o sürüm hâlâ bekliyorsa düşürülür.
+        """
+        with self._lock:
+            if version is None or self._current(profile, version):
+                self._pending.pop(profile, None)
+
+    @contextmanager
+    def exclusive(self, profile: str):
+        """Blok boyunca bu profil için arka plan yazması yapılmaz."""
+        with self._profile_lock(profile):
+            yield
+
+    def commit_exclusive(self, profile: str, commit: Callable[[], Any]) -> Any:
+        """
+        Senkron yazmayı profil kilidi altında çalıştırır.
+
+        commit() sheet'i okuyup diff'i kilit içinde hesaplamalıdır - böylece devam eden bir
+        arka plan yazmasının bitmesi beklenir ve diff onun sonucuna göre kurulur. Başarılı
+        olursa o an bekleyen kopya düşürülür (commit onu zaten içerir); commit sırasında
+        gelen daha yeni bir kopya ve False dönen (yazma yapmayan) commit'in kopyası kuyrukta kalır.
+        """
+        with self._profile_lock(profile):
+            with self._lock:
+                entry = self._pending.get(profile)
+            result = commit()
+            if entry is not None and result is not False:
+                self.discard(profile, entry[0])
+        return result
+
+    def pop_failures(self) -> List[Tuple[str, str]]:
+        """Başarısız yazmaları (profil, hata) olarak döndür ve listeyi boşalt."""
+        with self._lock:
+            failures, self._failures = self._failures, []
+        return failures
+
+    def _current(self, profile: str, version: int) -> bool:
+        entry = self._pending.get(profile)
+        return entry is not None and entry[0] == version
+
+    def _settle(self, profile: str, version: int, error: Optional[Exception] = None) -> None:
+        with self._lock:
+            if not self._current(profile, version):
+                return  # Bu arada daha yeni bir kopya geldi - o yazılacak
+            del self._pending[profile]
+            if error is not None:
+                self._failures.append((profile, str(error)))
+        if self.on_settled is not None:
+            try:
+                self.on_settled(profile)
+            except Exception:
+                pass
+
+    def _flush_profile(self, profile: str) -> None:
+        error = None
+        version = None
+        for attempt in range(self.max_retries):
+            with self._profile_lock(profile):
+                with self._lock:
+                    entry = self._pending.get(profile)
+                if entry is None:
+                    return
+                version, frame = entry
+                try:
+                    self.writer(profile, frame)
+                    error = None
+                except Exception as e:
+                    error = e
+            if error is None:
+                self._settle(profile, version)
+                return
+            if attempt < self.max_retries - 1:
+                self._sleep(self.retry_delay * (2 ** attempt))
+        self._settle(profile, version, error)
+
+    def flush(self) -> None:
+        """Bekleyen tüm profilleri yaz (thread dışında senkron çağrılabilir)."""
+        with self._lock:
+            profiles = list(self._pending)
+        for profile in profiles:
+            self._flush_profile(profile)
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Thread'i başlat (zaten çalışıyorsa bir şey yapmaz)."""
+        with self._lock:
+            if self.is_running():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Thread'i durdur (bekleyen kopyalar kuyrukta kalır)."""
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.flush()
+            except Exception:
+                pass